@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,17 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def inline_jobs(settings):
+    """Фоновые задачи (миниатюры, письма) выполняются сразу после
+    коммита, как без очереди."""
+    settings.JOBS_BROKER = 'inline://'
+
+
+@pytest.fixture
+def query_budget(db):
+    """``with query_budget(queries=3, duplicates=0, time_ms=500): ...``"""
+    from core.testing import QueryBudget
+    return QueryBudget
@@ -0,0 +1,120 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+# Бюджеты снимаются на нескольких постах и комментариях разных
+# авторов: N+1 добавил бы по запросу на каждый объект. Первый запрос
+# страниц групп, профилей и постов — валидатор условного GET.
+POSTS = 5
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def feed(user, another_user, django_user_model):
+    group = Group.objects.create(title='Группа', slug='budget',
+                                 description='Описание')
+    authors = [
+        django_user_model.objects.create_user(username=f'author{number}')
+        for number in range(POSTS)
+    ]
+    posts = [Post.objects.create(text=f'Пост {number}', author=author,
+                                 group=group)
+             for number, author in enumerate(authors)]
+    for author in authors:
+        Follow.objects.create(user=user, author=author)
+        Comment.objects.create(post=posts[0], author=author,
+                               text='Комментарий')
+    return group, authors, posts
+
+
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('name, args, queries', [
+        ('posts:index', (), 1),
+        ('posts:group_list', ('budget',), 3),
+        ('posts:profile', ('author0',), 3),
+        ('posts:search', (), 1),
+        ('api:post_list', (), 1),
+    ])
+    def test_anonymous_pages(self, client, feed, query_budget, name, args,
+                             queries):
+        with query_budget(queries=queries, duplicates=0, time_ms=1000):
+            response = client.get(reverse(name, args=args), {'q': 'пост'})
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('name, args, queries', [
+        ('posts:index', (), 0),
+        ('posts:group_list', ('budget',), 1),
+        ('posts:profile', ('author0',), 1),
+        ('posts:post_detail', ('post',), 1),
+    ])
+    def test_not_modified(self, client, feed, query_budget, name, args,
+                          queries):
+        if args == ('post',):
+            args = (feed[2][0].pk,)
+        url = reverse(name, args=args)
+        etag = client.get(url)['ETag']
+        with query_budget(queries=queries, duplicates=0, time_ms=1000):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_api_include(self, client, feed, query_budget):
+        # Связанные объекты — по запросу на связь, а не на строку.
+        with query_budget(queries=3, duplicates=0, time_ms=1000):
+            response = client.get(reverse('api:post_list'),
+                                  {'include': 'author,group'})
+        assert len(response.json()['included']['author']) == POSTS
+
+    def test_post_detail(self, client, feed, query_budget):
+        # Комментарии пяти разных авторов читаются одним запросом.
+        post = feed[2][0]
+        with query_budget(queries=3, duplicates=0, time_ms=1000):
+            response = client.get(reverse('posts:post_detail',
+                                          args=(post.pk,)))
+        assert len(response.context['comments']) == POSTS
+
+    @pytest.mark.parametrize('name, queries', [
+        ('posts:index', 3),
+        ('posts:follow_index', 4),
+        ('posts:post_create', 3),
+    ])
+    def test_user_pages(self, user_client, feed, query_budget, name,
+                        queries):
+        with query_budget(queries=queries, duplicates=0, time_ms=1000):
+            response = user_client.get(reverse(name))
+        assert response.status_code == 200
+
+    def test_post_edit(self, user_client, user, feed, query_budget):
+        post = Post.objects.create(text='Свой пост', author=user)
+        with query_budget(queries=4, duplicates=0, time_ms=1000):
+            response = user_client.get(
+                reverse('posts:post_edit', args=(post.pk,)))
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('name, data, queries', [
+        ('posts:post_create', {'text': 'Новый пост'}, 10),
+        ('posts:add_comment', {'text': 'Комментарий'}, 7),
+        ('posts:profile_follow', None, 13),
+        ('posts:profile_unfollow', None, 10),
+    ])
+    def test_writes(self, user_client, user, feed, query_budget, name, data,
+                    queries):
+        group, authors, posts = feed
+        args = {
+            'posts:post_create': (),
+            'posts:add_comment': (posts[0].pk,),
+            'posts:profile_follow': ('AnotherUser',),
+            'posts:profile_unfollow': (authors[0].username,),
+        }[name]
+        with query_budget(queries=queries, duplicates=0, time_ms=1000):
+            if data is None:
+                response = user_client.get(reverse(name, args=args))
+            else:
+                response = user_client.post(reverse(name, args=args), data)
+        assert response.status_code == 302
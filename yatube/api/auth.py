@@ -0,0 +1,41 @@
+"""Токены доступа к API для записи.
+
+Токен — подписанные ключ пользователя и отпечаток хэша его пароля:
+хранить токены в базе не нужно, а смена пароля их отзывает.
+"""
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .resources import ApiError
+
+User = get_user_model()
+
+TOKEN_SALT = 'api.token'
+
+
+def password_tag(user):
+    return salted_hmac(TOKEN_SALT, user.password).hexdigest()[:16]
+
+
+def user_token(user):
+    return signing.Signer(salt=TOKEN_SALT).sign(
+        f'{user.pk}:{password_tag(user)}')
+
+
+def authenticate(request):
+    """Пользователь по заголовку ``Authorization: Token <токен>``."""
+    scheme, _, token = request.META.get(
+        'HTTP_AUTHORIZATION', '').partition(' ')
+    if scheme != 'Token' or not token:
+        raise ApiError('Нужен заголовок Authorization: Token <токен>.',
+                       status=401)
+    try:
+        user_id, tag = signing.Signer(salt=TOKEN_SALT).unsign(
+            token.strip()).split(':')
+    except (signing.BadSignature, ValueError):
+        raise ApiError('Неверный токен.', status=401)
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or not constant_time_compare(tag, password_tag(user)):
+        raise ApiError('Неверный токен.', status=401)
+    return user
@@ -0,0 +1,80 @@
+"""Повтор запросов записи по заголовку ``Idempotency-Key``.
+
+Ответ сохраняется в той же транзакции, что и созданные строки: повтор
+запроса с тем же ключом получает сохранённый ответ и ничего не создаёт.
+Одновременный второй запрос с тем же ключом упирается в уникальность
+ключа, и его транзакция откатывается целиком.
+"""
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.jobs import LOW, job
+from .models import IdempotencyKey
+from .resources import ApiError
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def fingerprint(request):
+    digest = hashlib.sha256(
+        f'{request.method} {request.path}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def expired_before():
+    return timezone.now() - datetime.timedelta(
+        seconds=settings.API_IDEMPOTENCY_TTL)
+
+
+def run_once(request, user, run):
+    """Выполняет ``run()`` в транзакции не больше раза на ключ.
+
+    ``run`` возвращает тело и код ответа; результат — тело, код
+    и признак того, что ответ взят из сохранённых.
+    """
+    key = request.META.get(HEADER)
+    if key is None:
+        try:
+            with transaction.atomic():
+                return (*run(), False)
+        except IntegrityError:
+            raise ApiError('Конфликт с одновременным запросом, '
+                           'повторите его.', status=409)
+    if not key or len(key) > MAX_LENGTH:
+        raise ApiError(f'Idempotency-Key должен быть не длиннее '
+                       f'{MAX_LENGTH} символов.')
+    request_fingerprint = fingerprint(request)
+    try:
+        with transaction.atomic():
+            stored = (IdempotencyKey.objects.select_for_update()
+                      .filter(user=user, key=key).first())
+            if stored is not None and stored.created < expired_before():
+                stored.delete()
+                stored = None
+            if stored is not None:
+                if stored.fingerprint != request_fingerprint:
+                    raise ApiError('Ключ уже использован для другого '
+                                   'запроса.', status=422)
+                return json.loads(stored.response), stored.status, True
+            payload, status = run()
+            IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=request_fingerprint,
+                status=status, response=json.dumps(
+                    payload, cls=DjangoJSONEncoder, ensure_ascii=False))
+    except IntegrityError:
+        raise ApiError('Запрос с этим ключом уже выполняется.', status=409)
+    return payload, status, False
+
+
+@job(priority=LOW)
+def clear_expired():
+    return IdempotencyKey.objects.filter(
+        created__lt=expired_before()).delete()[0]
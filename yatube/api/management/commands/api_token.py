@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.auth import user_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выдаёт токен API для записи от имени пользователя.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Пользователя {options["username"]} нет.')
+        self.stdout.write(user_token(user))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from api.idempotency import clear_expired
+
+
+class Command(BaseCommand):
+    help = 'Удаляет сохранённые ответы с истёкшим Idempotency-Key.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Удалено ключей: {clear_expired()}')
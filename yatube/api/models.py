@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class IdempotencyKey(models.Model):
+    """Сохранённый ответ на запрос записи с заголовком Idempotency-Key."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='idempotency_keys',
+                             verbose_name='Пользователь')
+    key = models.CharField('Ключ', max_length=255)
+    fingerprint = models.CharField(
+        'Отпечаток запроса', max_length=64,
+        help_text='SHA-256 метода, адреса и тела запроса')
+    status = models.PositiveSmallIntegerField('Код ответа')
+    response = models.TextField('Тело ответа')
+    created = models.DateTimeField('Дата запроса', auto_now_add=True,
+                                   db_index=True)
+
+    class Meta:
+        verbose_name = 'Ключ идемпотентности'
+        verbose_name_plural = 'Ключи идемпотентности'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'],
+                                    name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return self.key
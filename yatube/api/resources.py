@@ -0,0 +1,168 @@
+"""Описание ресурсов API и их сериализация через ``values()``.
+
+Строки читаются словарями, без создания моделей, а связанные объекты
+из ``?include=`` подгружаются одним запросом на связь для всей страницы
+(как ``prefetch_related``) и отдаются один раз в ``included``.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.pagination import CursorPaginator
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class Resource:
+    """Набор полей, порядок и связи одного вида объектов."""
+
+    def __init__(self, name, queryset, fields, ordering=('-id',),
+                 relations=None, default_fields=None):
+        self.name = name
+        self.queryset = queryset
+        self.fields = tuple(fields)
+        self.default_fields = tuple(default_fields or fields)
+        self.ordering = ordering
+        self.relations = relations or {}
+
+    def requested_fields(self, request):
+        raw = request.GET.get('fields')
+        if not raw:
+            return self.default_fields
+        fields = tuple(field for field in raw.split(',') if field)
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise ApiError(f'Неизвестные поля {self.name}: '
+                           f'{", ".join(sorted(unknown))}.')
+        return fields
+
+    def requested_relations(self, request):
+        raw = request.GET.get('include')
+        if not raw:
+            return ()
+        names = tuple(name for name in raw.split(',') if name)
+        unknown = set(names) - set(self.relations)
+        if unknown:
+            raise ApiError(f'Нельзя включить: '
+                           f'{", ".join(sorted(unknown))}.')
+        return names
+
+    def rows(self, queryset, fields):
+        """``values()`` с полями ответа и полями, нужными для работы."""
+        return queryset.values(*fields)
+
+    def clean(self, row, fields):
+        return {field: convert(field, row[field]) for field in fields}
+
+
+class Relation:
+    """Связь, подгружаемая по ``?include=``: поле строки → ресурс."""
+
+    def __init__(self, field, resource):
+        self.field = field
+        self.resource = resource
+
+    def load(self, rows):
+        ids = {row[self.field] for row in rows} - {None}
+        if not ids:
+            return []
+        fields = self.resource.default_fields
+        return [self.resource.clean(row, fields) for row in
+                self.resource.queryset.filter(pk__in=ids).values(*fields)]
+
+
+def convert(field, value):
+    if field == 'image':
+        return settings.MEDIA_URL + value if value else None
+    return value
+
+
+USERS = Resource('users', User.objects.all(),
+                 ('id', 'username', 'first_name', 'last_name'))
+GROUPS = Resource('groups', Group.objects.all(),
+                  ('id', 'slug', 'title', 'description', 'posts_count'),
+                  ordering=('id',))
+POSTS = Resource(
+    'posts', Post.objects.all(),
+    ('id', 'text', 'pub_date', 'updated', 'author', 'group', 'image',
+     'comments_count'),
+    ordering=('-pub_date', '-id'),
+    relations={'author': Relation('author', USERS),
+               'group': Relation('group', GROUPS)},
+)
+COMMENTS = Resource(
+    'comments', Comment.objects.all(),
+    ('id', 'post', 'author', 'text', 'created'),
+    ordering=('created', 'id'),
+    relations={'author': Relation('author', USERS),
+               'post': Relation('post', POSTS)},
+)
+FOLLOWS = Resource(
+    'follows', Follow.objects.all(), ('id', 'user', 'author'),
+    relations={'user': Relation('user', USERS),
+               'author': Relation('author', USERS)},
+)
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit должен быть числом.')
+    return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+
+def included(resource, relations, rows):
+    return {name: resource.relations[name].load(rows)
+            for name in relations}
+
+
+def serialize_page(request, resource, queryset):
+    """Страница списка по курсору: данные, включения и ссылки."""
+    fields = resource.requested_fields(request)
+    relations = resource.requested_relations(request)
+    ordering_fields = [field.lstrip('-') for field in resource.ordering]
+    relation_fields = [resource.relations[name].field for name in relations]
+    needed = dict.fromkeys([*fields, *ordering_fields, *relation_fields])
+    paginator = CursorPaginator(resource.rows(queryset, needed),
+                                page_size(request),
+                                ordering=resource.ordering)
+    page = paginator.cursor_page(request.GET.get('cursor'))
+    rows = page.object_list
+    payload = {'data': [resource.clean(row, fields) for row in rows]}
+    if relations:
+        payload['included'] = included(resource, relations, rows)
+    payload['links'] = {
+        'next': cursor_link(request, page.next_cursor),
+        'previous': cursor_link(request, page.previous_cursor),
+    }
+    return payload
+
+
+def serialize_one(request, resource, queryset):
+    fields = resource.requested_fields(request)
+    relations = resource.requested_relations(request)
+    relation_fields = [resource.relations[name].field for name in relations]
+    row = resource.rows(
+        queryset, dict.fromkeys([*fields, *relation_fields])).first()
+    if row is None:
+        raise ApiError('Не найдено.', status=404)
+    payload = {'data': resource.clean(row, fields)}
+    if relations:
+        payload['included'] = included(resource, relations, [row])
+    return payload
+
+
+def cursor_link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
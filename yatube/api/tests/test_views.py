@@ -0,0 +1,139 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiReadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author',
+                                              first_name='Лев')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        cls.comment = Comment.objects.create(post=cls.posts[0],
+                                             author=cls.reader,
+                                             text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_post_list(self):
+        """Список постов: новые первыми, связи — ключами."""
+        response = self.client.get(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual([row['id'] for row in payload['data']],
+                         [post.pk for post in reversed(self.posts)])
+        row = payload['data'][-1]
+        self.assertEqual(row['author'], self.author.pk)
+        self.assertIsNone(row['group'])
+        self.assertEqual(row['comments_count'], 1)
+        self.assertIsNone(payload['links']['next'])
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только перечисленные поля."""
+        response = self.client.get(reverse('api:post_list'),
+                                   {'fields': 'id,text'})
+        self.assertEqual(set(response.json()['data'][0]), {'id', 'text'})
+        response = self.client.get(reverse('api:post_list'),
+                                   {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_include(self):
+        """Связанные объекты отдаются один раз одним запросом на связь."""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api:post_list'),
+                                       {'include': 'author,group',
+                                        'fields': 'id'})
+        included = response.json()['included']
+        self.assertEqual(len(included['author']), 1)
+        self.assertEqual(included['author'][0]['first_name'], 'Лев')
+        self.assertEqual(included['group'][0]['slug'], 'group')
+        response = self.client.get(reverse('api:post_list'),
+                                   {'include': 'comments'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pages(self):
+        """Страницы по курсору проходят весь список без пропусков."""
+        url = reverse('api:post_list')
+        seen = []
+        params = {'limit': 2, 'fields': 'id'}
+        while url:
+            with self.assertNumQueries(1):
+                payload = self.client.get(url, params).json()
+            seen += [row['id'] for row in payload['data']]
+            url, params = payload['links']['next'], None
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+        back = self.client.get(payload['links']['previous']).json()
+        self.assertEqual([row['id'] for row in back['data']],
+                         seen[-3:-1])
+
+    @override_settings(API_MAX_PAGE_SIZE=3)
+    def test_limit_is_capped(self):
+        response = self.client.get(reverse('api:post_list'),
+                                   {'limit': 1000})
+        self.assertEqual(len(response.json()['data']), 3)
+        response = self.client.get(reverse('api:post_list'),
+                                   {'limit': 'все'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_filters(self):
+        response = self.client.get(reverse('api:post_list'),
+                                   {'group': 'group'})
+        self.assertEqual(len(response.json()['data']), 2)
+        response = self.client.get(reverse('api:follow_list'),
+                                   {'user': 'reader', 'include': 'author'})
+        payload = response.json()
+        self.assertEqual(payload['data'][0]['author'], self.author.pk)
+        self.assertEqual(payload['included']['author'][0]['username'],
+                         'author')
+        response = self.client.get(reverse('api:comment_list'),
+                                   {'post': self.posts[0].pk})
+        self.assertEqual(len(response.json()['data']), 1)
+        response = self.client.get(reverse('api:comment_list'),
+                                   {'post': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+    def test_details(self):
+        post = self.posts[0]
+        response = self.client.get(
+            reverse('api:post_detail', args=(post.pk,)))
+        self.assertEqual(response.json()['data']['text'], post.text)
+        response = self.client.get(
+            reverse('api:group_detail', args=('group',)))
+        self.assertEqual(response.json()['data']['posts_count'], 2)
+        response = self.client.get(
+            reverse('api:post_comments', args=(post.pk,)),
+            {'include': 'author'})
+        payload = response.json()
+        self.assertEqual(payload['data'][0]['text'], 'Комментарий')
+        self.assertEqual(payload['included']['author'][0]['id'],
+                         self.reader.pk)
+
+    def test_errors(self):
+        """Ошибки отдаются в JSON."""
+        for url in (reverse('api:post_detail', args=(0,)),
+                    reverse('api:post_comments', args=(0,)),
+                    reverse('api:group_detail', args=('missing',))):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('error', response.json())
+        response = self.client.delete(reverse('api:group_list'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
+
+    def test_payload_is_smaller_than_html(self):
+        api = self.client.get(reverse('api:post_list'))
+        html = self.client.get(reverse('posts:index'))
+        self.assertLess(len(api.content), len(html.content) / 2)
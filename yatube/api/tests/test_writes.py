@@ -0,0 +1,153 @@
+import json
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from api.auth import user_token
+from api.models import IdempotencyKey
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry, User,
+                          UserCounters)
+from posts.search import search_posts
+
+
+class ApiWriteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+
+    def post(self, name, items, **headers):
+        headers.setdefault('HTTP_AUTHORIZATION',
+                           f'Token {user_token(self.user)}')
+        return self.client.post(reverse(name), json.dumps(items),
+                                content_type='application/json', **headers)
+
+    def test_batch_of_posts(self):
+        """Пакет постов создаётся целиком, с ключами и обслуживанием."""
+        response = self.post('api:post_list', {'items': [
+            {'text': 'Первый пост про котов', 'group': 'group'},
+            {'text': 'Второй пост'},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        results = response.json()['results']
+        posts = Post.objects.filter(author=self.user).order_by('pk')
+        self.assertEqual([result['data']['id'] for result in results],
+                         [post.pk for post in posts])
+        self.assertEqual(results[0]['data']['group'], self.group.pk)
+        self.assertEqual(UserCounters.objects.get(pk=self.user.pk)
+                         .posts_count, 2)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(list(search_posts('котов')), [posts[0]])
+
+    def test_per_item_errors(self):
+        """Ошибочные элементы не мешают остальным."""
+        response = self.post('api:post_list', [
+            {'text': ''},
+            {'text': 'Пост', 'group': 'missing'},
+            {'text': 'Пост', 'group': ['group']},
+            {'text': 'Хороший пост'},
+        ])
+        self.assertEqual(response.status_code, 207)
+        statuses = [result['status'] for result in response.json()['results']]
+        self.assertEqual(statuses, [400, 400, 400, 201])
+        self.assertIn('group', response.json()['results'][2]['errors'])
+        self.assertIn('group', response.json()['results'][1]['errors'])
+        self.assertEqual(Post.objects.count(), 1)
+        response = self.post('api:post_list', [{'text': ''}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_idempotency_key(self):
+        """Повтор с тем же ключом не создаёт строк и отдаёт тот же ответ."""
+        items = [{'text': 'Пост'}]
+        first = self.post('api:post_list', items, HTTP_IDEMPOTENCY_KEY='k1')
+        retry = self.post('api:post_list', items, HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Post.objects.count(), 1)
+        other = self.post('api:post_list', [{'text': 'Другой'}],
+                          HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(other.status_code, 422)
+        self.post('api:post_list', items, HTTP_IDEMPOTENCY_KEY='k2')
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(API_IDEMPOTENCY_TTL=0)
+    def test_expired_keys(self):
+        items = [{'text': 'Пост'}]
+        self.post('api:post_list', items, HTTP_IDEMPOTENCY_KEY='k1')
+        self.post('api:post_list', items, HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(Post.objects.count(), 2)
+        call_command('clear_idempotency_keys', stdout=open('/dev/null', 'w'))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_comments(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        response = self.post('api:comment_list', [
+            {'post': post.pk, 'text': 'Первый'},
+            {'post': post.pk, 'text': 'Второй'},
+            {'post': 0, 'text': 'Мимо'},
+        ])
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual(results[1]['data']['text'], 'Второй')
+        self.assertEqual(results[1]['data']['id'],
+                         Comment.objects.get(text='Второй').pk)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+
+    def test_follows(self):
+        Post.objects.create(text='Пост', author=self.author)
+        response = self.post('api:follow_list', [
+            {'author': 'author'}, {'author': 'author'},
+            {'author': 'writer'}, {'author': 'nobody'},
+            {'author': {'username': 'author'}},
+        ])
+        statuses = [result['status'] for result in response.json()['results']]
+        self.assertEqual(statuses, [201, 200, 400, 400, 400])
+        self.assertTrue(Follow.objects.filter(user=self.user,
+                                              author=self.author).exists())
+        self.assertEqual(UserCounters.objects.get(pk=self.author.pk)
+                         .followers_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 1)
+        response = self.post('api:follow_list', [{'author': 'author'}])
+        self.assertEqual(response.status_code, 200)
+
+    def test_requires_token(self):
+        response = self.post('api:post_list', [{'text': 'Пост'}],
+                             HTTP_AUTHORIZATION='')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        token = user_token(self.user)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.post('api:post_list', [{'text': 'Пост'}],
+                             HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(API_MAX_BATCH=2)
+    def test_bad_batches(self):
+        for body, status in (({'items': []}, 400), ([1], 400),
+                             ([{'text': 'Пост'}] * 3, 413)):
+            with self.subTest(body=body):
+                response = self.post('api:post_list', body)
+                self.assertEqual(response.status_code, status)
+
+    def test_batch_queries_do_not_grow_with_size(self):
+        """Число запросов пакета не зависит от числа постов."""
+        with self.assertNumQueries(12):
+            self.post('api:post_list', [{'text': 'Пост'}])
+        with self.assertNumQueries(12):
+            self.post('api:post_list', [{'text': 'Пост'}] * 10)
@@ -0,0 +1,176 @@
+"""JSON API: ``/api/v1/``.
+
+Ответы собираются из ``values()`` без создания объектов моделей.
+Параметры списков: ``?fields=`` — нужные поля, ``?include=`` —
+связанные объекты, ``?limit=`` — размер страницы, ``?cursor=`` —
+позиция из ссылок ``links.next``/``links.previous``.
+
+POST на списки постов, комментариев и подписок создаёт пакет объектов
+(см. ``api.writes``); нужен заголовок ``Authorization: Token <токен>``.
+"""
+import functools
+import json
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from . import idempotency, resources, writes
+from .auth import authenticate
+from .resources import ApiError
+
+JSON_OPTIONS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def respond(payload, status=200):
+    return JsonResponse(payload, status=status,
+                        json_dumps_params=JSON_OPTIONS)
+
+
+def api_view(methods=('GET', 'HEAD')):
+    """Ошибки ``ApiError`` и неподдерживаемые методы — ответом JSON.
+
+    Запись проверяется по токену, а не по сессии, поэтому CSRF-токен
+    API не нужен.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = respond(
+                    {'error': f'Метод {request.method} не поддерживается.'},
+                    status=405)
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                result = view(request, *args, **kwargs)
+            except ApiError as error:
+                response = respond({'error': error.message},
+                                   status=error.status)
+                if error.status == 401:
+                    response['WWW-Authenticate'] = 'Token'
+                return response
+            if isinstance(result, HttpResponse):
+                return result
+            return respond(result)
+        return wrapper
+    return decorator
+
+
+def batch_items(request):
+    """Элементы пакета: список объектов или ``{"items": [...]}``."""
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        raise ApiError('Тело запроса должно быть JSON.')
+    items = body.get('items') if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        raise ApiError('Нужен непустой список items.')
+    if len(items) > settings.API_MAX_BATCH:
+        raise ApiError(f'В пакете не больше {settings.API_MAX_BATCH} '
+                       f'элементов.', status=413)
+    if not all(isinstance(item, dict) for item in items):
+        raise ApiError('Каждый элемент пакета должен быть объектом.')
+    return items
+
+
+def batch_status(results):
+    """201 — всё создано, 400 — ничего, 207 — часть пакета."""
+    failed = sum(result['status'] >= 400 for result in results)
+    if not failed:
+        return 201 if any(result['status'] == 201
+                          for result in results) else 200
+    return 400 if failed == len(results) else 207
+
+
+def write(request, kind):
+    """Создаёт пакет объектов в одной транзакции."""
+    user = authenticate(request)
+    items = batch_items(request)
+
+    def run():
+        results = writes.CREATORS[kind](user, items)
+        return {'results': results}, batch_status(results)
+
+    payload, status, replayed = idempotency.run_once(request, user, run)
+    response = respond(payload, status=status)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def filtered(queryset, request, lookups):
+    """Фильтры списка: параметр запроса → путь поля.
+
+    Значения для ключей (``*_id``) должны быть числами.
+    """
+    filters = {}
+    for param, lookup in lookups.items():
+        if param not in request.GET:
+            continue
+        value = request.GET[param]
+        if lookup.endswith('_id'):
+            try:
+                value = int(value)
+            except ValueError:
+                raise ApiError(f'{param} должен быть числом.')
+        filters[lookup] = value
+    return queryset.filter(**filters)
+
+
+@api_view(('GET', 'HEAD', 'POST'))
+def post_list(request):
+    if request.method == 'POST':
+        return write(request, 'posts')
+    queryset = filtered(resources.POSTS.queryset, request,
+                        {'group': 'group__slug', 'author': 'author__username'})
+    return resources.serialize_page(request, resources.POSTS, queryset)
+
+
+@api_view()
+def post_detail(request, post_id):
+    return resources.serialize_one(
+        request, resources.POSTS,
+        resources.POSTS.queryset.filter(pk=post_id))
+
+
+@api_view()
+def post_comments(request, post_id):
+    if not resources.POSTS.queryset.filter(pk=post_id).exists():
+        raise ApiError('Не найдено.', status=404)
+    return resources.serialize_page(
+        request, resources.COMMENTS,
+        resources.COMMENTS.queryset.filter(post_id=post_id))
+
+
+@api_view()
+def group_list(request):
+    return resources.serialize_page(request, resources.GROUPS,
+                                    resources.GROUPS.queryset)
+
+
+@api_view()
+def group_detail(request, slug):
+    return resources.serialize_one(
+        request, resources.GROUPS,
+        resources.GROUPS.queryset.filter(slug=slug))
+
+
+@api_view(('GET', 'HEAD', 'POST'))
+def comment_list(request):
+    if request.method == 'POST':
+        return write(request, 'comments')
+    queryset = filtered(resources.COMMENTS.queryset, request,
+                        {'post': 'post_id', 'author': 'author__username'})
+    return resources.serialize_page(request, resources.COMMENTS, queryset)
+
+
+@api_view(('GET', 'HEAD', 'POST'))
+def follow_list(request):
+    if request.method == 'POST':
+        return write(request, 'follows')
+    queryset = filtered(resources.FOLLOWS.queryset, request,
+                        {'user': 'user__username',
+                         'author': 'author__username'})
+    return resources.serialize_page(request, resources.FOLLOWS, queryset)
@@ -0,0 +1,190 @@
+"""Пакетное создание постов, комментариев и подписок.
+
+Элементы пакета проверяются формами сайта, связанные объекты ищутся
+одним запросом на пакет, а строки вставляются ``bulk_create`` в одной
+транзакции. Сигналы при этом не срабатывают, поэтому счётчики, ленты
+и поисковый индекс обновляются здесь же — один раз на пакет.
+Каждая функция возвращает результаты по элементам в порядке запроса.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from . import resources
+from posts import counters, timeline
+from core.pagecache import purge
+from posts.cache import bump_feed_generation, page_tags
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.search import get_backend
+
+
+def error(errors):
+    return {'status': 400, 'errors': errors}
+
+
+def clean_text(form_class, item):
+    """Текст элемента и ошибки по правилам формы сайта."""
+    form = form_class(data={'text': item.get('text')})
+    if form.is_valid():
+        return form.cleaned_data['text'], {}
+    return None, form.errors.get_json_data()
+
+
+def as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def as_name(value):
+    """Строковое значение поля или ``None`` для любого другого."""
+    return value if isinstance(value, str) else None
+
+
+def inserted(model, objects, **owner):
+    """Проставляет ключи строкам, вставленным ``bulk_create``.
+
+    PostgreSQL возвращает ключи сам. SQLite их не возвращает, но пишет
+    в базу в один поток, поэтому внутри транзакции последние строки
+    владельца — только что вставленные.
+    """
+    if not objects or objects[0].pk is not None:
+        return
+    pks = (model.objects.filter(**owner).order_by('-pk')
+           .values_list('pk', flat=True)[:len(objects)])
+    for obj, pk in zip(objects, reversed(list(pks))):
+        obj.pk = pk
+
+
+def rows(resource, objects):
+    """Созданные объекты в том же виде, что и в API чтения."""
+    data = {row['id']: resource.clean(row, resource.default_fields)
+            for row in resource.queryset.filter(
+                pk__in=[obj.pk for obj in objects])
+            .values(*resource.default_fields)}
+    return [data[obj.pk] for obj in objects]
+
+
+def create_posts(user, items):
+    slugs = {as_name(item.get('group')) for item in items} - {None}
+    groups = dict(Group.objects.filter(slug__in=slugs)
+                  .values_list('slug', 'pk'))
+    results = [None] * len(items)
+    posts = []
+    positions = []
+    for position, item in enumerate(items):
+        text, errors = clean_text(PostForm, item)
+        group = item.get('group')
+        if group is not None and as_name(group) is None:
+            errors['group'] = [{'message': 'Нужен slug группы.',
+                                'code': 'invalid'}]
+        elif group is not None and group not in groups:
+            errors['group'] = [{'message': f'Группы {group} нет.',
+                                'code': 'invalid_choice'}]
+        if errors:
+            results[position] = error(errors)
+            continue
+        posts.append(Post(author=user, text=text,
+                          group_id=groups.get(group)))
+        positions.append(position)
+    if not posts:
+        return results
+    Post.objects.bulk_create(posts)
+    inserted(Post, posts, author=user)
+    counters.change_user(user.pk, 'posts_count', len(posts))
+    for group_id, added in Counter(post.group_id for post in posts).items():
+        if group_id is not None:
+            counters.change(Group.objects.filter(pk=group_id),
+                            'posts_count', added)
+    get_backend().index_many(posts)
+    timeline.fan_out_many(user.pk, posts)
+    transaction.on_commit(bump_feed_generation)
+    purge('index', *page_tags(posts))
+    for position, data in zip(positions, rows(resources.POSTS, posts)):
+        results[position] = {'status': 201, 'data': data}
+    return results
+
+
+def create_comments(user, items):
+    post_ids = [as_int(item.get('post')) for item in items]
+    existing = set(Post.objects.filter(pk__in=set(post_ids) - {None})
+                   .values_list('pk', flat=True))
+    results = [None] * len(items)
+    comments = []
+    positions = []
+    for position, (item, post_id) in enumerate(zip(items, post_ids)):
+        text, errors = clean_text(CommentForm, item)
+        if post_id not in existing:
+            errors['post'] = [{'message': 'Поста нет.',
+                               'code': 'invalid_choice'}]
+        if errors:
+            results[position] = error(errors)
+            continue
+        comments.append(Comment(author=user, post_id=post_id, text=text))
+        positions.append(position)
+    if not comments:
+        return results
+    Comment.objects.bulk_create(comments)
+    inserted(Comment, comments, author=user)
+    for post_id, added in Counter(
+            comment.post_id for comment in comments).items():
+        counters.change(Post.objects.filter(pk=post_id),
+                        'comments_count', added)
+    purge(*(f'post:{comment.post_id}' for comment in comments))
+    for position, data in zip(positions, rows(resources.COMMENTS, comments)):
+        results[position] = {'status': 201, 'data': data}
+    return results
+
+
+def create_follows(user, items):
+    """Подписки по ``author`` (имени пользователя).
+
+    Как и ``profile_follow``, повторная подписка не ошибка: такой
+    элемент получает код 200 и существующую подписку.
+    """
+    usernames = {as_name(item.get('author')) for item in items} - {None}
+    authors = dict(User.objects.filter(username__in=usernames)
+                   .values_list('username', 'pk'))
+    existing = dict(Follow.objects.filter(user=user,
+                                          author_id__in=authors.values())
+                    .values_list('author_id', 'pk'))
+    results = [None] * len(items)
+    follows = {}
+    new = set()
+    for position, item in enumerate(items):
+        author_id = authors.get(as_name(item.get('author')))
+        if author_id is None:
+            results[position] = error({'author': [{
+                'message': 'Пользователя нет.', 'code': 'invalid_choice'}]})
+        elif author_id == user.pk:
+            results[position] = error({'author': [{
+                'message': 'Нельзя подписаться на себя.', 'code': 'self'}]})
+        elif author_id not in existing and author_id not in follows:
+            follows[author_id] = Follow(user=user, author_id=author_id)
+            new.add(position)
+    created = list(follows.values())
+    Follow.objects.bulk_create(created)
+    inserted(Follow, created, user=user)
+    if created:
+        counters.rebuild_user_counters(
+            User.objects.filter(pk__in=[user.pk, *follows]))
+        for follow in created:
+            timeline.backfill(follow)
+        purge(f'author:{user.pk}', *(f'author:{author_id}'
+                                     for author_id in follows))
+    data = {row['author']: row for row in rows(
+        resources.FOLLOWS, [*created, *(Follow(pk=pk)
+                                        for pk in existing.values())])}
+    for position, item in enumerate(items):
+        if results[position] is None:
+            author_id = authors[item['author']]
+            results[position] = {
+                'status': 201 if position in new else 200,
+                'data': data[author_id]}
+    return results
+
+
+CREATORS = {'posts': create_posts, 'comments': create_comments,
+            'follows': create_follows}
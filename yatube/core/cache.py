@@ -0,0 +1,265 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class Namespace:
+    """Пространство ключей кэша с версией.
+
+    Версия входит в каждый ключ, поэтому ``bump()`` одним ``incr``
+    делает недействительными все ключи пространства на всех воркерах,
+    если бэкенд кэша общий (файлы, база, Redis).
+    """
+
+    def __init__(self, *name, alias='default'):
+        self.name = ':'.join(str(part) for part in name)
+        self.alias = alias
+
+    def __repr__(self):
+        return f'<Namespace {self.name}>'
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def version_key(self):
+        return f'ns:{self.name}:version'
+
+    def version(self):
+        return self.cache.get_or_set(self.version_key, initial_version(),
+                                     None)
+
+    def bump(self):
+        try:
+            return self.cache.incr(self.version_key)
+        except ValueError:
+            version = initial_version()
+            self.cache.set(self.version_key, version, None)
+            return version
+
+    def make_key(self, *parts, version=None):
+        if version is None:
+            version = self.version()
+        digest = hashlib.md5(
+            ':'.join(str(part) for part in parts).encode()).hexdigest()
+        return f'{self.name}:{version}:{digest}'
+
+    def get(self, *parts, default=None):
+        value = self.cache.get(self.make_key(*parts), MISSING)
+        metrics.record_cache(value is not MISSING)
+        return default if value is MISSING else value
+
+    def get_many(self, parts_list, version=None):
+        """Значения нескольких ключей одним обращением к кэшу.
+
+        ``parts_list`` — наборы частей ключей (кортежи); в ответе —
+        только найденные, по тем же кортежам.
+        """
+        if version is None:
+            version = self.version()
+        keys = {self.make_key(*parts, version=version): parts
+                for parts in parts_list}
+        found = self.cache.get_many(list(keys))
+        for key in keys:
+            metrics.record_cache(key in found)
+        return {keys[key]: value for key, value in found.items()}
+
+    def set_many(self, values, timeout=None, version=None):
+        if version is None:
+            version = self.version()
+        self.cache.set_many(
+            {self.make_key(*parts, version=version): value
+             for parts, value in values.items()}, timeout)
+
+    def set(self, *parts, value, timeout=None):
+        self.cache.set(self.make_key(*parts), value, timeout)
+
+    def delete(self, *parts):
+        self.cache.delete(self.make_key(*parts))
+
+    def get_or_compute(self, parts, compute, timeout=None, lock_timeout=10,
+                       wait=2.0):
+        """Значение из кэша; при промахе его вычисляет один воркер.
+
+        Остальные воркеры, пришедшие за тем же ключом, ждут до ``wait``
+        секунд, пока значение появится, и только потом считают сами.
+        Истёкшее значение ещё ``CACHE_STALE_TTL`` секунд отдаётся как
+        есть, пока один воркер пересчитывает его в фоне. В аварийном
+        режиме (база упала или тормозит) пересчётов нет: отдаётся
+        устаревшее значение, а после сброса версии — последнее удачное.
+        """
+        key = self.make_key(*parts)
+        last_key = self.make_key(*parts, version='last')
+        found = {name: entry for name, entry in
+                 self.cache.get_many([key, last_key]).items()
+                 if is_entry(entry)}
+        entry = found.get(key)
+        if entry is not None and is_fresh(entry):
+            return served(FRESH, entry)
+        lock_key = f'{key}:lock'
+        if entry is not None:
+            if not degraded() and self.cache.add(lock_key, 1, lock_timeout):
+                refresh = Refresh(self, key, last_key, lock_key, compute,
+                                  timeout)
+                refresh.schedule()
+            return served(STALE, entry)
+        last = found.get(last_key)
+        if last is not None and degraded():
+            return served(DEGRADED, last)
+        metrics.record_cache(False)
+        if self.cache.add(lock_key, 1, lock_timeout):
+            try:
+                return Refresh(self, key, last_key, lock_key, compute,
+                               timeout, fallback=last).run()
+            finally:
+                self.cache.delete(lock_key)
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.cache.get(key)
+            if is_entry(entry):
+                metrics.record_cache_path(COALESCED)
+                return entry[1]
+        return Refresh(self, key, last_key, lock_key, compute, timeout,
+                       fallback=last).run()
+
+
+# Пути get_or_compute для метрик.
+FRESH = 'fresh'
+STALE = 'stale'
+COALESCED = 'coalesced'
+COMPUTED = 'computed'
+DEGRADED = 'degraded'
+PATHS = (FRESH, STALE, COALESCED, COMPUTED, DEGRADED)
+
+DEGRADED_KEY = 'cache:degraded'
+
+
+def is_entry(value):
+    # Значения, записанные до появления срока свежести, не подходят.
+    return isinstance(value, tuple) and len(value) == 2
+
+
+def is_fresh(entry):
+    fresh_until, _ = entry
+    return fresh_until is None or fresh_until > time.time()
+
+
+def served(path, entry):
+    metrics.record_cache(True)
+    metrics.record_cache_path(path)
+    return entry[1]
+
+
+def degraded(alias='default'):
+    """Включён ли аварийный режим: отдавать кэш, не трогая базу."""
+    return bool(caches[alias].get(DEGRADED_KEY))
+
+
+def enter_degraded(reason, alias='default'):
+    """Включает аварийный режим на ``CACHE_DEGRADED_SECONDS`` секунд.
+
+    Флаг хранится в кэше, поэтому с общим бэкендом его видят все
+    воркеры.
+    """
+    logger.warning('Кэш переходит в аварийный режим: %s', reason)
+    caches[alias].set(DEGRADED_KEY, 1, settings.CACHE_DEGRADED_SECONDS)
+
+
+class Refresh:
+    """Пересчёт одного значения get_or_compute."""
+
+    def __init__(self, namespace, key, last_key, lock_key, compute, timeout,
+                 fallback=None):
+        self.namespace = namespace
+        self.key = key
+        self.last_key = last_key
+        self.lock_key = lock_key
+        self.compute = compute
+        self.timeout = timeout
+        self.fallback = fallback
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            value = self.compute()
+        except DatabaseError as error:
+            enter_degraded(error, self.namespace.alias)
+            if self.fallback is None:
+                raise
+            metrics.record_cache_path(DEGRADED)
+            return self.fallback[1]
+        elapsed = time.monotonic() - started
+        if elapsed > settings.CACHE_SLOW_COMPUTE_SECONDS:
+            enter_degraded(f'{self.key} считался {elapsed:.1f} с',
+                           self.namespace.alias)
+        self.store(value)
+        metrics.record_cache_path(COMPUTED)
+        return value
+
+    def store(self, value):
+        if self.timeout is None:
+            fresh_until = stored_for = None
+        else:
+            fresh_until = time.time() + self.timeout
+            stored_for = self.timeout + settings.CACHE_STALE_TTL
+        entry = (fresh_until, value)
+        self.namespace.cache.set_many(
+            {self.key: entry, self.last_key: entry}, stored_for)
+
+    def schedule(self):
+        """Пересчитывает значение в фоновом пуле, не задерживая ответ.
+
+        При ``CACHE_REVALIDATE_WORKERS = 0`` пересчёт идёт сразу
+        в текущем потоке.
+        """
+        if not settings.CACHE_REVALIDATE_WORKERS:
+            self.in_background()
+            return
+        executor().submit(self.in_worker)
+
+    def in_background(self):
+        try:
+            self.run()
+        except Exception:
+            logger.exception('Не удалось пересчитать %s', self.key)
+        finally:
+            self.namespace.cache.delete(self.lock_key)
+
+    def in_worker(self):
+        """Пересчёт в потоке пула; соединения потока затем закрываются."""
+        try:
+            self.in_background()
+        finally:
+            connections.close_all()
+
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CACHE_REVALIDATE_WORKERS,
+            thread_name_prefix='cache-revalidate',
+        )
+    return _executor
+
+
+def initial_version():
+    # Если версия вытеснена из кэша, новое значение не должно совпасть
+    # со старыми, иначе вернутся устаревшие записи.
+    return time.time_ns()
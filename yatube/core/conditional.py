@@ -0,0 +1,41 @@
+"""Условные GET-запросы: 304 без рендеринга страницы."""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional(validator):
+    """Отвечает 304, если ETag страницы совпал с ``If-None-Match``.
+
+    ``validator(request, *args, **kwargs)`` дешёвым запросом возвращает
+    то, от чего зависит страница: даты изменений, счётчики, версии.
+    Вместе с адресом и пользователем это даёт ETag. Если валидатор
+    вернул ``None`` (например, объекта нет), представление вызывается
+    как обычно. Last-Modified не отдаётся: страницы меняются и без
+    изменения дат, например при подписке на автора.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            parts = validator(request, *args, **kwargs)
+            if parts is None:
+                return view(request, *args, **kwargs)
+            etag = make_etag(request.get_full_path(), request.user.pk,
+                             *parts)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
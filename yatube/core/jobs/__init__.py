@@ -0,0 +1,118 @@
+"""Фоновые задачи: всё медленное выполняется вне запроса.
+
+Функция-задача объявляется декоратором ``@job``; ``task.delay(...)``
+ставит её в очередь брокера, а обычный вызов выполняет сразу.
+Брокер задаётся адресом в ``JOBS_BROKER``:
+
+* ``db://`` — таблица ``core_job`` в основной базе; задача ставится
+  в той же транзакции, что и данные, и при откате исчезает вместе
+  с ними;
+* ``redis://host:port/db`` — Redis, нужен пакет ``redis``;
+* ``inline://`` — без очереди: задача выполняется в процессе сразу
+  после коммита.
+
+Задачи выполняет ``manage.py run_jobs``. Упавшая задача повторяется
+с экспоненциальной задержкой, пока не кончатся попытки. Аргументы
+задач должны сериализоваться в JSON.
+"""
+import importlib
+
+from django.conf import settings
+from django.utils import timezone
+
+HIGH = 0
+NORMAL = 5
+LOW = 9
+
+REGISTRY = {}
+
+
+class Message:
+    """Задача в очереди: имя функции, аргументы и попытки."""
+
+    def __init__(self, name, args=(), kwargs=None, priority=NORMAL,
+                 max_attempts=3, run_at=None, attempts=0, id=None):
+        self.id = id
+        self.name = name
+        self.args = list(args)
+        self.kwargs = kwargs or {}
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.run_at = run_at or timezone.now()
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f'<Message {self.name} #{self.id}>'
+
+
+class Task:
+    """Функция, которую можно выполнить сейчас или поставить в очередь."""
+
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+        self.__wrapped__ = func
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args, kwargs)
+
+    def enqueue(self, args=(), kwargs=None, priority=None, run_at=None):
+        message = Message(
+            self.name, args, kwargs,
+            self.priority if priority is None else priority,
+            self.max_attempts, run_at)
+        get_broker().push(message)
+        return message
+
+
+def job(func=None, *, name=None, priority=NORMAL, max_attempts=3):
+    """Объявляет функцию фоновой задачей.
+
+    ``@job`` или ``@job(priority=HIGH, max_attempts=5)``. Имя задачи
+    по умолчанию — путь к функции: по нему воркер находит её модуль.
+    """
+    def decorator(func):
+        task = Task(func, name or f'{func.__module__}.{func.__qualname__}',
+                    priority, max_attempts)
+        REGISTRY[task.name] = task
+        return task
+    return decorator if func is None else decorator(func)
+
+
+def get_task(name):
+    """Задача по имени; модуль задачи импортируется при необходимости."""
+    if name not in REGISTRY:
+        module = name.rpartition('.')[0]
+        if module:
+            importlib.import_module(module)
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        raise LookupError(f'Задача {name} не найдена.') from None
+
+
+def backoff(attempts):
+    """Задержка в секундах перед повтором после ``attempts`` попыток."""
+    return min(settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1),
+               settings.JOBS_RETRY_MAX_DELAY)
+
+
+_brokers = {}
+
+
+def get_broker():
+    from .brokers import create_broker
+
+    url = settings.JOBS_BROKER
+    if url not in _brokers:
+        _brokers[url] = create_broker(url)
+    return _brokers[url]
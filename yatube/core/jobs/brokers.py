@@ -0,0 +1,309 @@
+"""Брокеры очереди задач: таблица в базе, Redis и выполнение на месте.
+
+Брокер ставит задачи (``push``), выдаёт воркеру готовые по приоритету
+(``claim``) и записывает исход: ``complete``, ``retry`` или ``fail``.
+Задачи упавшего воркера через ``JOBS_VISIBILITY_TIMEOUT`` секунд
+возвращаются в очередь (``requeue_stale``).
+"""
+import datetime
+import json
+import logging
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import Message
+from ..models import Job
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних ошибок показывать в состоянии очереди.
+RECENT_FAILURES = 20
+WORKER_LOST = 'Воркер пропал, не завершив задачу.'
+
+
+def dump_payload(message):
+    return json.dumps({'args': message.args, 'kwargs': message.kwargs},
+                      cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def stale_before():
+    return timezone.now() - datetime.timedelta(
+        seconds=settings.JOBS_VISIBILITY_TIMEOUT)
+
+
+class DatabaseBroker:
+    """Очередь в таблице ``core_job``.
+
+    На PostgreSQL задачи берутся ``SELECT ... FOR UPDATE SKIP LOCKED``;
+    на SQLite — условным ``UPDATE`` по статусу: задачу получает тот
+    воркер, чьё обновление изменило строку.
+    """
+
+    def push(self, message):
+        job = Job.objects.create(
+            name=message.name, payload=dump_payload(message),
+            priority=message.priority, max_attempts=message.max_attempts,
+            run_at=message.run_at)
+        message.id = job.pk
+
+    def ready(self):
+        return (Job.objects.filter(status=Job.QUEUED,
+                                   run_at__lte=timezone.now())
+                .order_by('priority', 'run_at', 'pk'))
+
+    def claim(self, worker, limit=1):
+        changes = {'status': Job.RUNNING, 'locked_by': worker,
+                   'locked_at': timezone.now(),
+                   'attempts': F('attempts') + 1}
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                pks = list(self.ready().select_for_update(skip_locked=True)
+                           .values_list('pk', flat=True)[:limit])
+                Job.objects.filter(pk__in=pks).update(**changes)
+        else:
+            pks = []
+            for pk in self.ready().values_list('pk', flat=True)[:limit]:
+                if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+                        **changes):
+                    pks.append(pk)
+        jobs = Job.objects.filter(pk__in=pks).order_by('priority', 'pk')
+        return [self.message(job) for job in jobs]
+
+    def message(self, job):
+        payload = json.loads(job.payload)
+        return Message(job.name, payload['args'], payload['kwargs'],
+                       job.priority, job.max_attempts, job.run_at,
+                       job.attempts, job.pk)
+
+    def complete(self, message):
+        Job.objects.filter(pk=message.id).update(
+            status=Job.DONE, finished=timezone.now(), last_error='')
+
+    def retry(self, message, error, run_at):
+        Job.objects.filter(pk=message.id).update(
+            status=Job.QUEUED, run_at=run_at, last_error=error,
+            locked_by='', locked_at=None)
+
+    def fail(self, message, error):
+        Job.objects.filter(pk=message.id).update(
+            status=Job.FAILED, finished=timezone.now(), last_error=error)
+
+    def requeue_stale(self):
+        stale = Job.objects.filter(status=Job.RUNNING,
+                                   locked_at__lt=stale_before())
+        # Задача, уронившая воркер на последней попытке, не повторяется:
+        # иначе она роняла бы воркеры бесконечно.
+        lost = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, finished=timezone.now(),
+            last_error=WORKER_LOST, locked_by='', locked_at=None)
+        if lost:
+            logger.error('Задач потеряно вместе с воркером: %s', lost)
+        return stale.update(status=Job.QUEUED, locked_by='',
+                            locked_at=None)
+
+    def clear_finished(self, before):
+        return Job.objects.filter(status__in=(Job.DONE, Job.FAILED),
+                                  finished__lt=before).delete()[0]
+
+    def stats(self):
+        counts = dict(Job.objects.values_list('status')
+                      .annotate(total=Count('pk')).order_by())
+        oldest = (self.ready().order_by('run_at')
+                  .values_list('run_at', flat=True).first())
+        failures = [
+            {'id': job.pk, 'name': job.name, 'attempts': job.attempts,
+             'error': job.last_error, 'finished': job.finished}
+            for job in Job.objects.filter(status=Job.FAILED)
+            .order_by('-finished')[:RECENT_FAILURES]
+        ]
+        return {
+            'counts': {status: counts.get(status, 0)
+                       for status, _ in Job.STATUSES},
+            'oldest_wait': (timezone.now() - oldest).total_seconds()
+            if oldest else 0,
+            'failures': failures,
+        }
+
+
+class RedisBroker:
+    """Очередь в Redis.
+
+    Готовые задачи лежат в сортированном множестве по приоритету
+    и времени постановки, отложенные — по времени запуска, выполняемые —
+    по времени взятия в работу. Redis не участвует в транзакциях базы,
+    поэтому задача отправляется после коммита.
+    """
+    PREFIX = 'jobs:'
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                'Для JOBS_BROKER=redis:// нужен пакет redis.') from None
+        self.redis = redis.Redis.from_url(url)
+
+    def key(self, name):
+        return f'{self.PREFIX}{name}'
+
+    def push(self, message):
+        transaction.on_commit(lambda: self.send(message))
+
+    def send(self, message):
+        message.id = self.redis.incr(self.key('next_id'))
+        self.save(message)
+        self.schedule(message)
+
+    def save(self, message, status='queued', error=''):
+        self.redis.set(self.key(f'job:{message.id}'), json.dumps({
+            'name': message.name, 'args': message.args,
+            'kwargs': message.kwargs, 'priority': message.priority,
+            'max_attempts': message.max_attempts,
+            'attempts': message.attempts, 'status': status,
+            'error': error,
+        }, cls=DjangoJSONEncoder, ensure_ascii=False))
+
+    def load(self, job_id):
+        data = self.redis.get(self.key(f'job:{job_id}'))
+        if data is None:
+            return None
+        data = json.loads(data)
+        return Message(data['name'], data['args'], data['kwargs'],
+                       data['priority'], data['max_attempts'],
+                       attempts=data['attempts'], id=int(job_id))
+
+    def schedule(self, message):
+        run_at = message.run_at.timestamp()
+        if run_at > time.time():
+            self.redis.zadd(self.key('scheduled'), {message.id: run_at})
+        else:
+            self.make_ready(message.id, message.priority, run_at)
+
+    def make_ready(self, job_id, priority, run_at):
+        # Приоритет старше времени: секунды эпохи меньше 10^10.
+        self.redis.zadd(self.key('ready'),
+                        {job_id: priority * 10 ** 10 + run_at})
+
+    def promote_scheduled(self):
+        due = self.redis.zrangebyscore(self.key('scheduled'), 0, time.time())
+        for job_id in due:
+            # Переносит тот воркер, чей zrem удалил элемент.
+            if self.redis.zrem(self.key('scheduled'), job_id):
+                message = self.load(job_id)
+                if message is not None:
+                    self.make_ready(job_id, message.priority, time.time())
+
+    def claim(self, worker, limit=1):
+        self.promote_scheduled()
+        messages = []
+        for job_id, _ in self.redis.zpopmin(self.key('ready'), limit):
+            message = self.load(job_id)
+            if message is None:
+                continue
+            message.attempts += 1
+            self.save(message, 'running')
+            self.redis.zadd(self.key('running'), {job_id: time.time()})
+            messages.append(message)
+        return messages
+
+    def finish(self, message, status):
+        self.redis.zrem(self.key('running'), message.id)
+        self.redis.incr(self.key(f'count:{status}'))
+
+    def complete(self, message):
+        self.finish(message, 'done')
+        self.redis.delete(self.key(f'job:{message.id}'))
+
+    def retry(self, message, error, run_at):
+        self.redis.zrem(self.key('running'), message.id)
+        message.run_at = run_at
+        self.save(message, 'queued', error)
+        self.schedule(message)
+
+    def fail(self, message, error):
+        self.finish(message, 'failed')
+        self.redis.delete(self.key(f'job:{message.id}'))
+        self.redis.lpush(self.key('failures'), json.dumps({
+            'id': message.id, 'name': message.name,
+            'attempts': message.attempts, 'error': error,
+            'finished': timezone.now(),
+        }, cls=DjangoJSONEncoder, ensure_ascii=False))
+        self.redis.ltrim(self.key('failures'), 0, RECENT_FAILURES - 1)
+
+    def requeue_stale(self):
+        stale = self.redis.zrangebyscore(self.key('running'), 0,
+                                         stale_before().timestamp())
+        requeued = 0
+        for job_id in stale:
+            if self.redis.zrem(self.key('running'), job_id):
+                message = self.load(job_id)
+                if message is None:
+                    continue
+                if message.attempts >= message.max_attempts:
+                    logger.error('Задача %s потеряна вместе с воркером',
+                                 message)
+                    self.fail(message, WORKER_LOST)
+                    continue
+                self.save(message)
+                self.make_ready(job_id, message.priority, time.time())
+                requeued += 1
+        return requeued
+
+    def clear_finished(self, before):
+        # Выполненные задачи удаляются сразу, ошибки обрезаются ltrim.
+        return 0
+
+    def stats(self):
+        return {
+            'counts': {
+                'queued': (self.redis.zcard(self.key('ready'))
+                           + self.redis.zcard(self.key('scheduled'))),
+                'running': self.redis.zcard(self.key('running')),
+                'done': int(self.redis.get(self.key('count:done')) or 0),
+                'failed': int(self.redis.get(self.key('count:failed'))
+                              or 0),
+            },
+            # Готовые задачи упорядочены по приоритету, а не по времени.
+            'oldest_wait': None,
+            'failures': [json.loads(item) for item in self.redis.lrange(
+                self.key('failures'), 0, RECENT_FAILURES - 1)],
+        }
+
+
+class InlineBroker:
+    """Без очереди: задача выполняется в процессе после коммита."""
+
+    def push(self, message):
+        from .worker import execute
+
+        transaction.on_commit(lambda: execute(self, message))
+
+    def complete(self, message):
+        pass
+
+    def retry(self, message, error, run_at):
+        self.fail(message, error)
+
+    def fail(self, message, error):
+        logger.error('Задача %s не выполнена: %s', message.name, error)
+
+    def stats(self):
+        return {'counts': {}, 'oldest_wait': 0, 'failures': []}
+
+
+def create_broker(url):
+    scheme = urlparse(url).scheme
+    if scheme == 'db':
+        return DatabaseBroker()
+    if scheme == 'redis':
+        return RedisBroker(url)
+    if scheme == 'inline':
+        return InlineBroker()
+    raise ImproperlyConfigured(f'Неизвестный брокер задач: {url}')
@@ -0,0 +1,15 @@
+"""Служебные задачи очереди."""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import LOW, get_broker, job
+
+
+@job(priority=LOW)
+def clear_finished():
+    """Удаляет выполненные и упавшие задачи старше JOBS_KEEP_DAYS дней."""
+    before = timezone.now() - datetime.timedelta(
+        days=settings.JOBS_KEEP_DAYS)
+    return get_broker().clear_finished(before)
@@ -0,0 +1,155 @@
+"""Воркер очереди задач и планировщик периодических задач."""
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import backoff, get_broker, get_task
+
+logger = logging.getLogger(__name__)
+
+
+def execute(broker, message):
+    """Выполняет задачу и записывает исход; ``True`` — если успешно."""
+    try:
+        get_task(message.name)(*message.args, **message.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if message.attempts < message.max_attempts:
+            delay = backoff(message.attempts)
+            logger.warning('Задача %s упала, повтор через %s с',
+                           message, delay)
+            broker.retry(message, error, timezone.now()
+                         + datetime.timedelta(seconds=delay))
+        else:
+            logger.error('Задача %s не выполнена: попытки кончились\n%s',
+                         message, error)
+            broker.fail(message, error)
+        return False
+    broker.complete(message)
+    return True
+
+
+class Worker:
+    """Берёт готовые задачи из брокера по приоритету и выполняет их."""
+
+    def __init__(self, broker=None, name=None, batch=1):
+        self.broker = broker or get_broker()
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.batch = batch
+        self.stopped = threading.Event()
+        self.requeued_at = 0
+
+    def run_once(self):
+        """Выполняет готовые сейчас задачи; возвращает их число."""
+        now = time.monotonic()
+        if now - self.requeued_at > settings.JOBS_VISIBILITY_TIMEOUT / 10:
+            self.requeued_at = now
+            self.broker.requeue_stale()
+        done = 0
+        while not self.stopped.is_set():
+            messages = self.broker.claim(self.name, self.batch)
+            if not messages:
+                break
+            for message in messages:
+                execute(self.broker, message)
+                done += 1
+            # Между задачами — как между запросами: закрыть соединения,
+            # которые прожили дольше CONN_MAX_AGE или сломались.
+            close_old_connections()
+        return done
+
+    def run(self):
+        logger.info('Воркер %s запущен', self.name)
+        while not self.stopped.is_set():
+            if not self.run_once():
+                self.stopped.wait(settings.JOBS_POLL_INTERVAL)
+        logger.info('Воркер %s остановлен', self.name)
+
+    def stop(self, *args):
+        self.stopped.set()
+
+
+class Cron:
+    """Расписание в формате cron: минута, час, день, месяц, день недели.
+
+    Поддерживаются ``*``, числа, диапазоны ``a-b``, шаги ``*/n``
+    и ``a-b/n`` и списки через запятую. Воскресенье — 0. Как в cron,
+    если заданы и день месяца, и день недели, достаточно совпасть
+    одному из них: ``0 0 1 * 1`` — первое число и каждый понедельник.
+    """
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != len(self.RANGES):
+            raise ValueError(f'В расписании {expression!r} нужно пять полей.')
+        self.expression = expression
+        self.fields = [self.parse(field, low, high)
+                       for field, (low, high) in zip(fields, self.RANGES)]
+        self.any_day = fields[2].startswith('*')
+        self.any_weekday = fields[4].startswith('*')
+
+    def __repr__(self):
+        return f'<Cron {self.expression}>'
+
+    @staticmethod
+    def parse(field, low, high):
+        values = set()
+        for part in field.split(','):
+            part, _, step = part.partition('/')
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-'))
+            else:
+                start = end = int(part)
+            if not low <= start <= end <= high:
+                raise ValueError(f'Значение {field!r} вне {low}-{high}.')
+            values.update(range(start, end + 1, int(step or 1)))
+        return values
+
+    def matches(self, moment):
+        minutes, hours, days, months, weekdays = self.fields
+        day = moment.day in days
+        weekday = moment.isoweekday() % 7 in weekdays
+        if self.any_day or self.any_weekday:
+            day = day and weekday
+        else:
+            day = day or weekday
+        return (moment.minute in minutes and moment.hour in hours
+                and moment.month in months and day)
+
+
+class Scheduler:
+    """Ставит периодические задачи из ``JOBS_SCHEDULE`` раз в минуту.
+
+    Запись — ``(cron, имя задачи)`` или ``(cron, имя, args)``. Повторная
+    постановка в ту же минуту отсекается ключом в кэше, поэтому
+    с общим кэшем планировщиков может быть несколько.
+    """
+
+    def __init__(self, entries=None):
+        entries = settings.JOBS_SCHEDULE if entries is None else entries
+        self.entries = [(Cron(cron), name, list(args[0]) if args else [])
+                        for cron, name, *args in entries]
+
+    def tick(self, now=None):
+        """Ставит задачи, чьё расписание совпало с текущей минутой."""
+        moment = timezone.localtime(now).replace(second=0, microsecond=0)
+        queued = []
+        for cron, name, args in self.entries:
+            if not cron.matches(moment):
+                continue
+            if cache.add(f'jobs:cron:{name}:{moment.isoformat()}', 1, 120):
+                get_task(name).enqueue(args)
+                queued.append(name)
+        return queued
@@ -0,0 +1,55 @@
+"""Отправка писем через очередь задач.
+
+``QueuedEmailBackend`` не подключается к почтовому серверу в запросе:
+письмо сериализуется и ставится задачей, а задача отправляет его
+бэкендом из ``JOBS_EMAIL_BACKEND``.
+"""
+import base64
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .jobs import HIGH, job
+
+FIELDS = ('subject', 'body', 'from_email', 'to', 'cc', 'bcc', 'reply_to',
+          'extra_headers')
+
+
+def dump_message(message):
+    data = {field: getattr(message, field) for field in FIELDS}
+    data['alternatives'] = [list(alternative) for alternative in
+                            getattr(message, 'alternatives', [])]
+    data['attachments'] = [
+        [name, base64.b64encode(
+            content.encode() if isinstance(content, str) else content,
+        ).decode(), mimetype]
+        for name, content, mimetype in message.attachments
+    ]
+    return data
+
+
+def load_message(data):
+    message = EmailMultiAlternatives(
+        data['subject'], data['body'], data['from_email'], data['to'],
+        data['bcc'], cc=data['cc'], reply_to=data['reply_to'],
+        headers=data['extra_headers'],
+        alternatives=[tuple(item) for item in data['alternatives']])
+    for name, content, mimetype in data['attachments']:
+        message.attach(name, base64.b64decode(content), mimetype)
+    return message
+
+
+@job(priority=HIGH, max_attempts=5)
+def send_email(data):
+    connection = get_connection(settings.JOBS_EMAIL_BACKEND)
+    connection.send_messages([load_message(data)])
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который ставит письма в очередь задач."""
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            send_email.delay(dump_message(message))
+        return len(email_messages)
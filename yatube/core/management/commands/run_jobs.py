@@ -0,0 +1,70 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs.worker import Scheduler, Worker
+
+
+def run_worker(batch):
+    worker = Worker(batch=batch)
+    # Задача, начатая до сигнала, доделывается.
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи core.jobs в нескольких процессах; '
+            'с --scheduler ставит и периодические задачи.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=settings.JOBS_WORKER_PROCESSES)
+        parser.add_argument('--batch', type=int, default=1,
+                            help='Сколько задач брать за раз.')
+        parser.add_argument('--scheduler', action='store_true',
+                            help='Ставить задачи из JOBS_SCHEDULE.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler() if options['scheduler'] else None
+        if options['once']:
+            if scheduler:
+                scheduler.tick()
+            done = Worker(batch=options['batch']).run_once()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        self.stopped = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        # Дочерние процессы не должны делить соединения родителя.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [None] * max(1, options['processes'])
+        while not self.stopped:
+            for number, process in enumerate(workers):
+                if process is None or not process.is_alive():
+                    if process is not None:
+                        self.stderr.write(
+                            f'Воркер {process.pid} завершился с кодом '
+                            f'{process.exitcode}, перезапуск')
+                    workers[number] = context.Process(
+                        target=run_worker, args=(options['batch'],),
+                        name=f'jobs-worker-{number}')
+                    workers[number].start()
+            if scheduler:
+                scheduler.tick()
+                connections.close_all()
+            time.sleep(1)
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join()
+
+    def stop(self, *args):
+        self.stopped = True
@@ -0,0 +1,167 @@
+"""Метрики запросов: SQL, шаблоны и кэш в разрезе имён URL.
+
+Счётчики текущего запроса живут в thread-local, поэтому их запись
+стоит одно сложение. Агрегаты хранятся в памяти процесса: по каждому
+имени URL — последние ``METRICS_WINDOW`` замеров, из которых при
+чтении считаются перцентили.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+FIELDS = ('total_ms', 'sql_count', 'sql_ms', 'template_ms',
+          'cache_hits', 'cache_misses')
+PERCENTILES = (50, 90, 99)
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Счётчики одного запроса."""
+    __slots__ = ('sql_count', 'sql_ms', 'template_ms', 'template_depth',
+                 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+def start():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish():
+    _local.stats = None
+
+
+def record_cache(hit):
+    stats = current()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def record_cache_path(path):
+    """Учитывает, каким путём get_or_compute получил значение."""
+    registry.add_cache_path(path)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """Обёртка ``connection.execute_wrapper``: число и время запросов."""
+    stats = current()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_count += 1
+        stats.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def instrument_templates():
+    """Считает время рендеринга шаблонов, отданных через бэкенд Django.
+
+    Вложенные ``include`` рендерятся внутри внешнего шаблона, поэтому
+    учитывается только самый внешний вызов.
+    """
+    from django.template.backends.django import Template
+
+    render = Template.render
+    if getattr(render, 'instrumented', False):
+        return
+
+    def timed_render(self, *args, **kwargs):
+        stats = current()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_ms += (time.perf_counter() - started) * 1000
+
+    timed_render.instrumented = True
+    Template.render = timed_render
+
+
+def percentile(ordered, percent):
+    """Перцентиль по ближайшему рангу из отсортированного списка."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+class Registry:
+    """Скользящее окно замеров по каждому имени URL."""
+
+    def __init__(self, window=None):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+        self._cache_paths = {}
+
+    def add(self, view_name, sample):
+        window = self.window or settings.METRICS_WINDOW
+        with self._lock:
+            samples = self._samples.get(view_name)
+            if samples is None:
+                samples = self._samples[view_name] = deque(maxlen=window)
+            samples.append(sample)
+            self._totals[view_name] = self._totals.get(view_name, 0) + 1
+
+    def add_cache_path(self, path):
+        with self._lock:
+            self._cache_paths[path] = self._cache_paths.get(path, 0) + 1
+
+    def cache_paths(self):
+        """Сколько раз get_or_compute прошёл каждым путём."""
+        with self._lock:
+            return dict(self._cache_paths)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._cache_paths.clear()
+
+    def report(self):
+        """Сводка по всем именам URL: число запросов и перцентили."""
+        with self._lock:
+            snapshot = {name: list(samples)
+                        for name, samples in self._samples.items()}
+            totals = dict(self._totals)
+        report = {}
+        for name, samples in sorted(snapshot.items()):
+            summary = {'requests': totals[name], 'window': len(samples)}
+            for index, field in enumerate(FIELDS):
+                ordered = sorted(sample[index] for sample in samples)
+                summary[field] = {
+                    f'p{percent}': round(percentile(ordered, percent), 2)
+                    for percent in PERCENTILES
+                }
+                summary[field]['max'] = round(ordered[-1], 2)
+            report[name] = summary
+        return report
+
+
+registry = Registry()
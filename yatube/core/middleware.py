@@ -0,0 +1,53 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+
+
+class MetricsMiddleware:
+    """Собирает метрики каждого запроса в ``core.metrics.registry``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.query_wrapper))
+                response = self.get_response(request)
+        finally:
+            metrics.finish()
+        total_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        metrics.registry.add(
+            match.view_name if match else 'unresolved',
+            (total_ms, stats.sql_count, stats.sql_ms, stats.template_ms,
+             stats.cache_hits, stats.cache_misses),
+        )
+        return response
+
+
+class ReplicaMiddleware:
+    """Выбирает базу для чтений запроса и ставит cookie после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = routers.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.finish()
+        if state.wrote:
+            response.set_cookie(routers.STICKY_COOKIE, '1',
+                                max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
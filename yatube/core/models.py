@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -11,3 +12,47 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Job(models.Model):
+    """Фоновая задача брокера ``core.jobs`` в базе."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы',
+                               help_text='JSON со списком args и kwargs')
+    priority = models.PositiveSmallIntegerField(
+        'Приоритет', default=5, help_text='Меньше — раньше')
+    status = models.CharField('Состояние', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Наибольшее число попыток',
+                                                    default=3)
+    run_at = models.DateTimeField('Не раньше', default=timezone.now)
+    locked_by = models.CharField('Воркер', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True,
+                                     blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Поставлена', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True,
+                                    db_index=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_at'],
+                         name='job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,165 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Представление помечает ответ тегами — сущностями, от которых зависит
+страница (``tag(request, 'index', 'post:5')``). Ответ хранится сжатым
+gzip вместе с версиями своих тегов на момент записи. ``purge(tag)``
+увеличивает версию тега, и все страницы с этим тегом перестают
+совпадать по версиям — без перебора ключей. Попадание в кэш — три
+обращения к кэшу, без ORM и шаблонов.
+"""
+import gzip
+import time
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import DatabaseError, transaction
+from django.http import HttpResponse
+from django.urls import resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from . import metrics, routers
+from .cache import DEGRADED, Namespace, degraded, enter_degraded
+
+PAGES = Namespace('pages')
+TAGS_ATTR = '_page_cache_tags'
+STALE_ATTR = '_page_cache_stale'
+# Заголовки, которые пересчитываются при отдаче из кэша.
+SKIPPED_HEADERS = {'content-length', 'content-encoding'}
+
+
+def enabled(request):
+    """Попадёт ли ответ на запрос в кэш страниц."""
+    return hasattr(request, TAGS_ATTR)
+
+
+def tag(request, *tags):
+    """Помечает страницу запроса тегами для сброса кэша.
+
+    Вне кэша страниц ничего не делает; если теги дорого вычислять,
+    проверьте сначала ``enabled(request)``.
+    """
+    if enabled(request):
+        getattr(request, TAGS_ATTR).update(str(name) for name in tags)
+
+
+def tag_namespace(name):
+    return Namespace('page_tag', name)
+
+
+def tag_versions(tags):
+    """Текущие версии тегов одним ``get_many``; вытесненных нет в ответе."""
+    keys = {tag_namespace(name).version_key: name for name in tags}
+    found = PAGES.cache.get_many(list(keys))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def purge(*tags):
+    """Сбрасывает страницы с тегами — сразу и ещё раз после коммита.
+
+    Второй сброс убирает страницы, которые успели собрать из данных
+    до коммита.
+    """
+    def bump():
+        for name in set(tags):
+            tag_namespace(name).bump()
+    bump()
+    transaction.on_commit(bump)
+
+
+def bypass(request):
+    """Кэш только для анонимных GET и HEAD без cookie сессии и сообщений.
+
+    После записи (cookie ``read_primary``) страница тоже собирается
+    заново, чтобы автор сразу увидел свои изменения.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return True
+    cookies = (settings.SESSION_COOKIE_NAME, CookieStorage.cookie_name,
+               routers.STICKY_COOKIE)
+    return any(name in request.COOKIES for name in cookies)
+
+
+def cacheable(response):
+    return (response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+            and 'no-store' not in response.get('Cache-Control', ''))
+
+
+def make_entry(response, versions):
+    return {
+        'status': response.status_code,
+        'headers': [(name, value) for name, value in response.items()
+                    if name.lower() not in SKIPPED_HEADERS],
+        'body': gzip.compress(response.content),
+        'tags': versions,
+        'fresh_until': time.time() + settings.PAGE_CACHE_TIMEOUT,
+    }
+
+
+def respond(request, entry):
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(entry['body'], status=entry['status'])
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(entry['body']),
+                                status=entry['status'])
+    for name, value in entry['headers']:
+        response[name] = value
+    response['Content-Length'] = str(len(response.content))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return get_conditional_response(request, etag=response.get('ETag'),
+                                    response=response)
+
+
+def fresh(entry):
+    return (entry['fresh_until'] > time.time()
+            and tag_versions(entry['tags']) == entry['tags'])
+
+
+class PageCacheMiddleware:
+    """Отдаёт страницы анонимным посетителям из кэша.
+
+    Устаревшая или сброшенная страница хранится ещё ``CACHE_STALE_TTL``
+    секунд: в аварийном режиме и при ошибке базы в представлении
+    посетитель получает её вместо ошибки.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PAGE_CACHE_TIMEOUT or bypass(request):
+            return self.get_response(request)
+        parts = ('page', request.get_host(), request.get_full_path())
+        entry = PAGES.get(*parts)
+        if entry is not None and (fresh(entry) or degraded()):
+            if not fresh(entry):
+                metrics.record_cache_path(DEGRADED)
+            # Для метрик: запрос учитывается под именем своего URL.
+            request.resolver_match = resolve(request.path_info)
+            return respond(request, entry)
+        setattr(request, TAGS_ATTR, set())
+        setattr(request, STALE_ATTR, entry)
+        response = self.get_response(request)
+        tags = getattr(request, TAGS_ATTR)
+        if not tags or not cacheable(response):
+            return response
+        versions = tag_versions(tags)
+        for name in tags - set(versions):
+            versions[name] = tag_namespace(name).version()
+        entry = make_entry(response, versions)
+        PAGES.set(*parts, value=entry, timeout=(
+            settings.PAGE_CACHE_TIMEOUT + settings.CACHE_STALE_TTL))
+        return respond(request, entry)
+
+    def process_exception(self, request, exception):
+        entry = getattr(request, STALE_ATTR, None)
+        if entry is None or not isinstance(exception, DatabaseError):
+            return None
+        enter_degraded(exception)
+        metrics.record_cache_path(DEGRADED)
+        # Устаревшая страница не должна записаться в кэш как свежая.
+        getattr(request, TAGS_ATTR).clear()
+        return respond(request, entry)
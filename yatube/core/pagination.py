@@ -0,0 +1,240 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def statistics_estimate(queryset):
+    """Число строк по статистике PostgreSQL; для других баз — None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class LightPaginator(Paginator):
+    """Номерные страницы без точного ``COUNT(*)`` на больших лентах.
+
+    ``estimate`` — дешёвая оценка числа строк (денормализованный
+    счётчик или значение из кэша), число или функция без аргументов;
+    без неё берётся оценка из статистики базы. Оценка не меньше
+    ``PAGINATOR_ESTIMATE_THRESHOLD`` заменяет ``COUNT(*)``, меньшая —
+    перепроверяется точным подсчётом, дешёвым на маленьких лентах.
+
+    С ``has_next_only`` строки не считаются вовсе: страница читает
+    ``per_page + 1`` строк, и лишняя строка говорит, есть ли следующая.
+
+    Ссылки на страницы — окно вокруг текущей и края ленты
+    (``page_window``), а не все страницы подряд.
+    """
+
+    def __init__(self, object_list, per_page, estimate=None,
+                 has_next_only=False, **kwargs):
+        self.estimate = estimate
+        self.has_next_only = has_next_only
+        self.count_is_estimated = False
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        estimate = (self.estimate() if callable(self.estimate)
+                    else self.estimate)
+        if estimate is None and hasattr(self.object_list, 'query'):
+            estimate = statistics_estimate(self.object_list)
+        if (estimate is not None
+                and estimate >= settings.PAGINATOR_ESTIMATE_THRESHOLD):
+            self.count_is_estimated = True
+            return estimate
+        return super().count
+
+    def page(self, number):
+        if not self.has_next_only:
+            return super().page(number)
+        try:
+            number = max(1, int(number))
+        except (TypeError, ValueError):
+            raise InvalidPage('Номер страницы должен быть числом.')
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        # Последняя известная страница — следующая за текущей; счётчики
+        # страницы Django читают их из этих свойств, а не из COUNT(*).
+        self.num_pages = number + 1 if has_next else number
+        self.count = bottom + len(rows) + has_next
+        self.count_is_estimated = has_next
+        return self._get_page(rows, number, self)
+
+    def get_page(self, number):
+        if self.has_next_only:
+            try:
+                return self.page(number)
+            except InvalidPage:
+                return self.page(1)
+        return super().get_page(number)
+
+    def page_window(self, number, on_each_side=None, on_ends=1):
+        """Номера страниц вокруг ``number`` и по краям; разрыв — None."""
+        if on_each_side is None:
+            on_each_side = settings.PAGINATOR_WINDOW
+        last = self.num_pages
+        shown = set(range(max(1, number - on_each_side),
+                          min(last, number + on_each_side) + 1))
+        shown.update(range(1, min(last, on_ends) + 1))
+        if not self.has_next_only:
+            shown.update(range(max(1, last - on_ends + 1), last + 1))
+        previous = 0
+        for page_number in sorted(shown):
+            if page_number > previous + 1:
+                yield None
+            yield page_number
+            previous = page_number
+
+
+class CursorPaginator(LightPaginator):
+    """Пагинатор по ключу сортировки (keyset).
+
+    Страницы выбираются условием «после/до курсора» по полям
+    ``ordering``, поэтому глубокие страницы стоят столько же, сколько
+    первая: без ``COUNT(*)`` и без ``OFFSET``. Номерные страницы
+    (``?page=N``) по-прежнему работают через обычный ``Paginator``.
+    """
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-pk'), **kwargs):
+        directions = {field.startswith('-') for field in ordering}
+        if len(directions) != 1:
+            raise ValueError(
+                'Все поля ordering должны сортироваться в одну сторону.'
+            )
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in ordering)
+        self.descending = directions.pop()
+        super().__init__(object_list.order_by(*self.ordering), per_page,
+                         **kwargs)
+
+    def page_from_request(self, request):
+        """Возвращает страницу по ``?cursor=`` или по ``?page=N``."""
+        cursor = request.GET.get(self.cursor_query_param)
+        page_number = request.GET.get(self.page_query_param)
+        if cursor is None and page_number is not None:
+            return self.numbered_page(page_number)
+        return self.cursor_page(cursor)
+
+    def numbered_page(self, number):
+        """Совместимость со старыми ссылками ``?page=N``."""
+        page = self.get_page(number)
+        page.page_window = list(self.page_window(page.number))
+        items = list(page)
+        # По оценке числа строк страница может оказаться за концом ленты.
+        page.next_cursor = (
+            self.encode_cursor(items[-1]) if page.has_next() and items
+            else None
+        )
+        page.previous_cursor = (
+            self.encode_cursor(items[0], reverse=True)
+            if page.has_previous() and items else None
+        )
+        return page
+
+    def cursor_page(self, cursor):
+        position, reverse = self.decode_cursor(cursor)
+        rows = self._fetch(position, reverse)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        page = Page(rows, None, self)
+        page.next_cursor = (
+            self.encode_cursor(rows[-1]) if has_next and rows else None
+        )
+        page.previous_cursor = (
+            self.encode_cursor(rows[0], reverse=True)
+            if has_previous and rows else None
+        )
+        return page
+
+    def _fetch(self, position, reverse):
+        """Читает ``per_page + 1`` записей после (или до) позиции."""
+        queryset = self.object_list
+        if reverse:
+            queryset = queryset.reverse()
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+        return list(queryset[:self.per_page + 1])
+
+    def _after(self, position, reverse, fields=None):
+        """Условие «строго после позиции» для составного ключа."""
+        fields = fields or self.fields
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        condition = Q()
+        for index, field in enumerate(fields):
+            equal = dict(zip(fields[:index], position[:index]))
+            condition |= Q(**equal, **{f'{field}__{lookup}': position[index]})
+        return condition
+
+    def key(self, obj):
+        if isinstance(obj, dict):
+            return tuple(obj[field] for field in self.fields)
+        return tuple(getattr(obj, field) for field in self.fields)
+
+    def encode_cursor(self, obj, reverse=False):
+        values = [
+            value.isoformat() if isinstance(value, datetime.datetime)
+            else value
+            for value in self.key(obj)
+        ]
+        payload = json.dumps([values, reverse], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Разбирает курсор; испорченный курсор ведёт на первую страницу."""
+        if not cursor:
+            return None, False
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values, reverse = json.loads(base64.urlsafe_b64decode(padded))
+            if len(values) != len(self.fields):
+                return None, False
+            position = tuple(
+                self._to_python(field, value)
+                for field, value in zip(self.fields, values)
+            )
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            return None, False
+        return position, bool(reverse)
+
+    def _to_python(self, name, value):
+        """Приводит значение из курсора к типу поля модели."""
+        opts = self.object_list.model._meta
+        try:
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+        except FieldDoesNotExist:
+            if isinstance(value, (int, float)):
+                return value
+            raise ValueError(f'Недопустимое значение курсора: {value!r}')
+        if isinstance(value, (list, dict)):
+            raise ValueError(f'Недопустимое значение курсора: {value!r}')
+        return field.to_python(value)
+
+
+def paginate(request, object_list, per_page, **kwargs):
+    """Страница ленты для запроса: курсорная или номерная."""
+    return CursorPaginator(object_list, per_page,
+                           **kwargs).page_from_request(request)
@@ -0,0 +1,70 @@
+"""Чтение с реплик базы данных с «липкостью» после записи.
+
+Реплики перечислены в ``settings.DATABASE_REPLICAS``. На реплику уходят
+только чтения в GET- и HEAD-запросах: команды, фоновые потоки и
+запросы, меняющие данные, работают с основной базой. Запрос, который
+что-то записал, ставит cookie, и ещё ``REPLICA_STICKY_SECONDS`` секунд
+все чтения этого браузера идут в основную базу — пользователь сразу
+видит свой пост или комментарий, даже если реплика отстаёт.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Служебные «модели» кэша в базе — не данные сайта.
+UNTRACKED_APPS = ('django_cache',)
+
+_local = threading.local()
+
+
+class RequestState:
+    """Куда читать в текущем запросе и была ли запись."""
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def current():
+    return getattr(_local, 'state', None)
+
+
+def start(request):
+    use_replica = (bool(settings.DATABASE_REPLICAS)
+                   and request.method in SAFE_METHODS
+                   and STICKY_COOKIE not in request.COOKIES)
+    _local.state = RequestState(use_replica)
+    return _local.state
+
+
+def finish():
+    _local.state = None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current()
+        if state is None or not state.use_replica:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = current()
+        if state is not None and (model._meta.app_label
+                                  not in UNTRACKED_APPS):
+            # После записи и дочитываем из основной базы.
+            state.use_replica = False
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, объекты из них совместимы.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
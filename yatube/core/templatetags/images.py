@@ -0,0 +1,34 @@
+from django import template
+
+register = template.Library()
+
+FALLBACK_TYPE = 'image/jpeg'
+
+
+def _srcset(urls):
+    return ', '.join(
+        f'{url} {width}w'
+        for width, url in sorted(urls.items(), key=lambda item: int(item[0]))
+    )
+
+
+@register.inclusion_tag('includes/picture.html')
+def picture(variants, src, sizes='100vw', css_class='', alt=''):
+    """Выводит ``<picture>`` с ``srcset`` для каждого формата.
+
+    ``variants`` — словарь ``{mime_type: {ширина: адрес}}``; браузер сам
+    выберет самый лёгкий из поддерживаемых форматов и подходящую ширину.
+    """
+    variants = dict(variants or {})
+    fallback = variants.pop(FALLBACK_TYPE, {})
+    return {
+        'sources': [
+            {'type': mime_type, 'srcset': _srcset(urls)}
+            for mime_type, urls in variants.items()
+        ],
+        'src': src,
+        'srcset': _srcset(fallback),
+        'sizes': sizes,
+        'css_class': css_class,
+        'alt': alt,
+    }
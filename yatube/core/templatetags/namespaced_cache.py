@@ -0,0 +1,50 @@
+from django import template
+
+from core.cache import Namespace
+
+register = template.Library()
+
+
+class NamespacedCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, namespace, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.namespace = namespace
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = self.timeout.resolve(context)
+        if timeout is not None:
+            timeout = int(timeout)
+        namespace = Namespace(self.namespace.resolve(context))
+        parts = ['fragment', self.fragment_name]
+        parts += [var.resolve(context) for var in self.vary_on]
+        # Устаревший фрагмент может пересчитываться в фоновом потоке,
+        # пока этот поток рендерит остальной шаблон: нужна своя копия.
+        snapshot = context.new(context.flatten())
+        return namespace.get_or_compute(
+            parts, lambda: self.nodelist.render(snapshot), timeout)
+
+
+@register.tag
+def nscache(parser, token):
+    """Кэширует фрагмент в версионируемом пространстве ключей.
+
+    ``{% nscache timeout namespace fragment_name [vary_on ...] %}``
+    Фрагмент сбрасывается вместе со всем пространством через
+    ``Namespace(namespace).bump()``.
+    """
+    nodelist = parser.parse(('endnscache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 4:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} ожидает как минимум три аргумента.')
+    return NamespacedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        parser.compile_filter(tokens[2]),
+        tokens[3],
+        [parser.compile_filter(token) for token in tokens[4:]],
+    )
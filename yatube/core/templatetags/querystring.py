@@ -0,0 +1,18 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def query_replace(context, **params):
+    """Строка запроса текущей страницы с заменёнными параметрами.
+
+    Параметр со значением ``None`` удаляется из строки запроса.
+    """
+    query = context['request'].GET.copy()
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return query.urlencode()
@@ -0,0 +1,71 @@
+"""Бюджеты запросов для тестов представлений."""
+import time
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget:
+    """Контекстный менеджер: проваливает тест при превышении бюджета.
+
+    ``queries`` — сколько всего SQL-запросов можно выполнить,
+    ``duplicates`` — сколько раз можно повторить уже выполненный запрос
+    (одинаковый SQL с другими параметрами — примета N+1),
+    ``time_ms`` — предельное время блока в миллисекундах.
+    """
+
+    def __init__(self, queries=None, duplicates=0, time_ms=None,
+                 using=DEFAULT_DB_ALIAS):
+        self.queries = queries
+        self.duplicates = duplicates
+        self.time_ms = time_ms
+        self.connection = connections[using]
+        self.statements = []
+        self.elapsed_ms = 0.0
+
+    def __enter__(self):
+        self.statements = []
+        self._wrapper = self.connection.execute_wrapper(self._record)
+        self._wrapper.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed_ms = (time.perf_counter() - self._started) * 1000
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self.check()
+
+    def _record(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """Запросы, выполненные больше одного раза, с числом повторов."""
+        return {sql: count - 1
+                for sql, count in Counter(self.statements).items()
+                if count > 1}
+
+    def check(self):
+        errors = []
+        if self.queries is not None and len(self.statements) > self.queries:
+            errors.append(f'Выполнено запросов: {len(self.statements)}, '
+                          f'бюджет: {self.queries}.')
+        repeated = self.repeated()
+        if sum(repeated.values()) > self.duplicates:
+            errors.append(f'Повторов запросов: {sum(repeated.values())}, '
+                          f'допустимо: {self.duplicates}.')
+            errors.extend(f'  ×{count + 1} {sql}'
+                          for sql, count in repeated.items())
+        if self.time_ms is not None and self.elapsed_ms > self.time_ms:
+            errors.append(f'Время: {self.elapsed_ms:.1f} мс, '
+                          f'бюджет: {self.time_ms} мс.')
+        if errors:
+            listing = '\n'.join(f'{number}. {sql}' for number, sql
+                                in enumerate(self.statements, 1))
+            raise QueryBudgetExceeded(
+                '\n'.join(errors) + '\nЗапросы:\n' + listing)
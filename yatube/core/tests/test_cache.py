@@ -0,0 +1,119 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import Namespace, degraded, executor
+from core.metrics import registry
+
+
+class NamespaceTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.namespace = Namespace('test', 1)
+
+    def test_keys_are_namespaced(self):
+        """Одинаковые части ключа не пересекаются между пространствами."""
+        self.namespace.set('key', value='первое')
+        Namespace('test', 2).set('key', value='второе')
+        self.assertEqual(self.namespace.get('key'), 'первое')
+
+    def test_bump_invalidates_namespace(self):
+        """bump() сбрасывает все ключи пространства."""
+        self.namespace.set('key', value='значение')
+        self.namespace.bump()
+        self.assertIsNone(self.namespace.get('key'))
+
+    def test_bump_survives_evicted_version(self):
+        self.namespace.set('key', value='значение')
+        cache.delete(self.namespace.version_key)
+        self.namespace.bump()
+        self.assertIsNone(self.namespace.get('key'))
+
+    def test_get_or_compute_runs_once_for_concurrent_misses(self):
+        """Параллельные промахи по одному ключу считаются один раз."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'значение'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.namespace.get_or_compute(['key'], compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['значение'] * 5)
+        self.assertEqual(len(calls), 1)
+
+
+class StaleWhileRevalidateTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.namespace = Namespace('test', 'swr')
+
+    def compute(self, value):
+        def compute():
+            self.calls.append(value)
+            return value
+        self.calls = []
+        return compute
+
+    @override_settings(CACHE_REVALIDATE_WORKERS=1)
+    def test_expired_value_is_served_while_refreshed(self):
+        """Истёкшее значение отдаётся сразу, пересчёт идёт в фоне."""
+        self.namespace.get_or_compute(['key'], self.compute('старое'), 0)
+        result = self.namespace.get_or_compute(['key'],
+                                               self.compute('новое'), 60)
+        self.assertEqual(result, 'старое')
+        executor().submit(lambda: None).result()
+        self.assertEqual(self.calls, ['новое'])
+        self.assertEqual(
+            self.namespace.get_or_compute(['key'], self.compute('ещё'), 60),
+            'новое')
+        self.assertEqual(self.calls, [])
+        self.assertEqual(registry.cache_paths(),
+                         {'computed': 2, 'stale': 1, 'fresh': 1})
+
+    def test_database_error_serves_last_value(self):
+        """При ошибке базы отдаётся последнее значение и до конца
+        аварийного режима пересчётов нет."""
+        self.namespace.get_or_compute(['key'], self.compute('старое'))
+        self.namespace.bump()
+
+        def broken():
+            raise OperationalError('database is locked')
+
+        with self.assertLogs('core.cache', 'WARNING'):
+            result = self.namespace.get_or_compute(['key'], broken)
+        self.assertEqual(result, 'старое')
+        self.assertTrue(degraded())
+        self.namespace.bump()
+        result = self.namespace.get_or_compute(['key'],
+                                               self.compute('новое'))
+        self.assertEqual(result, 'старое')
+        self.assertEqual(self.calls, [])
+        self.assertEqual(registry.cache_paths()['degraded'], 2)
+
+    def test_database_error_without_value_is_raised(self):
+        def broken():
+            raise OperationalError('database is locked')
+
+        with self.assertLogs('core.cache', 'WARNING'), \
+                self.assertRaises(OperationalError):
+            self.namespace.get_or_compute(['key'], broken)
+
+    @override_settings(CACHE_SLOW_COMPUTE_SECONDS=0)
+    def test_slow_compute_enters_degraded_mode(self):
+        with self.assertLogs('core.cache', 'WARNING'):
+            self.namespace.get_or_compute(['key'], self.compute('значение'))
+        self.assertTrue(degraded())
@@ -0,0 +1,143 @@
+import datetime
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.jobs import HIGH, LOW, job
+from core.jobs.worker import Cron, Scheduler, Worker
+from core.models import Job
+from posts.models import User
+
+calls = []
+
+
+@job
+def record(value):
+    calls.append(value)
+
+
+@job(max_attempts=2)
+def broken():
+    raise RuntimeError('сломалось')
+
+
+@override_settings(JOBS_BROKER='db://')
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(name='test')
+
+    def test_delay_queues_and_worker_runs(self):
+        record.delay('значение')
+        self.assertEqual(calls, [])
+        self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(calls, ['значение'])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_rollback_drops_job(self):
+        """Задача ставится в транзакции и откатывается вместе с ней."""
+        with self.assertRaises(ValueError), transaction.atomic():
+            record.delay('значение')
+            raise ValueError
+        self.assertFalse(Job.objects.exists())
+
+    def test_priorities(self):
+        record.enqueue(['низкий'], priority=LOW)
+        record.enqueue(['высокий'], priority=HIGH)
+        record.delay('обычный')
+        self.worker.run_once()
+        self.assertEqual(calls, ['высокий', 'обычный', 'низкий'])
+
+    def test_retries_with_backoff(self):
+        """Упавшая задача повторяется позже, затем помечается упавшей."""
+        broken.delay()
+        with self.assertLogs('core.jobs.worker', 'WARNING'):
+            self.worker.run_once()
+        queued = Job.objects.get()
+        self.assertEqual((queued.status, queued.attempts), (Job.QUEUED, 1))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('сломалось', queued.last_error)
+        self.assertEqual(self.worker.run_once(), 0)
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.jobs.worker', 'ERROR'):
+            self.worker.run_once()
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_stale_running_jobs_are_requeued(self):
+        record.delay('значение')
+        Job.objects.update(status=Job.RUNNING, locked_by='упавший',
+                           locked_at=timezone.now()
+                           - datetime.timedelta(days=1))
+        self.worker.run_once()
+        self.assertEqual(calls, ['значение'])
+
+    def test_stale_job_without_attempts_fails(self):
+        """Задача, уронившая воркер на последней попытке, не повторяется."""
+        broken.delay()
+        Job.objects.update(status=Job.RUNNING, attempts=2,
+                           locked_by='упавший',
+                           locked_at=timezone.now()
+                           - datetime.timedelta(days=1))
+        with self.assertLogs('core.jobs.brokers', 'ERROR'):
+            self.assertEqual(self.worker.run_once(), 0)
+        lost = Job.objects.get()
+        self.assertEqual(lost.status, Job.FAILED)
+        self.assertIn('Воркер пропал', lost.last_error)
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        JOBS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_email_is_sent_by_worker(self):
+        """Письмо уходит из воркера, а не из запроса."""
+        self.client.post(reverse('password_reset'),
+                         {'email': User.objects.create_user(
+                             'reader', 'reader@example.com', 'pass').email})
+        self.assertEqual(mail.outbox, [])
+        self.worker.run_once()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+
+    def test_status_is_staff_only(self):
+        record.delay('значение')
+        client = Client()
+        self.assertEqual(client.get(reverse('jobs')).status_code, 302)
+        client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertContains(client.get(reverse('jobs')), 'queued')
+        data = client.get(reverse('jobs'), {'format': 'json'}).json()
+        self.assertEqual(data['counts']['queued'], 1)
+
+
+@override_settings(JOBS_BROKER='db://')
+class SchedulerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cron(self):
+        cron = Cron('*/15 9-17 * * 1-5')
+        monday = datetime.datetime(2026, 10, 12, 9, 30)
+        self.assertTrue(cron.matches(monday))
+        self.assertFalse(cron.matches(monday.replace(minute=31)))
+        self.assertFalse(cron.matches(monday.replace(day=11)))
+        first_or_monday = Cron('0 0 1 * 1')
+        self.assertTrue(first_or_monday.matches(
+            monday.replace(hour=0, minute=0)))
+        self.assertTrue(first_or_monday.matches(
+            datetime.datetime(2026, 10, 1, 0, 0)))
+        self.assertFalse(first_or_monday.matches(
+            datetime.datetime(2026, 10, 13, 0, 0)))
+        self.assertTrue(Cron('0 0 1 * *').matches(
+            datetime.datetime(2026, 10, 1, 0, 0)))
+        with self.assertRaises(ValueError):
+            Cron('61 * * * *')
+
+    def test_tick_queues_once_per_minute(self):
+        scheduler = Scheduler([('* * * * *', f'{__name__}.record',
+                                ['расписание'])])
+        now = timezone.now()
+        self.assertEqual(scheduler.tick(now), [f'{__name__}.record'])
+        self.assertEqual(scheduler.tick(now), [])
+        self.assertEqual(Job.objects.count(), 1)
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.metrics import percentile, registry
+from posts.models import Post, User
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = Client()
+
+    def test_requests_are_recorded_by_url_name(self):
+        """Метрики собираются по имени URL, включая SQL и кэш."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:profile', args=('auth',)))
+        report = registry.report()
+        index = report['posts:index']
+        self.assertEqual(index['requests'], 2)
+        self.assertGreater(index['sql_count']['max'], 0)
+        self.assertGreater(index['template_ms']['max'], 0)
+        # Первый запрос промахивается мимо кэша страниц, ленты и карточки
+        # поста, второй попадает в кэш страниц.
+        self.assertEqual(index['cache_misses']['max'], 3)
+        self.assertEqual(index['cache_hits']['max'], 1)
+        self.assertEqual(report['posts:profile']['requests'], 1)
+
+    def test_report_is_staff_only(self):
+        """Отчёт виден только персоналу, в HTML и в JSON."""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.staff)
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertContains(response, 'posts:index')
+        data = self.client.get(reverse('metrics'), {'format': 'json'}).json()
+        self.assertEqual(data['posts:index']['requests'], 1)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 90), 7)
@@ -0,0 +1,105 @@
+import gzip
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.cache import enter_degraded
+from core.pagecache import purge
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_hit_skips_orm_and_templates(self):
+        """Повторный анонимный запрос отдаётся без SQL и шаблонов."""
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.templates, [])
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_compressed_for_gzip_clients(self):
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('Первый пост', gzip.decompress(
+            response.content).decode())
+
+    def test_not_modified_from_cache(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def rename_group(self):
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+
+    def rename_author(self):
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name, author.last_name = 'Иван', 'Петров'
+        author.save()
+
+    def test_writes_purge_tagged_pages(self):
+        """Запись сбрасывает страницы, где выводится изменённое."""
+        cases = [
+            (reverse('posts:index'), 'Новый пост',
+             lambda: Post.objects.create(text='Новый пост',
+                                         author=self.reader)),
+            (reverse('posts:group_list', args=(self.group.slug,)),
+             'Новое название', self.rename_group),
+            (reverse('posts:post_detail', args=(self.post.pk,)),
+             'Новый комментарий',
+             lambda: Comment.objects.create(post=self.post,
+                                            author=self.reader,
+                                            text='Новый комментарий')),
+            (reverse('posts:index'), 'Иван Петров', self.rename_author),
+        ]
+        for url, text, write in cases:
+            with self.subTest(url=url, text=text):
+                self.assertNotContains(self.client.get(url), text)
+                write()
+                self.assertContains(self.client.get(url), text)
+
+    def test_follow_purges_both_profiles(self):
+        url = reverse('posts:profile', args=(self.author.username,))
+        before = self.client.get(url).content
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertNotEqual(self.client.get(url).content, before)
+
+    def test_logged_in_users_bypass_cache(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertTrue(response.templates)
+        self.assertContains(response, 'reader')
+
+    def test_degraded_mode_serves_purged_pages(self):
+        """В аварийном режиме сброшенная страница отдаётся без базы."""
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        purge('index')
+        with self.assertLogs('core.cache', 'WARNING'):
+            enter_degraded('тест')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.content, first.content)
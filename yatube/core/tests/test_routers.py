@@ -0,0 +1,75 @@
+import random
+from unittest import mock
+
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from core import routers
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica0'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+        self.addCleanup(routers.finish)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_safe_requests_read_from_replica(self):
+        routers.start(self.factory.get('/'))
+        self.assertEqual(self.router.db_for_read(Post), 'replica0')
+
+    def test_writes_pin_primary(self):
+        """После записи запрос дочитывает из основной базы."""
+        state = routers.start(self.factory.get('/'))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertTrue(state.wrote)
+
+    def test_unsafe_and_sticky_requests_use_primary(self):
+        requests = [self.factory.post('/'), self.factory.get('/')]
+        requests[1].COOKIES[routers.STICKY_COOKIE] = '1'
+        for request in requests:
+            with self.subTest(method=request.method):
+                routers.start(request)
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica0', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+
+# Вместо реплики — та же база: проверяем, куда маршрутизируются чтения.
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        patcher = mock.patch('core.routers.random.choice',
+                             wraps=random.choice)
+        self.replica_reads = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_your_writes(self):
+        """После поста браузер читает из основной базы."""
+        self.client.get(reverse('posts:index'))
+        self.assertTrue(self.replica_reads.called)
+        response = self.client.post(reverse('posts:post_create'),
+                                    {'text': 'Новый пост'})
+        self.assertIn(routers.STICKY_COOKIE, response.cookies)
+        self.replica_reads.reset_mock()
+        response = self.client.get(reverse('posts:profile',
+                                           args=(self.user.username,)))
+        self.assertContains(response, 'Новый пост')
+        self.assertFalse(self.replica_reads.called)
+
+    def test_reads_do_not_stick(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(routers.STICKY_COOKIE, response.cookies)
@@ -0,0 +1,25 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+
+class PictureTagTest(SimpleTestCase):
+    def render(self, variants):
+        template = Template(
+            '{% load images %}{% picture variants "/fallback.jpg" %}')
+        return template.render(Context({'variants': variants}))
+
+    def test_modern_formats_become_sources(self):
+        """Каждый формат кроме JPEG выводится отдельным <source>."""
+        html = self.render({
+            'image/webp': {'960': '/960.webp', '480': '/480.webp'},
+            'image/jpeg': {'480': '/480.jpg'},
+        })
+        self.assertIn('type="image/webp" '
+                      'srcset="/480.webp 480w, /960.webp 960w"', html)
+        self.assertIn('src="/fallback.jpg" srcset="/480.jpg 480w"', html)
+
+    def test_without_variants_renders_plain_image(self):
+        html = self.render({})
+        self.assertNotIn('<source', html)
+        self.assertNotIn('srcset', html)
+        self.assertIn('src="/fallback.jpg"', html)
@@ -0,0 +1,37 @@
+from django.test import TestCase
+
+from core.testing import QueryBudget, QueryBudgetExceeded
+from posts.models import Post, User
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=cls.user)
+
+    def test_within_budget(self):
+        with QueryBudget(queries=1) as budget:
+            list(Post.objects.select_related('author'))
+        self.assertEqual(len(budget.statements), 1)
+
+    def test_too_many_queries(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded,
+                                      'Выполнено запросов: 2'):
+            with QueryBudget(queries=1):
+                Post.objects.count()
+                Post.objects.exists()
+
+    def test_n_plus_one_is_duplicate(self):
+        """Ленивое обращение к связи в цикле — повтор одного запроса."""
+        with self.assertRaisesMessage(QueryBudgetExceeded,
+                                      'Повторов запросов: 2'):
+            with QueryBudget(duplicates=0):
+                [post.author.username for post in Post.objects.all()]
+
+    def test_time_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'Время'):
+            with QueryBudget(time_ms=0):
+                Post.objects.count()
@@ -1,5 +1,12 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .cache import PATHS
+from .jobs import get_broker
+from .metrics import FIELDS, registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -7,3 +14,26 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def metrics_report(request):
+    report = registry.report()
+    cache_paths = registry.cache_paths()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({**report, 'cache_paths': cache_paths},
+                            json_dumps_params={'indent': 2})
+    return render(request, 'core/metrics.html',
+                  {'report': report, 'fields': FIELDS,
+                   'cache_paths': [(path, cache_paths.get(path, 0))
+                                   for path in PATHS]})
+
+
+@staff_member_required
+def jobs_status(request):
+    stats = get_broker().stats()
+    if request.GET.get('format') == 'json':
+        return JsonResponse(stats, json_dumps_params={'indent': 2})
+    return render(request, 'core/jobs.html', {
+        'stats': stats, 'schedule': settings.JOBS_SCHEDULE,
+        'broker': settings.JOBS_BROKER})
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Group, Post, Follow, Comment
+from .search import filter_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -11,6 +12,11 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,172 @@
+"""Замеры производительности страниц постов.
+
+Каждый сценарий — запрос к одному адресу через тестовый клиент.
+Для него считаются пропускная способность, p50/p99 задержки и число
+SQL-запросов во всех базах. Кэш целых страниц на время замера
+выключен: иначе GET-сценарии замеряли бы только чтение из кэша.
+Результат — словарь, который сохраняется в JSON и
+сравнивается с результатом прошлого запуска.
+"""
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api.auth import user_token
+from core.metrics import percentile
+from .models import Comment, Follow, Group, Post, User
+
+WRITER = 'bench_writer'
+API_BATCH = 50
+
+
+class Scenario:
+    """Запрос сценария; ``before`` готовит состояние перед каждым
+    запросом и в замер не входит."""
+
+    def __init__(self, name, url, method='get', data=None, user=None,
+                 before=None, **extra):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data or {}
+        self.user = user
+        self.before = before or (lambda: None)
+        self.extra = extra
+
+
+def follow(user, author):
+    Follow.objects.get_or_create(user=user, author=author)
+
+
+def unfollow(user, author):
+    Follow.objects.filter(user=user, author=author).delete()
+
+
+def scenarios():
+    """Сценарии на самых тяжёлых объектах набора данных."""
+    reader = (User.objects.annotate(follows=Count('follower'))
+              .order_by('-follows').first())
+    author = (User.objects.annotate(total=Count('posts'))
+              .order_by('-total').first())
+    group = Group.objects.order_by('-posts_count').first()
+    post = Post.objects.order_by('-comments_count', '-pk').first()
+    writer, _ = User.objects.get_or_create(username=WRITER)
+    Follow.objects.filter(user=writer).delete()
+    result = [
+        Scenario('index', reverse('posts:index')),
+        Scenario('index_deep', reverse('posts:index'), data={'page': 50}),
+        Scenario('profile', reverse('posts:profile',
+                                    args=(author.username,))),
+        Scenario('post_detail', reverse('posts:post_detail',
+                                        args=(post.pk,))),
+        Scenario('follow_index', reverse('posts:follow_index'), user=reader),
+        Scenario('search', reverse('posts:search'), data={'q': 'пост'}),
+        Scenario('api_posts', reverse('api:post_list'),
+                 data={'include': 'author,group'}),
+        Scenario('post_create', reverse('posts:post_create'), 'post',
+                 {'text': 'Пост из замера'}, writer),
+        Scenario('add_comment', reverse('posts:add_comment',
+                                        args=(post.pk,)), 'post',
+                 {'text': 'Комментарий из замера'}, writer),
+        Scenario('api_post_batch', reverse('api:post_list'), 'post',
+                 [{'text': 'Пост из замера'}] * API_BATCH, writer,
+                 content_type='application/json',
+                 HTTP_AUTHORIZATION=f'Token {user_token(writer)}'),
+        # Каждый запрос действительно подписывает или отписывает.
+        Scenario('profile_follow', reverse('posts:profile_follow',
+                                           args=(author.username,)),
+                 user=writer, before=lambda: unfollow(writer, author)),
+        Scenario('profile_unfollow', reverse('posts:profile_unfollow',
+                                             args=(author.username,)),
+                 user=writer, before=lambda: follow(writer, author)),
+    ]
+    if group is not None:
+        result.insert(1, Scenario('group_list', reverse(
+            'posts:group_list', args=(group.slug,))))
+    return result
+
+
+def measure(scenario, iterations, warmup=2):
+    client = Client()
+    if scenario.user is not None:
+        client.force_login(scenario.user)
+    request = getattr(client, scenario.method)
+    for _ in range(warmup):
+        scenario.before()
+        request(scenario.url, scenario.data, **scenario.extra)
+    timings = []
+    queries = []
+    paused = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        began = time.perf_counter()
+        scenario.before()
+        paused += time.perf_counter() - began
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(
+                connections[alias])) for alias in connections]
+            began = time.perf_counter()
+            response = request(scenario.url, scenario.data,
+                               **scenario.extra)
+            timings.append((time.perf_counter() - began) * 1000)
+        queries.append(sum(len(context) for context in captured))
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'{scenario.name}: ответ {response.status_code}')
+    elapsed = time.perf_counter() - started - paused
+    timings.sort()
+    return {
+        'requests': iterations,
+        'throughput_rps': round(iterations / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'queries': max(queries),
+    }
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+def run(iterations=50, warmup=2, only=None, log=None):
+    log = log or (lambda message: None)
+    results = {}
+    for scenario in scenarios():
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = measure(scenario, iterations, warmup)
+        log(f'{scenario.name}: {results[scenario.name]}')
+    # Набор данных не должен меняться от запуска к запуску.
+    Comment.objects.filter(author__username=WRITER).delete()
+    Post.objects.filter(author__username=WRITER).delete()
+    Follow.objects.filter(user__username=WRITER).delete()
+    return {
+        'created': timezone.now().isoformat(),
+        'dataset': {'posts': Post.objects.count(),
+                    'users': User.objects.count()},
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """Регрессии относительно прошлого запуска, списком строк.
+
+    Задержка считается регрессией, если выросла больше чем на
+    ``threshold`` (доля), число запросов — при любом росте.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        for field in ('p50_ms', 'p99_ms'):
+            if result[field] > before[field] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {field} {before[field]} → {result[field]}')
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: queries {before["queries"]} → {result["queries"]}')
+    return regressions
@@ -0,0 +1,43 @@
+"""Общие помощники массовой загрузки данных.
+
+``bulk_create`` не вызывает сигналы, поэтому после массовой вставки
+счётчики, ленты и поисковый индекс нужно обновить отдельно.
+"""
+import itertools
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from . import counters, timeline
+from .search import get_backend
+
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Позволяет задать даты полей с ``auto_now_add`` вручную."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def rebuild_derived():
+    """Пересчитывает счётчики, ленты и поисковый индекс целиком."""
+    with transaction.atomic():
+        counters.rebuild_counters()
+        timeline.rebuild()
+        get_backend().rebuild()
@@ -0,0 +1,25 @@
+from core.cache import Namespace
+
+# Всё, что отображает ленты постов: фрагменты главной страницы и т.п.
+FEED = Namespace('feed')
+# Карточки постов. Ключ карточки содержит дату изменения поста, поэтому
+# правка поста меняет только его ключ; пространство целиком
+# сбрасывается, когда меняются имена авторов или группы.
+CARDS = Namespace('post_cards')
+
+
+def bump_feed_generation():
+    """Делает недействительными все закэшированные фрагменты ленты."""
+    FEED.bump()
+
+
+def post_tags(post):
+    """Теги кэша страниц, от которых зависит вывод поста."""
+    tags = [f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id is not None:
+        tags.append(f'group:{post.group_id}')
+    return tags
+
+
+def page_tags(posts):
+    return {name for post in posts for name in post_tags(post)}
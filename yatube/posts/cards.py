@@ -0,0 +1,49 @@
+"""Карточки постов в лентах, собранные из кэша.
+
+Ключи карточек страницы читаются одним ``get_many``; шаблон
+рендерится только для промахов, и они записываются одним
+``set_many``. Ключ включает дату изменения поста, поэтому правка
+поста или готовая миниатюра делают недействительной только его
+карточку.
+"""
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .cache import CARDS, bump_feed_generation
+
+TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_parts(post, author_link, group_link):
+    return ('card', post.pk, post.updated.timestamp(),
+            author_link, group_link)
+
+
+def render_cards(posts, author_link=True, group_link=True):
+    posts = list(posts)
+    keys = [card_parts(post, author_link, group_link) for post in posts]
+    version = CARDS.version()
+    cards = CARDS.get_many(keys, version=version)
+    missing = {}
+    template = get_template(TEMPLATE)
+    for post, key in zip(posts, keys):
+        if key not in cards:
+            missing[key] = cards[key] = template.render({
+                'post': post,
+                'author_link': author_link,
+                'group_link': group_link,
+            })
+    if missing:
+        CARDS.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT,
+                       version=version)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def bump_cards():
+    """Сбрасывает все карточки: изменились имена авторов или групп.
+
+    Фрагменты ленты собраны из карточек, поэтому сбрасываются тоже.
+    """
+    CARDS.bump()
+    bump_feed_generation()
@@ -0,0 +1,46 @@
+"""Валидаторы страниц для ``core.conditional.conditional``.
+
+Каждый укладывается в один запрос по индексу (или в чтение версии
+из кэша) и выполняется до основных запросов представления.
+"""
+from django.db.models import Exists, Max, OuterRef
+
+from .cache import CARDS, FEED
+from .models import Follow, Group, Post, User
+
+
+def index(request):
+    # Версия ленты меняется при любом сохранении и удалении поста.
+    return ('index', FEED.version())
+
+
+def group_posts(request, slug):
+    row = (Group.objects.filter(slug=slug)
+           .annotate(latest=Max('posts__updated'))
+           .values_list('pk', 'title', 'description', 'posts_count',
+                        'latest').first())
+    # Имена авторов в карточках меняются вместе с версией карточек.
+    return row and (*row, CARDS.version())
+
+
+def profile(request, username):
+    following = Follow.objects.filter(user=request.user.pk,
+                                      author=OuterRef('pk'))
+    return (User.objects.filter(username=username)
+            .annotate(latest=Max('posts__updated'),
+                      is_followed=Exists(following))
+            .values_list('pk', 'first_name', 'last_name',
+                         'counters__posts_count',
+                         'counters__followers_count',
+                         'counters__following_count', 'latest',
+                         'is_followed').first())
+
+
+def post_detail(request, post_id):
+    return (Post.objects.filter(pk=post_id).order_by()
+            .annotate(latest_comment=Max('comments__created'))
+            .values_list('updated', 'comments_count',
+                         'author__username', 'author__first_name',
+                         'author__last_name', 'group__title',
+                         'author__counters__posts_count',
+                         'latest_comment').first())
@@ -0,0 +1,66 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+def change(queryset, field, delta):
+    """Атомарно меняет счётчик на ``delta`` прямо в базе."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_user(user_id, field, delta):
+    updated = change(UserCounters.objects.filter(pk=user_id), field, delta)
+    if not updated and delta > 0:
+        # Строки нет (например, пользователь создан через bulk_create):
+        # создаём её сразу с точными значениями. При уменьшении строку
+        # не создаём: её могли удалить вместе с пользователем.
+        rebuild_user_counters(User.objects.filter(pk=user_id))
+
+
+def _count(model, field, **extra):
+    """Подзапрос: число строк ``model``, ссылающихся на внешнюю строку."""
+    rows = (model.objects.filter(**{field: OuterRef('pk')}, **extra)
+            .order_by().values(field).annotate(total=Count('pk'))
+            .values('total'))
+    return Coalesce(Subquery(rows), 0)
+
+
+def rebuild_user_counters(users=None):
+    if users is None:
+        users = User.objects.all()
+    UserCounters.objects.bulk_create(
+        (UserCounters(user_id=pk)
+         for pk in users.filter(counters__isnull=True)
+         .values_list('pk', flat=True).iterator()),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return UserCounters.objects.filter(user__in=users).update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'),
+    )
+
+
+def rebuild_group_counters(groups=None):
+    if groups is None:
+        groups = Group.objects.all()
+    return groups.update(posts_count=_count(Post, 'group'))
+
+
+def rebuild_post_counters(posts=None):
+    if posts is None:
+        posts = Post.objects.all()
+    return posts.update(comments_count=_count(Comment, 'post'))
+
+
+def rebuild_counters():
+    """Пересчитывает все денормализованные счётчики с нуля."""
+    return {
+        'groups': rebuild_group_counters(),
+        'posts': rebuild_post_counters(),
+        'users': rebuild_user_counters(),
+    }
@@ -0,0 +1,208 @@
+"""Ленты Atom, RSS и JSON Feed для главной, групп, профилей и подписок.
+
+Перед чтением постов одним запросом по индексу выбираются ключи и даты
+изменения последних ``FEED_SIZE`` постов: из них и версии карточек
+получаются ETag и Last-Modified, и на условный запрос ответ 304
+отдаётся без чтения самих постов.
+Тело ленты собирается генератором и отдаётся потоком.
+"""
+import json
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core import signing
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from .cache import CARDS
+from .models import Group, Post, User
+from .timeline import TimelinePaginator
+from core.conditional import make_etag
+
+CONTENT_TYPES = {
+    'atom': 'application/atom+xml; charset=utf-8',
+    'rss': 'application/rss+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+FOLLOW_FEED_SALT = 'posts.feeds.follow'
+
+
+class Feed:
+    """Заголовок ленты и её посты."""
+
+    def __init__(self, request, title, link, posts, updated):
+        self.title = title
+        self.link = request.build_absolute_uri(link)
+        self.self_link = request.build_absolute_uri()
+        self.posts = posts
+        self.updated = updated
+        self.request = request
+
+    def post_link(self, post):
+        return self.request.build_absolute_uri(
+            reverse('posts:post_detail', args=(post.pk,)))
+
+    def author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+
+def post_title(post):
+    return Truncator(post.text).words(8)
+
+
+def atom(feed):
+    updated = feed.updated.isoformat() if feed.updated else ''
+    yield ('<?xml version="1.0" encoding="utf-8"?>\n'
+           '<feed xmlns="http://www.w3.org/2005/Atom">'
+           f'<title>{escape(feed.title)}</title>'
+           f'<link href={quoteattr(feed.link)} rel="alternate"/>'
+           f'<link href={quoteattr(feed.self_link)} rel="self"/>'
+           f'<id>{escape(feed.self_link)}</id>'
+           f'<updated>{updated}</updated>')
+    for post in feed.posts:
+        link = feed.post_link(post)
+        yield ('<entry>'
+               f'<title>{escape(post_title(post))}</title>'
+               f'<link href={quoteattr(link)} rel="alternate"/>'
+               f'<id>{escape(link)}</id>'
+               f'<published>{post.pub_date.isoformat()}</published>'
+               f'<updated>{post.updated.isoformat()}</updated>'
+               f'<author><name>{escape(feed.author_name(post))}</name>'
+               '</author>'
+               f'<content type="text">{escape(post.text)}</content>'
+               '</entry>')
+    yield '</feed>\n'
+
+
+def rss(feed):
+    updated = format_datetime(feed.updated) if feed.updated else ''
+    yield ('<?xml version="1.0" encoding="utf-8"?>\n'
+           '<rss version="2.0"><channel>'
+           f'<title>{escape(feed.title)}</title>'
+           f'<link>{escape(feed.link)}</link>'
+           f'<description>{escape(feed.title)}</description>'
+           f'<lastBuildDate>{updated}</lastBuildDate>')
+    for post in feed.posts:
+        link = feed.post_link(post)
+        yield ('<item>'
+               f'<title>{escape(post_title(post))}</title>'
+               f'<link>{escape(link)}</link>'
+               f'<guid isPermaLink="true">{escape(link)}</guid>'
+               f'<pubDate>{format_datetime(post.pub_date)}</pubDate>'
+               f'<author>{escape(feed.author_name(post))}</author>'
+               f'<description>{escape(post.text)}</description>'
+               '</item>')
+    yield '</channel></rss>\n'
+
+
+def json_feed(feed):
+    header = json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': feed.title,
+        'home_page_url': feed.link,
+        'feed_url': feed.self_link,
+    }, ensure_ascii=False)
+    yield header[:-1] + ', "items": ['
+    for number, post in enumerate(feed.posts):
+        item = {
+            'id': str(post.pk),
+            'url': feed.post_link(post),
+            'title': post_title(post),
+            'content_text': post.text,
+            'date_published': post.pub_date.isoformat(),
+            'authors': [{'name': feed.author_name(post)}],
+        }
+        if post.image:
+            item['image'] = feed.request.build_absolute_uri(post.image.url)
+        yield (', ' if number else '') + json.dumps(item, ensure_ascii=False)
+    yield ']}\n'
+
+
+WRITERS = {'atom': atom, 'rss': rss, 'json': json_feed}
+
+
+def validators(feed_id, fmt, head):
+    """ETag и Last-Modified по ключам и датам последних постов.
+
+    Имена авторов и названия групп меняются вместе с версией карточек
+    постов, поэтому она тоже входит в ETag.
+    """
+    updated = max((row[-1] for row in head), default=None)
+    return make_etag(feed_id, fmt, head, CARDS.version()), updated
+
+
+def respond(request, fmt, feed_id, title, link, head, load_posts):
+    """Ответ 304 по валидаторам или потоковая лента."""
+    etag, updated = validators(feed_id, fmt, head)
+    timestamp = int(updated.timestamp()) if updated else None
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=timestamp)
+    if response is None:
+        feed = Feed(request, title, link, load_posts(), updated)
+        response = StreamingHttpResponse(WRITERS[fmt](feed),
+                                         content_type=CONTENT_TYPES[fmt])
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def post_feed(request, fmt, feed_id, title, link, queryset):
+    head = list(queryset.order_by('-pub_date', '-pk')
+                .values_list('pk', 'updated')[:settings.FEED_SIZE])
+
+    def load_posts():
+        return (Post.objects.filter(pk__in=[pk for pk, _ in head])
+                .select_related('author', 'group')
+                .order_by('-pub_date', '-pk').iterator())
+
+    return respond(request, fmt, feed_id, title, link, head, load_posts)
+
+
+def index_feed(request, fmt):
+    return post_feed(request, fmt, 'index', 'Последние записи Yatube',
+                     reverse('posts:index'), Post.objects.all())
+
+
+def group_feed(request, slug, fmt):
+    group = get_object_or_404(Group.objects.only('pk', 'title', 'slug'),
+                              slug=slug)
+    return post_feed(request, fmt, ('group', group.pk),
+                     f'Записи сообщества {group.title}',
+                     reverse('posts:group_list', args=(slug,)),
+                     group.posts.all())
+
+
+def profile_feed(request, username, fmt):
+    author = get_object_or_404(User.objects.only('pk', 'username'),
+                               username=username)
+    return post_feed(request, fmt, ('profile', author.pk),
+                     f'Записи пользователя {author.username}',
+                     reverse('posts:profile', args=(username,)),
+                     author.posts.all())
+
+
+def follow_feed_token(user):
+    """Подписанный токен личной ленты подписок пользователя."""
+    return signing.Signer(salt=FOLLOW_FEED_SALT).sign(str(user.pk))
+
+
+def follow_feed(request, token, fmt):
+    try:
+        user_id = signing.Signer(salt=FOLLOW_FEED_SALT).unsign(token)
+    except signing.BadSignature:
+        raise Http404('Неверный токен ленты.')
+    user = get_object_or_404(User, pk=user_id)
+    # Лента подписок читается так же, как страница /follow/: диапазон
+    # TimelineEntry и посты «знаменитостей», — уже готовыми объектами.
+    posts = list(TimelinePaginator(user, settings.FEED_SIZE)
+                 .cursor_page(None))
+    head = [(post.pk, post.updated) for post in posts]
+    return respond(request, fmt, ('follow', user.pk),
+                   'Записи авторов, на которых вы подписаны',
+                   reverse('posts:follow_index'), head, lambda: posts)
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержку и число SQL-запросов страниц постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', nargs='*',
+                            help='Имена сценариев, по умолчанию все.')
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+        parser.add_argument('--baseline',
+                            help='JSON прошлого запуска для сравнения.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимый рост задержки, доля.')
+
+    def handle(self, *args, **options):
+        result = benchmark.run(options['iterations'], options['warmup'],
+                               options['only'], log=self.stdout.write)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, ensure_ascii=False, indent=2)
+        if not options['baseline']:
+            return
+        with open(options['baseline']) as baseline:
+            regressions = benchmark.compare(result, json.load(baseline),
+                                            options['threshold'])
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.plans import feed_queries, problems
+
+
+class Command(BaseCommand):
+    help = 'Показывает EXPLAIN запросов лент и проверяет их индексы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Завершиться ошибкой, если план плохой.')
+
+    def handle(self, *args, **options):
+        failed = []
+        for query in feed_queries():
+            plan = query.explain()
+            found = problems(plan, query.index)
+            self.stdout.write(self.style.MIGRATE_HEADING(query.name))
+            self.stdout.write(plan)
+            if found:
+                failed.append(query.name)
+                self.stdout.write(self.style.ERROR('; '.join(found)))
+            else:
+                self.stdout.write(self.style.SUCCESS('OK'))
+        if failed and options['check']:
+            raise CommandError(f'Плохие планы: {", ".join(failed)}')
@@ -0,0 +1,31 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии или подписки в NDJSON/CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=transfer.KINDS)
+        parser.add_argument('--output', default='-',
+                            help='Файл выгрузки, по умолчанию stdout.')
+        parser.add_argument('--format', choices=transfer.FORMATS)
+
+    def handle(self, *args, **options):
+        path = options['output']
+        fmt = options['format'] or transfer.guess_format(path)
+        fields = list(transfer.EXPORT_FIELDS[options['kind']])
+        rows = transfer.export_rows(options['kind'])
+        started = time.monotonic()
+        if path == '-':
+            written = transfer.write_rows(rows, sys.stdout, fmt, fields)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as output:
+                written = transfer.write_rows(rows, output, fmt, fields)
+        self.stderr.write(
+            f'Выгружено записей: {written} '
+            f'за {time.monotonic() - started:.1f} с')
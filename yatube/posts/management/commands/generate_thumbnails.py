@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import executor, generate_thumbnail, in_worker
+
+
+class Command(BaseCommand):
+    help = 'Готовит недостающие миниатюры картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать миниатюры всех постов.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnail='')
+        post_ids = list(posts.values_list('pk', flat=True))
+        futures = [executor().submit(in_worker, generate_thumbnail, pk)
+                   for pk in post_ids]
+        for future in futures:
+            future.result()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {len(post_ids)}'))
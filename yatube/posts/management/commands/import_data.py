@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает группы, посты, комментарии или подписки из NDJSON/CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=transfer.KINDS)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=transfer.FORMATS)
+        parser.add_argument('--batch-size', type=int,
+                            default=transfer.BATCH_SIZE)
+        parser.add_argument(
+            '--defer-maintenance', action='store_true',
+            help='Пересчитать счётчики, ленты и индекс один раз в конце.')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не учитывая контрольную точку.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or transfer.guess_format(path)
+        checkpoint = transfer.Checkpoint(f'{path}.checkpoint')
+        if options['restart']:
+            checkpoint.clear()
+        importer = transfer.Importer(
+            options['kind'],
+            batch_size=options['batch_size'],
+            defer=options['defer_maintenance'],
+            checkpoint=checkpoint,
+            log=self.stdout.write,
+        )
+        try:
+            with open(path, newline='', encoding='utf-8') as source:
+                stats = importer.run(transfer.read_rows(source, fmt))
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Импорт прерван: {error!r}. Повторный '
+                               f'запуск продолжит с контрольной точки.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено: {stats["imported"]}, пропущено: '
+            f'{stats["skipped"]}, за {stats["seconds"]} с'))
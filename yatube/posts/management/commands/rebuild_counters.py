@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_counters()
+        for name, rows in updated.items():
+            self.stdout.write(f'{name}: пересчитано строк {rows}')
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.seed import Seeder, flush
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими постами для нагрузочных замеров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10 ** 4)
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--groups', type=int)
+        parser.add_argument('--comments-per-post', type=int, default=2)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--flush', action='store_true',
+                            help='Сначала удалить прошлые данные замеров.')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            flush()
+        Seeder(
+            options['posts'],
+            users=options['users'],
+            groups=options['groups'],
+            comments_per_post=options['comments_per_post'],
+            follows_per_user=options['follows_per_user'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        ).run()
+        self.stdout.write(self.style.SUCCESS('Данные созданы.'))
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = ('Прогревает кэш: первые страницы главной, группы, профили, '
+            'популярные посты и их миниатюры.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int,
+                            default=settings.WARM_CACHE_PAGES)
+        parser.add_argument('--groups', type=int,
+                            default=settings.WARM_CACHE_GROUPS)
+        parser.add_argument('--profiles', type=int,
+                            default=settings.WARM_CACHE_PROFILES)
+        parser.add_argument('--posts', type=int,
+                            default=settings.WARM_CACHE_POSTS)
+        parser.add_argument('--workers', type=int,
+                            default=settings.WARM_CACHE_WORKERS)
+        parser.add_argument('--host', default=settings.WARM_CACHE_HOST)
+
+    def handle(self, *args, **options):
+        if settings.CACHE_URL.scheme == 'locmem':
+            self.stderr.write(self.style.WARNING(
+                'LocMemCache у каждого процесса свой: команда прогреет '
+                'только собственный кэш. Для воркеров сервера задайте '
+                'общий CACHE_URL или WARM_CACHE_ON_STARTUP=1.'))
+        report = warmup.warm(options['pages'], options['groups'],
+                             options['profiles'], options['posts'],
+                             options['workers'], options['host'],
+                             log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {report["pages"]}, миниатюр: '
+            f'{report["thumbnails"]} за {report["seconds"]} с'))
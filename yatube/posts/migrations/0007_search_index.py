@@ -0,0 +1,159 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:04
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+import django.db.models.deletion
+
+FTS_TABLE = 'posts_post_fts'
+
+# Копия токенизатора из posts.search и posts.stemmer на момент миграции:
+# миграция не должна меняться вместе с кодом приложения.
+WORD = re.compile(r'\w+')
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'(?:(?:ившись|ывшись|ивши|ывши|ив|ыв)'
+    r'|(?<=[ая])(?:вшись|вши|в))$'
+)
+REFLEXIVE = re.compile(r'(?:ся|сь)$')
+ADJECTIVE = (
+    r'(?:ими|ыми|его|ого|ему|ому|ее|ие|ые|ое|ей|ий|ый|ой|ем|им|ым|ом'
+    r'|их|ых|ую|юю|ая|яя|ою|ею)'
+)
+PARTICIPLE = r'(?:ивш|ывш|ующ|(?<=[ая])(?:ем|нн|вш|ющ|щ))'
+ADJECTIVAL = re.compile(rf'{PARTICIPLE}?{ADJECTIVE}$')
+VERB = re.compile(
+    r'(?:(?:ейте|уйте|ила|ыла|ена|ите|или|ыли|ило|ыло|ено|ует|уют|ены'
+    r'|ить|ыть|ишь|ей|уй|ил|ыл|им|ым|ен|ят|ит|ыт|ую|ю)'
+    r'|(?<=[ая])(?:ете|йте|ешь|нно|ла|на|ли|ем|ло|но|ет|ют|ны|ть|й|л|н))$'
+)
+NOUN = re.compile(
+    r'(?:иями|ями|ами|ией|иям|ием|иях|ев|ов|ие|ье|еи|ии|ей|ой|ий|ям|ем'
+    r'|ам|ом|ах|ях|ию|ью|ия|ья|а|е|и|й|о|у|ы|ь|ю|я)$'
+)
+DERIVATIONAL = re.compile(r'(?:ость|ост)$')
+SUPERLATIVE = re.compile(r'(?:ейше|ейш)$')
+
+
+def _regions(word):
+    """Начала областей RV и R2 в слове."""
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS),
+              len(word))
+
+    def after_consonant(start):
+        for i in range(max(start, 1), len(word)):
+            if word[i - 1] in VOWELS and word[i] not in VOWELS:
+                return i + 1
+        return len(word)
+
+    return rv, after_consonant(after_consonant(0))
+
+
+def _strip(pattern, text):
+    stripped = pattern.sub('', text, count=1)
+    return stripped, stripped != text
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    prefix, ending = word[:rv], word[rv:]
+
+    ending, removed = _strip(PERFECTIVE_GERUND, ending)
+    if not removed:
+        ending, _ = _strip(REFLEXIVE, ending)
+        for pattern in (ADJECTIVAL, VERB, NOUN):
+            ending, removed = _strip(pattern, ending)
+            if removed:
+                break
+
+    if ending.endswith('и'):
+        ending = ending[:-1]
+
+    derivational = DERIVATIONAL.search(ending)
+    if derivational and rv + derivational.start() >= r2:
+        ending = ending[:derivational.start()]
+
+    ending, removed = _strip(SUPERLATIVE, ending)
+    if ending.endswith('нн'):
+        ending = ending[:-1]
+    elif not removed and ending.endswith('ь'):
+        ending = ending[:-1]
+    return prefix + ending
+
+
+def terms(text):
+    return [stem(word) for word in WORD.findall(text.lower())
+            if len(word) > 1]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Post = apps.get_model('posts', 'Post')
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS posts_post_text_fts_idx ON posts_post '
+            "USING GIN (to_tsvector('russian'::regconfig, COALESCE(text, '')))"
+        )
+        return
+    if connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(body, '
+                'tokenize="unicode61 remove_diacritics 0")'
+            )
+        except OperationalError:
+            pass
+        else:
+            with connection.cursor() as cursor:
+                for pk, text in Post.objects.values_list('pk', 'text'):
+                    cursor.execute(
+                        f'INSERT INTO {FTS_TABLE} (rowid, body) '
+                        'VALUES (%s, %s)', [pk, ' '.join(terms(text))])
+            return
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for pk, text in Post.objects.values_list('pk', 'text').iterator():
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term[:64], post_id=pk, frequency=frequency)
+            for term, frequency in Counter(terms(text)).items()
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS posts_post_text_fts_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Терм')),
+                ('frequency', models.PositiveIntegerField(default=1, verbose_name='Частота')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Терм поиска',
+                'verbose_name_plural': 'Термы поиска',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
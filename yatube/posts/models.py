@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
 from core.models import CreatedModel
@@ -9,6 +11,8 @@ class Group(models.Model):
     title = models.CharField("Название", max_length=200)
     slug = models.SlugField("Адрес", unique=True)
     description = models.TextField("Описание")
+    posts_count = models.PositiveIntegerField(
+        'Количество постов', default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -35,15 +39,57 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    thumbnail = models.CharField(
+        'Миниатюра', max_length=255, blank=True, editable=False,
+        help_text='Адрес готовой миниатюры картинки'
+    )
+    image_variants = models.TextField(
+        'Варианты картинки', blank=True, editable=False,
+        help_text='JSON: адреса картинки по форматам и ширинам'
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0, editable=False)
+    updated = models.DateTimeField('Дата изменения', auto_now=True,
+                                   db_index=True)
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            # Ленты группы и автора: фильтр и сортировка страницы
+            # читаются из одного индекса, без сортировки в памяти.
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            # Последнее изменение постов группы и автора — валидаторы
+            # условных запросов их страниц.
+            models.Index(fields=['group', 'updated'],
+                         name='post_group_updated_idx'),
+            models.Index(fields=['author', 'updated'],
+                         name='post_author_updated_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def variants(self):
+        try:
+            variants = json.loads(self.image_variants)
+        except ValueError:
+            return {}
+        return variants if isinstance(variants, dict) else {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходную группу, чтобы при смене группы
+        # поправить счётчики постов у обеих групп.
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
@@ -56,6 +102,12 @@ class Comment(models.Model):
     created = models.DateTimeField("Дата публикации коментария",
                                    auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return self.text
 
@@ -79,3 +131,74 @@ class Follow(models.Model):
                 name='check_not_self_follow'
             ),
         ]
+        indexes = [
+            # Подписчики автора (раскладка постов по лентам): индекс
+            # покрывает запрос целиком.
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class UserCounters(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='counters',
+                                verbose_name='Пользователь')
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline',
+                             verbose_name='Читатель')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries',
+                             verbose_name='Пост')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Автор')
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_feed_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+
+class SearchTerm(models.Model):
+    """Обратный индекс поиска: основа слова и посты, где она встречается."""
+    MAX_LENGTH = 64
+
+    term = models.CharField('Терм', max_length=MAX_LENGTH)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='search_terms',
+                             verbose_name='Пост')
+    frequency = models.PositiveIntegerField('Частота', default=1)
+
+    class Meta:
+        verbose_name = 'Терм поиска'
+        verbose_name_plural = 'Термы поиска'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'],
+                                    name='unique_search_term'),
+        ]
@@ -0,0 +1,103 @@
+"""Планы запросов лент: читает ли каждая страница свой индекс.
+
+Для каждого запроса, которым страница читает ленту, ``EXPLAIN``
+показывает, каким индексом он выполняется. Проблемой считается полный
+просмотр таблицы, сортировка в памяти и чужой индекс вместо ожидаемого.
+Планы SQLite и PostgreSQL разбираются по их ключевым словам.
+"""
+import re
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post, TimelineEntry, User
+from core.pagination import CursorPaginator
+
+# SQLite: «USE TEMP B-TREE FOR ORDER BY», PostgreSQL: узел «Sort».
+SORT = re.compile(r'TEMP B-TREE|\bSort\b')
+# SQLite: «SCAN posts_post» без индекса, PostgreSQL: «Seq Scan».
+FULL_SCAN = re.compile(r'\bSCAN \w+\s*$|Seq Scan', re.MULTILINE)
+
+
+class FeedQuery:
+    def __init__(self, name, queryset, index=None):
+        self.name = name
+        self.queryset = queryset
+        self.index = index
+
+    def explain(self):
+        return self.queryset.explain()
+
+
+def first_page(queryset, per_page, ordering=('-pub_date', '-pk')):
+    paginator = CursorPaginator(queryset, per_page, ordering=ordering)
+    return paginator.object_list[:per_page + 1]
+
+
+# На какой странице ленты берётся курсор для «глубокой» страницы.
+DEEP_PAGE = 10
+
+
+def deep_page(queryset, per_page, ordering=('-pub_date', '-pk')):
+    """Страница по курсору из середины ленты.
+
+    Позиция курсора — ключ настоящей записи на ``DEEP_PAGE``-й
+    странице (или последней, если лента короче), а не начало ленты.
+    """
+    paginator = CursorPaginator(queryset, per_page, ordering=ordering)
+    keys = paginator.object_list.values_list(*paginator.fields)
+    position = (keys[DEEP_PAGE * per_page:DEEP_PAGE * per_page + 1].first()
+                or keys.last() or (timezone.now(), 0))
+    return paginator.object_list.filter(
+        paginator._after(position, False))[:per_page + 1]
+
+
+def first_pk(queryset):
+    return queryset.values_list('pk', flat=True).first() or 0
+
+
+def feed_queries():
+    """Запросы страниц лент на самых крупных объектах базы."""
+    per_page = settings.POSTS_PER_PAGE
+    group = first_pk(Group.objects.order_by('-posts_count'))
+    author = first_pk(User.objects.order_by('-counters__posts_count'))
+    reader = first_pk(User.objects.order_by('-counters__following_count'))
+    post = first_pk(Post.objects.order_by('-comments_count'))
+    popular = first_pk(User.objects.order_by('-counters__followers_count'))
+    posts = Post.objects.select_related('author', 'group')
+    return [
+        FeedQuery('index', first_page(posts, per_page)),
+        FeedQuery('group_list', first_page(posts.filter(group=group),
+                                           per_page),
+                  'post_group_pub_date_idx'),
+        FeedQuery('group_list_deep', deep_page(posts.filter(group=group),
+                                               per_page),
+                  'post_group_pub_date_idx'),
+        FeedQuery('profile', first_page(posts.filter(author=author),
+                                        per_page),
+                  'post_author_pub_date_idx'),
+        FeedQuery('profile_deep', deep_page(posts.filter(author=author),
+                                            per_page),
+                  'post_author_pub_date_idx'),
+        FeedQuery('post_comments', first_page(
+            Comment.objects.filter(post=post), settings.COMMENTS_PER_PAGE,
+            ordering=('created', 'pk')), 'comment_post_created_idx'),
+        FeedQuery('follow_index', TimelineEntry.objects.filter(
+            user=reader).order_by('-pub_date', '-post_id')[:per_page + 1],
+            'timeline_user_feed_idx'),
+        FeedQuery('fan_out', Follow.objects.filter(
+            author=popular).values_list('user_id', flat=True),
+            'follow_author_user_idx'),
+    ]
+
+
+def problems(plan, index=None):
+    """Что в плане мешает странице читать ленту по индексу."""
+    found = []
+    if SORT.search(plan):
+        found.append('сортировка в памяти')
+    if FULL_SCAN.search(plan):
+        found.append('полный просмотр таблицы')
+    if index is not None and index not in plan:
+        found.append(f'не используется индекс {index}')
+    return found
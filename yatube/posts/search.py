@@ -0,0 +1,180 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Count, FloatField, Sum, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Post, SearchTerm
+from .stemmer import stem
+
+FTS_TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+
+
+# Словарь живого текста невелик, а стемминг — самая дорогая часть
+# индексации, поэтому основы слов кэшируются.
+cached_stem = lru_cache(maxsize=100000)(stem)
+
+
+def terms(text):
+    """Нормализованные термы текста: слова, приведённые к основе."""
+    return [cached_stem(word) for word in WORD.findall(text.lower())
+            if len(word) > 1]
+
+
+class InvertedIndexBackend:
+    """Обратный индекс в обычной таблице: терм → посты с частотой."""
+
+    def index(self, post):
+        self.index_many([post])
+
+    def index_many(self, posts):
+        SearchTerm.objects.filter(
+            post__in=[post.pk for post in posts]).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term[:SearchTerm.MAX_LENGTH], post=post,
+                       frequency=frequency)
+            for post in posts
+            for term, frequency in Counter(terms(post.text)).items()
+        )
+
+    def remove(self, post_id):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+    def search(self, query):
+        query_terms = {term[:SearchTerm.MAX_LENGTH] for term in terms(query)}
+        return (Post.objects.filter(search_terms__term__in=query_terms)
+                .annotate(matched=Count('search_terms'),
+                          score=Sum('search_terms__frequency'))
+                .filter(matched=len(query_terms)))
+
+    def filter(self, queryset, query):
+        return queryset.filter(pk__in=self.search(query).values('pk'))
+
+    def rebuild(self):
+        SearchTerm.objects.all().delete()
+        for post in Post.objects.only('text').iterator():
+            self.index(post)
+
+
+class SQLiteFTSBackend:
+    """Полнотекстовый индекс FTS5 с ранжированием по BM25."""
+
+    def index(self, post):
+        self.index_many([post])
+
+    def index_many(self, posts):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                               [(post.pk,) for post in posts])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [(post.pk, ' '.join(terms(post.text))) for post in posts])
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [post_id])
+
+    def search(self, query):
+        # Оценка — коррелированный подзапрос к posts_post, поэтому такой
+        # queryset нельзя вкладывать в другой запрос; для этого filter().
+        match = self._match(query)
+        return self.filter(Post.objects.all(), query).annotate(score=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = posts_post.id',
+            [match],
+        ))
+
+    def filter(self, queryset, query):
+        # pk__in=RawSQL(...) даёт «IN ((SELECT ...))», а SQLite читает
+        # такую запись как скаляр и оставляет только первую строку.
+        return queryset.extra(
+            where=[f'posts_post.id IN (SELECT rowid FROM {FTS_TABLE} '
+                   f'WHERE {FTS_TABLE} MATCH %s)'],
+            params=[self._match(query)],
+        )
+
+    def _match(self, query):
+        return ' '.join(f'"{term}"' for term in terms(query))
+
+    def rebuild(self):
+        posts = Post.objects.values_list('pk', 'text').iterator()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                ((pk, ' '.join(terms(text))) for pk, text in posts))
+
+
+class PostgresBackend:
+    """tsvector с русской морфологией; индекс GIN по выражению."""
+
+    def index(self, post):
+        pass
+
+    def index_many(self, posts):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def search(self, query):
+        from django.contrib.postgres.search import SearchRank
+        vector, search_query = self._vector_and_query(query)
+        return self.filter(Post.objects.all(), query).annotate(
+            score=SearchRank(vector, search_query))
+
+    def filter(self, queryset, query):
+        vector, search_query = self._vector_and_query(query)
+        return (queryset.annotate(document=vector)
+                .filter(document=search_query))
+
+    def _vector_and_query(self, query):
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+        return (SearchVector('text', config='russian'),
+                SearchQuery(query, config='russian'))
+
+    def rebuild(self):
+        pass
+
+
+def fts5_available():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+_backend = None
+
+
+def get_backend():
+    """Лучший доступный бэкенд поиска для текущей базы."""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = PostgresBackend()
+        elif connection.vendor == 'sqlite' and fts5_available():
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = InvertedIndexBackend()
+    return _backend
+
+
+def search_posts(query):
+    """Посты по запросу с оценкой релевантности ``score``."""
+    if not terms(query):
+        return Post.objects.none().annotate(
+            score=Value(0, output_field=FloatField()))
+    return get_backend().search(query)
+
+
+def filter_posts(queryset, query):
+    """Сужает queryset постов до найденных по запросу, без оценки."""
+    if not terms(query):
+        return queryset.none()
+    return get_backend().filter(queryset, query)
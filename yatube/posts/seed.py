@@ -0,0 +1,155 @@
+"""Синтетические данные для нагрузочных замеров.
+
+Посты, подписки и комментарии вставляются через ``bulk_create``
+пачками, а сигналы при этом не срабатывают, поэтому счётчики, ленты
+и поисковый индекс в конце перестраиваются целиком.
+"""
+import datetime
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from faker import Faker
+
+from .bulk import batches, explicit_dates, rebuild_derived
+from .models import Comment, Follow, Group, Post, User
+
+PREFIX = 'bench_'
+TEXT_POOL_SIZE = 500
+
+
+def zipf_weights(size, exponent=1.1):
+    """Накопленные веса: первые элементы популярнее остальных."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** exponent for rank in range(size)))
+
+
+def flush():
+    """Удаляет ранее сгенерированные данные."""
+    User.objects.filter(username__startswith=PREFIX).delete()
+    Group.objects.filter(slug__startswith=PREFIX).delete()
+
+
+class Seeder:
+    """Генератор набора данных заданного масштаба.
+
+    Авторы постов и подписок выбираются по закону Ципфа: у немногих
+    авторов большинство постов и подписчиков. Большая часть
+    комментариев приходится на «горячие» посты. Повторный запуск без
+    ``flush()`` добавляет посты к уже созданным пользователям и группам.
+    """
+
+    def __init__(self, posts, users=None, groups=None,
+                 comments_per_post=2, follows_per_user=10, seed=0,
+                 log=None):
+        self.posts = posts
+        self.users = users or max(10, posts // 20)
+        self.groups = groups or max(5, posts // 1000)
+        self.comments = posts * comments_per_post
+        self.follows_per_user = follows_per_user
+        self.random = random.Random(seed)
+        self.log = log or (lambda message: None)
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        self.texts = [fake.paragraph() for _ in range(TEXT_POOL_SIZE)]
+        self.sentences = [fake.sentence() for _ in range(TEXT_POOL_SIZE)]
+        self.now = timezone.now()
+
+    def run(self):
+        with transaction.atomic():
+            user_ids = self.create_users()
+            group_ids = self.create_groups()
+            self.create_follows(user_ids)
+            post_ids = self.create_posts(user_ids, group_ids)
+            self.create_comments(user_ids, post_ids)
+        self.log('Пересчёт счётчиков, лент и поискового индекса')
+        rebuild_derived()
+
+    def date(self):
+        return self.now - datetime.timedelta(
+            seconds=self.random.randrange(365 * 24 * 3600))
+
+    def _inserted_ids(self, queryset):
+        return list(queryset.order_by('pk').values_list('pk', flat=True))
+
+    def create_users(self):
+        self.log(f'Пользователи: {self.users}')
+        password = make_password(None)
+        for batch in batches(
+                User(username=f'{PREFIX}user_{number}', password=password)
+                for number in range(self.users)):
+            User.objects.bulk_create(batch, ignore_conflicts=True)
+        return self._inserted_ids(
+            User.objects.filter(username__startswith=f'{PREFIX}user_'))
+
+    def create_groups(self):
+        self.log(f'Группы: {self.groups}')
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {number}', slug=f'{PREFIX}group-{number}',
+                   description=self.random.choice(self.sentences))
+             for number in range(self.groups)),
+            ignore_conflicts=True,
+        )
+        return self._inserted_ids(
+            Group.objects.filter(slug__startswith=PREFIX))
+
+    def create_follows(self, user_ids):
+        weights = zipf_weights(len(user_ids))
+        total = 0
+        for batch in batches(self._follows(user_ids, weights)):
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        self.log(f'Подписки: {total}')
+
+    def _follows(self, user_ids, weights):
+        for user_id in user_ids:
+            count = min(len(user_ids) - 1, int(
+                self.random.paretovariate(1.5) * self.follows_per_user / 3))
+            authors = set(self.random.choices(user_ids, cum_weights=weights,
+                                              k=count))
+            authors.discard(user_id)
+            for author_id in authors:
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    def create_posts(self, user_ids, group_ids):
+        self.log(f'Посты: {self.posts}')
+        weights = zipf_weights(len(user_ids))
+        posts = (
+            Post(text=self.random.choice(self.texts),
+                 author_id=self.random.choices(user_ids,
+                                               cum_weights=weights)[0],
+                 group_id=(self.random.choice(group_ids)
+                           if self.random.random() < 0.7 else None),
+                 pub_date=self.date())
+            for _ in range(self.posts)
+        )
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            for batch in batches(posts):
+                Post.objects.bulk_create(batch)
+        # Обычно ключи идут подряд, и вместо списка из 10^7 ключей
+        # хватает диапазона; с пропусками берём сами ключи.
+        seeded = Post.objects.filter(author__username__startswith=PREFIX)
+        bounds = seeded.aggregate(first=Min('pk'), last=Max('pk'),
+                                  total=Count('pk'))
+        if bounds['total'] == bounds['last'] - bounds['first'] + 1:
+            return range(bounds['first'], bounds['last'] + 1)
+        return self._inserted_ids(seeded)
+
+    def create_comments(self, user_ids, post_ids):
+        self.log(f'Комментарии: {self.comments}')
+        hot = self.random.sample(post_ids, max(1, len(post_ids) // 100))
+        comments = (
+            Comment(post_id=(self.random.choice(hot)
+                             if self.random.random() < 0.8
+                             else self.random.choice(post_ids)),
+                    author_id=self.random.choice(user_ids),
+                    text=self.random.choice(self.sentences),
+                    created=self.date())
+            for _ in range(self.comments)
+        )
+        with explicit_dates(Comment._meta.get_field('created')):
+            for batch in batches(comments):
+                Comment.objects.bulk_create(batch)
@@ -0,0 +1,166 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, timeline
+from .search import get_backend
+from .cache import bump_feed_generation, post_tags
+from .cards import bump_cards
+from .models import Comment, Follow, Group, Post, User, UserCounters
+from core.pagecache import purge
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feed_cache(sender, **kwargs):
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    tags = ['index', *post_tags(instance)]
+    # Прежняя группа поста: обработчик стоит раньше count_saved_post,
+    # который запоминает новую.
+    old_group_id = getattr(instance, '_loaded_group_id', None)
+    if old_group_id is not None:
+        tags.append(f'group:{old_group_id}')
+    purge(*tags)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, **kwargs):
+    purge(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def purge_follow_pages(sender, instance, **kwargs):
+    # Число подписчиков и подписок выводится в профилях обоих.
+    purge(f'author:{instance.author_id}', f'author:{instance.user_id}')
+
+
+# Поля, которые выводятся в карточках постов.
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+def card_fields_saved(instance, update_fields, raw):
+    # Вход сохраняет только last_login: карточки от этого не меняются.
+    return (not raw and instance.pk is not None
+            and (update_fields is None
+                 or CARD_USER_FIELDS & set(update_fields)))
+
+
+@receiver(pre_save, sender=User)
+def remember_user_names(sender, instance, update_fields=None, raw=False,
+                        **kwargs):
+    # Имена из базы до сохранения: пароль и права карточек не меняют.
+    if card_fields_saved(instance, update_fields, raw):
+        instance._saved_names = (User.objects.filter(pk=instance.pk)
+                                 .values(*CARD_USER_FIELDS).first())
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_cards(sender, instance, created, update_fields=None,
+                          raw=False, **kwargs):
+    if created or not card_fields_saved(instance, update_fields, raw):
+        return
+    saved = instance.__dict__.pop('_saved_names', None)
+    if saved is None or any(getattr(instance, field) != value
+                            for field, value in saved.items()):
+        bump_cards()
+        purge(f'author:{instance.pk}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    bump_cards()
+    purge(f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_user(instance.author_id, 'posts_count', 1)
+    else:
+        old_group_id = getattr(instance, '_loaded_group_id', None)
+        if old_group_id == instance.group_id:
+            return
+        if old_group_id is not None:
+            counters.change(Group.objects.filter(pk=old_group_id),
+                            'posts_count', -1)
+    if instance.group_id is not None:
+        counters.change(Group.objects.filter(pk=instance.group_id),
+                        'posts_count', 1)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'posts_count', -1)
+    if instance.group_id is not None:
+        counters.change(Group.objects.filter(pk=instance.group_id),
+                        'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(Post.objects.filter(pk=instance.post_id),
+                        'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change(Post.objects.filter(pk=instance.post_id),
+                    'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user(instance.author_id, 'followers_count', 1)
+        counters.change_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'followers_count', -1)
+    counters.change_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    timeline.trim(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove(instance.pk)
@@ -0,0 +1,74 @@
+"""Стеммер Портера (Snowball) для русского языка."""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'(?:(?:ившись|ывшись|ивши|ывши|ив|ыв)'
+    r'|(?<=[ая])(?:вшись|вши|в))$'
+)
+REFLEXIVE = re.compile(r'(?:ся|сь)$')
+ADJECTIVE = (
+    r'(?:ими|ыми|его|ого|ему|ому|ее|ие|ые|ое|ей|ий|ый|ой|ем|им|ым|ом'
+    r'|их|ых|ую|юю|ая|яя|ою|ею)'
+)
+PARTICIPLE = r'(?:ивш|ывш|ующ|(?<=[ая])(?:ем|нн|вш|ющ|щ))'
+ADJECTIVAL = re.compile(rf'{PARTICIPLE}?{ADJECTIVE}$')
+VERB = re.compile(
+    r'(?:(?:ейте|уйте|ила|ыла|ена|ите|или|ыли|ило|ыло|ено|ует|уют|ены'
+    r'|ить|ыть|ишь|ей|уй|ил|ыл|им|ым|ен|ят|ит|ыт|ую|ю)'
+    r'|(?<=[ая])(?:ете|йте|ешь|нно|ла|на|ли|ем|ло|но|ет|ют|ны|ть|й|л|н))$'
+)
+NOUN = re.compile(
+    r'(?:иями|ями|ами|ией|иям|ием|иях|ев|ов|ие|ье|еи|ии|ей|ой|ий|ям|ем'
+    r'|ам|ом|ах|ях|ию|ью|ия|ья|а|е|и|й|о|у|ы|ь|ю|я)$'
+)
+DERIVATIONAL = re.compile(r'(?:ость|ост)$')
+SUPERLATIVE = re.compile(r'(?:ейше|ейш)$')
+
+
+def _regions(word):
+    """Начала областей RV и R2 в слове."""
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS),
+              len(word))
+
+    def after_consonant(start):
+        for i in range(max(start, 1), len(word)):
+            if word[i - 1] in VOWELS and word[i] not in VOWELS:
+                return i + 1
+        return len(word)
+
+    return rv, after_consonant(after_consonant(0))
+
+
+def _strip(pattern, text):
+    stripped = pattern.sub('', text, count=1)
+    return stripped, stripped != text
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    prefix, ending = word[:rv], word[rv:]
+
+    ending, removed = _strip(PERFECTIVE_GERUND, ending)
+    if not removed:
+        ending, _ = _strip(REFLEXIVE, ending)
+        for pattern in (ADJECTIVAL, VERB, NOUN):
+            ending, removed = _strip(pattern, ending)
+            if removed:
+                break
+
+    if ending.endswith('и'):
+        ending = ending[:-1]
+
+    derivational = DERIVATIONAL.search(ending)
+    if derivational and rv + derivational.start() >= r2:
+        ending = ending[:derivational.start()]
+
+    ending, removed = _strip(SUPERLATIVE, ending)
+    if ending.endswith('нн'):
+        ending = ending[:-1]
+    elif not removed and ending.endswith('ь'):
+        ending = ending[:-1]
+    return prefix + ending
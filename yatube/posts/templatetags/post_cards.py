@@ -0,0 +1,14 @@
+from django import template
+
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, author_link=True, group_link=True):
+    """Карточки постов страницы из кэша.
+
+    ``{% post_cards page_obj as cards %}``, затем цикл по ``cards``.
+    """
+    return render_cards(posts, author_link, group_link)
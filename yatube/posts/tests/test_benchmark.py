@@ -0,0 +1,81 @@
+from django.db.models.signals import post_save
+from django.test import TestCase
+from posts import benchmark, timeline
+from posts.models import Comment, Follow, Post, TimelineEntry, User
+from posts.search import search_posts
+from posts.seed import Seeder, flush
+
+
+class SeedTest(TestCase):
+    def test_seed_builds_consistent_dataset(self):
+        """Сид создаёт данные и перестраивает счётчики, ленты и индекс."""
+        Seeder(100, users=20, groups=3, seed=1).run()
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 200)
+        author = User.objects.order_by('-counters__posts_count').first()
+        self.assertEqual(author.counters.posts_count, author.posts.count())
+        follow = Follow.objects.first()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user_id=follow.user_id, author_id=follow.author_id).exists())
+        word = Post.objects.first().text.split()[0]
+        self.assertTrue(search_posts(word).exists())
+        Seeder(10, users=20, groups=3, seed=2).run()
+        self.assertEqual(Post.objects.count(), 110)
+        self.assertEqual(User.objects.count(), 20)
+        flush()
+        self.assertFalse(Post.objects.exists())
+
+    def test_timeline_rebuild_matches_fan_out(self):
+        """Пересборка лент даёт те же записи, что и сигналы."""
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=reader, author=author)
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=author)
+        before = set(TimelineEntry.objects.values_list('user', 'post'))
+        timeline.rebuild()
+        after = set(TimelineEntry.objects.values_list('user', 'post'))
+        self.assertEqual(before, after)
+
+
+class BenchmarkTest(TestCase):
+    def test_run_covers_all_scenarios(self):
+        Seeder(30, users=10, groups=2).run()
+        result = benchmark.run(iterations=2, warmup=1)
+        self.assertEqual(set(result['results']), {
+            'index', 'group_list', 'index_deep', 'profile', 'post_detail',
+            'follow_index', 'search', 'post_create', 'add_comment',
+            'profile_follow', 'profile_unfollow', 'api_posts',
+            'api_post_batch',
+        })
+        self.assertEqual(result['dataset']['posts'], 30)
+        self.assertFalse(Comment.objects.filter(
+            author__username=benchmark.WRITER).exists())
+        self.assertFalse(Follow.objects.filter(
+            user__username=benchmark.WRITER).exists())
+        # Страницы не отдаются из кэша целых страниц.
+        self.assertGreater(result['results']['index']['queries'], 0)
+        self.assertEqual(benchmark.compare(result, result), [])
+
+    def test_every_follow_request_changes_state(self):
+        """Подписка в каждом повторе создаётся заново, а не повторяется."""
+        Seeder(30, users=10, groups=2).run()
+        follows = []
+
+        def record(sender, instance, created, **kwargs):
+            if created:
+                follows.append(instance)
+        post_save.connect(record, sender=Follow)
+        try:
+            benchmark.run(iterations=3, warmup=0, only={'profile_follow'})
+        finally:
+            post_save.disconnect(record, sender=Follow)
+        self.assertEqual(len(follows), 3)
+
+    def test_compare_reports_regressions(self):
+        baseline = {'results': {'index': {
+            'p50_ms': 10, 'p99_ms': 20, 'queries': 2}}}
+        current = {'results': {'index': {
+            'p50_ms': 11, 'p99_ms': 40, 'queries': 3}}}
+        regressions = benchmark.compare(current, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.cards import TEMPLATE
+from posts.models import Group, Post, User
+
+
+class PostCardsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.posts = [Post.objects.create(text=f'Пост {number}',
+                                         author=cls.user, group=cls.group)
+                     for number in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:group_list', args=('group',))
+
+    def rendered_cards(self, response):
+        return [template.name for template in response.templates].count(
+            TEMPLATE)
+
+    def test_cards_are_rendered_once(self):
+        """Повторная страница берёт все карточки из кэша."""
+        first = self.client.get(self.url)
+        self.assertEqual(self.rendered_cards(first), 3)
+        second = self.client.get(self.url)
+        self.assertEqual(self.rendered_cards(second), 0)
+        self.assertEqual(second.content, first.content)
+
+    def test_edit_invalidates_only_its_card(self):
+        self.client.get(self.url)
+        post = self.posts[1]
+        self.client.post(reverse('posts:post_edit', args=(post.pk,)),
+                         {'text': 'Исправленный пост', 'group': self.group.pk})
+        response = self.client.get(self.url)
+        self.assertEqual(self.rendered_cards(response), 1)
+        self.assertContains(response, 'Исправленный пост')
+
+    def test_author_rename_invalidates_cards(self):
+        self.client.get(self.url)
+        self.user.last_login = None
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.rendered_cards(self.client.get(self.url)), 0)
+        author = User.objects.get(pk=self.user.pk)
+        author.is_staff = True
+        author.save()
+        User.objects.create_user(username='newcomer')
+        self.assertEqual(self.rendered_cards(self.client.get(self.url)), 0)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(self.rendered_cards(response), 3)
+        self.assertContains(response, 'Лев')
+
+    def test_variants_are_cached_separately(self):
+        """На странице группы нет ссылки на группу, в профиле — на автора."""
+        group_page = self.client.get(self.url)
+        profile = self.client.get(reverse('posts:profile',
+                                          args=('author',)))
+        self.assertEqual(self.rendered_cards(profile), 3)
+        self.assertNotContains(group_page, 'все записи группы')
+        self.assertNotContains(profile, 'все посты пользователя')
+        self.assertContains(profile, 'все записи группы', count=3)
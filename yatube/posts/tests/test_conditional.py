@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def assertChanges(self, url, change):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_detail_depends_on_post_and_comments(self):
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.assertChanges(url, lambda: Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'))
+
+        def edit():
+            self.post.text = 'Исправленный пост'
+            self.post.save()
+        self.assertChanges(url, edit)
+
+    def test_post_detail_depends_on_names(self):
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   group=self.group)
+        url = reverse('posts:post_detail', args=(post.pk,))
+
+        def rename_author():
+            self.author.first_name = 'Лев'
+            self.author.save()
+        self.assertChanges(url, rename_author)
+
+        def rename_group():
+            self.group.title = 'Новая группа'
+            self.group.save()
+        self.assertChanges(url, rename_group)
+
+    def test_profile_depends_on_follow_state(self):
+        """Подписка меняет страницу профиля для подписчика."""
+        self.client.force_login(self.reader)
+        url = reverse('posts:profile', args=('author',))
+        self.assertChanges(url, lambda: Follow.objects.create(
+            user=self.reader, author=self.author))
+
+    def test_group_depends_on_its_posts(self):
+        url = reverse('posts:group_list', args=('group',))
+
+        def move():
+            self.post.group = None
+            self.post.save()
+        self.assertChanges(url, move)
+
+    def test_group_depends_on_names(self):
+        """Название, описание группы и имена авторов есть на странице."""
+        url = reverse('posts:group_list', args=('group',))
+
+        def describe():
+            self.group.description = 'Новое описание'
+            self.group.save()
+        self.assertChanges(url, describe)
+
+        def rename_author():
+            self.author.last_name = 'Толстой'
+            self.author.save()
+        self.assertChanges(url, rename_author)
+
+    def test_index_depends_on_feed_version(self):
+        url = reverse('posts:index')
+        self.assertChanges(url, lambda: Post.objects.create(
+            text='Новый пост', author=self.author))
+
+    def test_etag_varies_by_user(self):
+        url = reverse('posts:index')
+        anonymous = self.client.get(url)['ETag']
+        self.client.force_login(self.reader)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_objects_still_404(self):
+        response = self.client.get(reverse('posts:profile',
+                                           args=('nobody',)))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User, UserCounters
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Счётчики постов автора и группы следуют за постами."""
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   group=self.group)
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.counters(self.author).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        """Комментарии и подписки меняют счётчики через views."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.client.post(reverse('posts:add_comment', args=(post.pk,)),
+                         {'text': 'Комментарий'})
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        self.client.get(reverse('posts:profile_follow',
+                                args=(self.author.username,)))
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        self.client.get(reverse('posts:profile_unfollow',
+                                args=(self.author.username,)))
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 0)
+
+    def test_rebuild_counters_fixes_drift(self):
+        """Команда rebuild_counters восстанавливает точные значения."""
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   group=self.group)
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.reader, text='Комментарий')
+            for _ in range(3)
+        )
+        Follow.objects.bulk_create([Follow(user=self.reader,
+                                           author=self.author)])
+        UserCounters.objects.filter(user=self.author).update(posts_count=42)
+        call_command('rebuild_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 3)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+
+    def test_pages_run_no_count_queries(self):
+        """Профиль и страница поста не выполняют COUNT."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        urls = (
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, 'Всего постов')
+                self.assertFalse(any(
+                    'COUNT(' in query['sql'] and '"posts_' in query['sql']
+                    for query in queries.captured_queries
+                ))
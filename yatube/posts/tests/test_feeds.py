@@ -0,0 +1,104 @@
+import json
+from xml.etree import ElementTree
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.feeds import follow_feed_token
+from posts.models import Follow, Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Пост <с разметкой> & знаками',
+                                       author=cls.author, group=cls.group)
+
+    def setUp(self):
+        self.client = Client()
+
+    def body(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_formats(self):
+        """Лента отдаётся потоком в Atom, RSS и JSON Feed."""
+        url = reverse('posts:group_feed', args=('group', 'atom'))
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        root = ElementTree.fromstring(self.body(response))
+        self.assertEqual(root.find(f'{ATOM}entry/{ATOM}content').text,
+                         self.post.text)
+        rss = self.client.get(reverse('posts:index_feed', args=('rss',)))
+        channel = ElementTree.fromstring(self.body(rss)).find('channel')
+        self.assertEqual(len(channel.findall('item')), 1)
+        feed = json.loads(self.body(self.client.get(
+            reverse('posts:profile_feed', args=('author', 'json')))))
+        self.assertEqual(feed['items'][0]['content_text'], self.post.text)
+
+    def test_conditional_get(self):
+        """Повторный запрос с валидаторами получает 304 одним запросом."""
+        url = reverse('posts:index_feed', args=('atom',))
+        response = self.client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.author)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
+
+    def test_etag_changes_when_post_is_deleted(self):
+        url = reverse('posts:group_feed', args=('group', 'json'))
+        older = Post.objects.create(text='Старый', author=self.author,
+                                    group=self.group)
+        etag = self.client.get(url)['ETag']
+        older.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_when_names_change(self):
+        """Лента показывает имя автора и название группы."""
+        url = reverse('posts:group_feed', args=('group', 'atom'))
+        author = User.objects.get(pk=self.author.pk)
+        group = Group.objects.get(pk=self.group.pk)
+        for obj, field, value in ((author, 'first_name', 'Лев'),
+                                  (group, 'title', 'Новая группа')):
+            with self.subTest(field=field):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                setattr(obj, field, value)
+                obj.save()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(value, self.body(response))
+
+    def test_follow_feed_requires_valid_token(self):
+        """Лента подписок доступна по подписанному токену."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        token = follow_feed_token(self.reader)
+        feed = json.loads(self.body(self.client.get(
+            reverse('posts:follow_feed', args=(token, 'json')))))
+        self.assertEqual([item['id'] for item in feed['items']],
+                         [str(self.post.pk)])
+        forged = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        response = self.client.get(
+            reverse('posts:follow_feed', args=(forged, 'json')))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_page_shows_private_feed(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, reverse(
+            'posts:follow_feed', args=(follow_feed_token(self.reader),
+                                       'atom')))
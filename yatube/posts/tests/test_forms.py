@@ -1,12 +1,16 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 from posts.models import User, Group, Post, Comment
 from ..forms import PostForm
+from ..thumbnails import generate_thumbnail
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -135,3 +139,79 @@ class PostFormTests(TestCase):
             follow=True
         )
         self.assertEqual(Comment.objects.count(), comments_count)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostThumbnailTests(TestCase):
+    SMALL_GIF = (
+        b'\x47\x49\x46\x38\x39\x61\x02\x00'
+        b'\x01\x00\x80\x00\x00\x00\x00\x00'
+        b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+        b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+        b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+        b'\x0A\x00\x3B'
+    )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Test')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def create_post(self, image=None):
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': image or SimpleUploadedFile(
+                    'small.gif', self.SMALL_GIF, content_type='image/gif'),
+            },
+        )
+        return Post.objects.get(text='Пост с картинкой')
+
+    def test_pending_thumbnail_renders_placeholder(self):
+        """Пока миниатюра не готова, в ленте заглушка."""
+        post = self.create_post()
+        self.assertTrue(post.image)
+        self.assertEqual(post.thumbnail, '')
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Картинка обрабатывается')
+
+    def test_generated_thumbnail_is_rendered(self):
+        """Готовая миниатюра выводится по сохранённому адресу."""
+        post = self.create_post()
+        generate_thumbnail(post.pk)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, f'src="{post.thumbnail}"')
+
+    def test_generated_variants_are_rendered_in_srcset(self):
+        """Для каждой ширины готов JPEG-вариант и он есть в srcset."""
+        buffer = BytesIO()
+        Image.new('RGB', (1000, 600)).save(buffer, 'PNG')
+        post = self.create_post(SimpleUploadedFile(
+            'wide.png', buffer.getvalue(), content_type='image/png'))
+        generate_thumbnail(post.pk)
+        post.refresh_from_db()
+        jpeg = post.variants['image/jpeg']
+        self.assertEqual(sorted(map(int, jpeg)), [
+            width for width in sorted(settings.POST_IMAGE_WIDTHS)
+            if width <= 1000])
+        response = self.authorized_client.get(reverse('posts:index'))
+        for width, url in jpeg.items():
+            with self.subTest(width=width):
+                self.assertContains(response, f'{url} {width}w')
+
+    def test_small_image_is_not_upscaled(self):
+        """Узкая картинка получает только самый узкий вариант."""
+        post = self.create_post()
+        generate_thumbnail(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(list(map(int, post.variants['image/jpeg'])),
+                         [min(settings.POST_IMAGE_WIDTHS)])
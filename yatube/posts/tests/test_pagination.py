@@ -1,6 +1,9 @@
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from core.pagination import LightPaginator
 from posts.models import Group, Post, User
 from yatube.settings import POSTS_PER_PAGE
 
@@ -74,3 +77,117 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(reverse_name=reverse_name):
                 response = self.authorized_client.get(reverse_name)
                 self.assertIn(response.context['page_obj'][0].text, post.text)
+
+    def test_cursor_pages_cover_feed_without_gaps(self):
+        """Курсорные страницы проходят ленту целиком и обратно."""
+        url = reverse('posts:index')
+        response = self.authorized_client.get(url)
+        first_page = list(response.context['page_obj'])
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertIsNotNone(next_cursor)
+        response = self.authorized_client.get(url, {'cursor': next_cursor})
+        second_page = list(response.context['page_obj'])
+        self.assertEqual(
+            first_page + second_page,
+            list(Post.objects.order_by('-pub_date', '-pk')),
+        )
+        self.assertIsNone(response.context['page_obj'].next_cursor)
+        previous_cursor = response.context['page_obj'].previous_cursor
+        response = self.authorized_client.get(url,
+                                              {'cursor': previous_cursor})
+        self.assertEqual(list(response.context['page_obj']), first_page)
+
+    def test_cursor_page_runs_no_count_query(self):
+        """Курсорная страница не считает записи через COUNT."""
+        page = self.authorized_client.get(
+            reverse('posts:index')).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(reverse('posts:index'),
+                                       {'cursor': page.next_cursor})
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] and '"posts_post"' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.authorized_client.get(reverse('posts:index'),
+                                              {'cursor': 'не-курсор'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), POSTS_PER_PAGE)
+
+    def test_index_cache_varies_on_page(self):
+        """Каждая страница index кэшируется отдельно."""
+        url = reverse('posts:index')
+        first = self.authorized_client.get(url).content
+        second = self.authorized_client.get(url, {'page': 2}).content
+        self.assertNotEqual(first, second)
+
+
+class LightPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.user, group=cls.group)
+            for number in range(13))
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def paginator(self, **kwargs):
+        return LightPaginator(Post.objects.order_by('-pub_date', '-pk'), 1,
+                              **kwargs)
+
+    @override_settings(PAGINATOR_WINDOW=2)
+    def test_page_window(self):
+        """Ссылки — окно вокруг текущей страницы и края ленты."""
+        paginator = self.paginator()
+        self.assertEqual(list(paginator.page_window(7)),
+                         [1, None, 5, 6, 7, 8, 9, None, 13])
+        self.assertEqual(list(paginator.page_window(2)),
+                         [1, 2, 3, 4, None, 13])
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=100)
+    def test_large_estimate_replaces_count(self):
+        paginator = self.paginator(estimate=lambda: 500)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.num_pages, 500)
+        self.assertTrue(paginator.count_is_estimated)
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=100)
+    def test_small_estimate_is_checked(self):
+        """Небольшая оценка перепроверяется точным COUNT."""
+        paginator = self.paginator(estimate=0)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 13)
+        self.assertFalse(paginator.count_is_estimated)
+
+    def test_has_next_only(self):
+        """В режиме «есть ли следующая» строки не считаются."""
+        paginator = LightPaginator(Post.objects.order_by('-pub_date', '-pk'),
+                                   10, has_next_only=True)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(1)
+            self.assertTrue(page.has_next())
+        with self.assertNumQueries(1):
+            page = paginator.get_page(2)
+            self.assertEqual(len(page), 3)
+            self.assertFalse(page.has_next())
+            self.assertEqual(page.end_index(), 13)
+        self.assertEqual(list(paginator.page_window(2)), [1, 2])
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=10, PAGINATOR_WINDOW=1)
+    def test_group_page_uses_posts_counter(self):
+        """Страница группы берёт число постов из счётчика группы."""
+        Group.objects.filter(pk=self.group.pk).update(posts_count=1000)
+        url = reverse('posts:group_list', args=('group',))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page': 50})
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries.captured_queries))
+        self.assertEqual(response.context['page_obj'].page_window,
+                         [1, None, 49, 50, 51, None, 100])
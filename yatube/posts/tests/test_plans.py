@@ -0,0 +1,37 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from posts.models import Post, User
+from posts.plans import DEEP_PAGE, deep_page, problems
+
+
+class FeedPlansTest(TestCase):
+    def test_feed_queries_use_their_indexes(self):
+        """Каждая лента читается своим индексом без сортировки."""
+        output = StringIO()
+        call_command('explain_feeds', check=True, stdout=output)
+        self.assertIn('post_group_pub_date_idx', output.getvalue())
+
+    def test_deep_page_starts_inside_the_feed(self):
+        """Курсор глубокой страницы стоит на настоящей записи ленты."""
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author)
+            for number in range(DEEP_PAGE * 2 + 5))
+        ordered = list(Post.objects.order_by('-pub_date', '-pk'))
+        self.assertEqual(list(deep_page(Post.objects.all(), 2)),
+                         ordered[DEEP_PAGE * 2 + 1:DEEP_PAGE * 2 + 4])
+
+    def test_problems(self):
+        plan = Post.objects.filter(group=1).order_by('text').explain()
+        self.assertIn('сортировка в памяти', problems(plan))
+        self.assertEqual(
+            problems('SCAN posts_post', 'post_group_pub_date_idx'),
+            ['полный просмотр таблицы',
+             'не используется индекс post_group_pub_date_idx'])
+        self.assertEqual(problems(
+            '->  Index Scan using post_author_pub_date_idx on posts_post',
+            'post_author_pub_date_idx'), [])
+        self.assertIn('сортировка в памяти', problems(
+            'Limit\n  ->  Sort\n        ->  Seq Scan on posts_post'))
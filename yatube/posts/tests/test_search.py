@@ -0,0 +1,89 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, User
+from posts.search import InvertedIndexBackend, filter_posts, search_posts
+from posts.stemmer import stem
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова приводятся к общей основе."""
+        for forms in (('тестовый', 'тестовые', 'тестового'),
+                      ('котики', 'котиков', 'котик'),
+                      ('писали', 'писать', 'писал')):
+            with self.subTest(forms=forms):
+                stems = {stem(word) for word in forms}
+                self.assertEqual(len(stems), 1)
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query, **params):
+        return self.client.get(reverse('posts:search'),
+                               {'q': query, **params}).context['page_obj']
+
+    def test_finds_other_word_forms(self):
+        """Поиск находит пост по другой форме слова."""
+        post = Post.objects.create(text='Тестовый пост про котиков',
+                                   author=self.user)
+        Post.objects.create(text='Совсем о другом', author=self.user)
+        self.assertEqual(list(self.search('тестовые котики')), [post])
+
+    def test_more_relevant_posts_first(self):
+        """Пост с большим числом совпадений выше в выдаче."""
+        rare = Post.objects.create(text='Котик спит', author=self.user)
+        often = Post.objects.create(text='Котик, котики и снова котики',
+                                    author=self.user)
+        self.assertEqual(list(self.search('котик')), [often, rare])
+
+    def test_results_are_paginated_by_cursor(self):
+        """Выдача листается курсором без потерь и повторов."""
+        posts = [Post.objects.create(text=f'Кот номер {i}', author=self.user)
+                 for i in range(13)]
+        first = self.search('кот')
+        second = self.search('кот', cursor=first.next_cursor)
+        found = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(sorted(found), sorted(post.pk for post in posts))
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.create(text='Собака', author=self.user)
+        post.text = 'Кошка'
+        post.save()
+        self.assertFalse(search_posts('собака').exists())
+        self.assertTrue(search_posts('кошка').exists())
+        post.delete()
+        self.assertFalse(search_posts('кошка').exists())
+
+    def test_empty_query(self):
+        """Пустой запрос ничего не ищет."""
+        Post.objects.create(text='Пост', author=self.user)
+        self.assertEqual(len(self.search('  ')), 0)
+
+    def test_inverted_index_backend(self):
+        """Запасной бэкенд с обратным индексом ищет по всем термам."""
+        backend = InvertedIndexBackend()
+        post = Post.objects.create(text='Тестовый пост', author=self.user)
+        other = Post.objects.create(text='Тестовый текст', author=self.user)
+        backend.rebuild()
+        self.assertEqual(list(backend.search('тестовые посты')), [post])
+        self.assertEqual(
+            set(backend.filter(Post.objects.all(), 'тестовый')),
+            {post, other})
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по тому же индексу."""
+        post = Post.objects.create(text='Тестовый пост', author=self.user)
+        self.assertEqual(
+            list(filter_posts(Post.objects.all(), 'тестовые')), [post])
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get('/admin/posts/post/', {'q': 'тестовые'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
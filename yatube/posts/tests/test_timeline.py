@@ -0,0 +1,67 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Post, TimelineEntry, User
+from posts.timeline import TimelinePaginator
+from yatube.settings import POSTS_PER_PAGE
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self, **params):
+        return self.client.get(reverse('posts:follow_index'),
+                               params).context['page_obj']
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка добавляет старые посты в ленту, отписка убирает."""
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        self.client.get(reverse('posts:profile_follow',
+                                args=(self.author.username,)))
+        self.assertEqual(list(self.feed()), [post])
+        self.client.get(reverse('posts:profile_unfollow',
+                                args=(self.author.username,)))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(list(self.feed()), [])
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост попадает в ленты подписчиков при публикации."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader,
+                                                     post=post).exists())
+
+    def test_feed_is_single_range_read(self):
+        """Лента без знаменитостей читается двумя запросами."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author) for i in range(3))
+        # Проверка знаменитостей и сам диапазон ленты.
+        with self.assertNumQueries(2):
+            page = TimelinePaginator(self.reader,
+                                     POSTS_PER_PAGE).cursor_page(None)
+            [post.author.username for post in page]
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_celebrity_posts_are_merged_on_read(self):
+        """Посты знаменитостей не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        regular = Post.objects.create(text='Обычный', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.author, author=self.star)
+        stars = [Post.objects.create(text=f'Звезда {i}', author=self.star)
+                 for i in range(POSTS_PER_PAGE)]
+        self.assertFalse(
+            TimelineEntry.objects.filter(author=self.star).exists())
+        first = self.feed()
+        self.assertEqual(list(first), stars[::-1])
+        second = self.feed(cursor=first.next_cursor)
+        self.assertEqual(list(second), [regular])
@@ -0,0 +1,137 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from posts import transfer
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.search import search_posts
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def export(self, kind, fmt='ndjson'):
+        stream = io.StringIO()
+        transfer.write_rows(transfer.export_rows(kind), stream, fmt,
+                            list(transfer.EXPORT_FIELDS[kind]))
+        stream.seek(0)
+        return stream
+
+    def load(self, kind, stream, fmt='ndjson', **kwargs):
+        return transfer.Importer(kind, **kwargs).run(
+            transfer.read_rows(stream, fmt))
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют данные во всех форматах."""
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        post = Post.objects.create(text='Тестовый пост', author=self.author,
+                                   group=group)
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        Follow.objects.create(user=self.reader, author=self.author)
+        for fmt in transfer.FORMATS:
+            with self.subTest(fmt=fmt):
+                dumps = {kind: self.export(kind, fmt)
+                         for kind in transfer.KINDS}
+                Follow.objects.all().delete()
+                Post.objects.all().delete()
+                Group.objects.all().delete()
+                for kind in transfer.KINDS:
+                    self.load(kind, dumps[kind], fmt)
+                imported = Post.objects.select_related('group').get()
+                self.assertEqual(
+                    (imported.pk, imported.text, imported.pub_date,
+                     imported.group.slug),
+                    (post.pk, post.text, post.pub_date, 'group'))
+                self.assertEqual(imported.comments.get().text, 'Ответ')
+                self.assertEqual(imported.comments_count, 1)
+                self.assertTrue(Follow.objects.filter(
+                    user=self.reader, author=self.author).exists())
+                self.assertTrue(TimelineEntry.objects.filter(
+                    user=self.reader, post=imported).exists())
+                self.assertEqual(list(search_posts('тестовые')), [imported])
+
+    def test_unknown_authors_are_created(self):
+        rows = [{'author': 'newcomer', 'text': 'Привет'}]
+        self.load('posts', io.StringIO(
+            '\n'.join(json.dumps(row) for row in rows)))
+        newcomer = User.objects.get(username='newcomer')
+        self.assertEqual(newcomer.counters.posts_count, 1)
+        self.assertFalse(newcomer.has_usable_password())
+
+    def test_taken_keys_are_skipped(self):
+        """Записи с занятыми ключами не трогают объекты этой базы."""
+        local = Post.objects.create(text='Местный пост', author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        rows = [{'id': local.pk, 'author': 'reader', 'text': 'Чужой текст'},
+                {'id': local.pk + 1, 'author': 'reader', 'text': 'Новый'}]
+        stats = self.load('posts', io.StringIO(
+            '\n'.join(json.dumps(row) for row in rows)))
+        self.assertEqual((stats['imported'], stats['skipped']), (1, 1))
+        local.refresh_from_db()
+        self.assertEqual(local.text, 'Местный пост')
+        self.assertEqual(list(search_posts('местный')), [local])
+        self.assertFalse(search_posts('чужой').exists())
+        self.assertFalse(TimelineEntry.objects.filter(post=local).exists())
+        stats = self.load('comments', io.StringIO(json.dumps(
+            {'id': 1, 'post': local.pk, 'author': 'reader',
+             'text': 'Ответ'})))
+        self.assertEqual(stats['imported'], 1)
+        stats = self.load('comments', io.StringIO(json.dumps(
+            {'id': 1, 'post': local.pk, 'author': 'reader',
+             'text': 'Другой ответ'})))
+        self.assertEqual((stats['imported'], stats['skipped']), (0, 1))
+        self.assertEqual(local.comments.get().text, 'Ответ')
+
+    def test_deferred_maintenance(self):
+        """С отложенным обслуживанием счётчики считаются в конце."""
+        stream = io.StringIO(''.join(
+            f'{{"author": "author", "text": "Пост {number}"}}\n'
+            for number in range(5)))
+        self.load('posts', stream, defer=True, batch_size=2)
+        self.author.counters.refresh_from_db()
+        self.assertEqual(self.author.counters.posts_count, 5)
+        self.assertEqual(search_posts('пост').count(), 5)
+
+    def test_resume_from_checkpoint(self):
+        """Прерванный импорт продолжается с последней пачки."""
+        lines = [f'{{"id": {pk}, "author": "author", "text": "Пост"}}\n'
+                 for pk in range(1, 6)]
+        broken = lines[:3] + ['{"author": "author", "text": "x", '
+                              '"pub_date": "вчера"}\n'] + lines[3:]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.ndjson')
+            with open(path, 'w') as source:
+                source.writelines(broken)
+            with self.assertRaises(Exception):
+                call_command('import_data', 'posts', path, batch_size=2,
+                             stdout=io.StringIO())
+            self.assertEqual(Post.objects.count(), 2)
+            self.assertEqual(
+                transfer.Checkpoint(f'{path}.checkpoint').load(), 2)
+            with open(path, 'w') as source:
+                source.writelines(lines[:3] + [
+                    '{"id": 9, "author": "author", "text": "Пост"}\n'
+                ] + lines[3:])
+            call_command('import_data', 'posts', path, batch_size=2,
+                         stdout=io.StringIO())
+            self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_export_command_streams_csv(self):
+        Post.objects.create(text='Пост', author=self.author)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.csv')
+            call_command('export_data', 'posts', output=path,
+                         stderr=io.StringIO())
+            with open(path) as exported:
+                header, row = exported.read().splitlines()
+        self.assertEqual(header, 'id,author,group,pub_date,text,image')
+        self.assertIn('author', row)
@@ -3,6 +3,7 @@ from django import forms
 from django.test import Client, TestCase
 from django.urls import reverse
 from posts.models import Group, Post, User, Comment, Follow
+from yatube.settings import COMMENTS_PER_PAGE
 
 
 class PostPagesTests(TestCase):
@@ -93,6 +94,39 @@ class PostPagesTests(TestCase):
         self.assertEqual(response.context.get('post').group, self.post.group)
         self.assertEqual(response.context.get('post').image, self.post.image)
 
+    def test_post_detail_shows_only_own_comments(self):
+        """На странице поста только его комментарии, авторы подгружены."""
+        other_post = Post.objects.create(text='Другой пост', author=self.user)
+        Comment.objects.create(post=other_post, author=self.user,
+                               text='Чужой комментарий')
+        own = Comment.objects.create(post=self.post, author=self.user,
+                                     text='Свой комментарий')
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        comments = list(response.context['comments'])
+        self.assertEqual(comments, [own])
+        with self.assertNumQueries(0):
+            self.assertEqual(comments[0].author.username, self.user.username)
+
+    def test_post_detail_comments_order_and_pages(self):
+        """Комментарии листаются курсором в обоих порядках."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Комментарий {i}')
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        for order, ordering in (('old', ('created', 'pk')),
+                                ('new', ('-created', '-pk'))):
+            with self.subTest(order=order):
+                expected = list(self.post.comments.order_by(*ordering))
+                page = self.authorized_client.get(
+                    url, {'order': order}).context['comments']
+                self.assertEqual(list(page), expected[:COMMENTS_PER_PAGE])
+                page = self.authorized_client.get(
+                    url, {'order': order, 'cursor': page.next_cursor}
+                ).context['comments']
+                self.assertEqual(list(page), expected[COMMENTS_PER_PAGE:])
+
     def test_post_create_pages_show_correct_context(self):
         """Шаблон post_create сформирован с правильным контекстом."""
         response = self.authorized_client.get(reverse('posts:post_create'))
@@ -145,10 +179,7 @@ class PostPagesTests(TestCase):
         """Проверка хранения и очищения кэша для index."""
         response = self.authorized_client.get(reverse('posts:index'))
         posts = response.content
-        Post.objects.create(
-            text='Еще пост',
-            author=self.user,
-        )
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
         response_old = self.authorized_client.get(reverse('posts:index'))
         old_posts = response_old.content
         self.assertEqual(old_posts, posts)
@@ -157,6 +188,19 @@ class PostPagesTests(TestCase):
         new_posts = response_new.content
         self.assertNotEqual(old_posts, new_posts)
 
+    def test_cache_index_invalidated_by_new_post(self):
+        """Новый пост сразу сбрасывает закэшированную ленту."""
+        self.authorized_client.get(reverse('posts:index'))
+        Post.objects.create(text='Еще пост', author=self.user)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Еще пост')
+
+    def test_cache_index_varies_on_auth_state(self):
+        """Переключатель лент не попадает в кэш для анонимов."""
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, reverse('posts:follow_index'))
+
     def test_following(self):
         """ Пользовтаель может подписываться на авторов и
         пост появляется в ленте тех, кто на него подписан"""
@@ -0,0 +1,77 @@
+import re
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from posts.warmup import warm
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, WARM_CACHE_HOST='testserver')
+class WarmupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Пост с картинкой', author=cls.author, group=cls.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        Comment.objects.create(post=cls.post, author=cls.author,
+                               text='Комментарий')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_fills_page_cache(self):
+        """После прогрева страницы отдаются из кэша без SQL."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.author)
+            for number in range(settings.POSTS_PER_PAGE))
+        report = warm(pages=2, groups=1, profiles=1, posts=1, workers=0)
+        self.assertEqual(report['pages'], 5)
+        self.assertEqual(report['thumbnails'], 1)
+        self.assertEqual(report['failed'], [])
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnail)
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        ]
+        client = Client()
+        # Вторая страница — по ссылке «Следующая» с первой.
+        next_link = re.search(r'href="(\?cursor=[^"]+)"',
+                              client.get(urls[0]).content.decode())
+        urls.append(urls[0] + next_link.group(1))
+        for url in urls:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                self.assertEqual(client.get(url).status_code, 200)
+
+    def test_command_reports_time(self):
+        output = StringIO()
+        call_command('warm_cache', workers=0, stdout=output,
+                     stderr=StringIO())
+        self.assertIn('Прогрето страниц', output.getvalue())
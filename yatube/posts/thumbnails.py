@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from .cache import bump_feed_generation, post_tags
+from .models import Post
+from core.jobs import job
+from core.pagecache import purge
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def schedule_thumbnail(post):
+    """Ставит генерацию миниатюры в очередь фоновых задач.
+
+    Задача ставится в транзакции сохранения поста и выполняется
+    воркером ``run_jobs``.
+    """
+    if post.image:
+        create_thumbnail.delay(post.pk)
+
+
+def in_worker(func, *args):
+    """Запускает задачу в потоке пула и закрывает его соединение с БД."""
+    try:
+        return func(*args)
+    finally:
+        connection.close()
+
+
+@job
+def create_thumbnail(post_id):
+    """Готовит миниатюру и сохраняет её адрес в посте.
+
+    Ошибка не перехватывается: очередь повторит задачу.
+    """
+    post = (Post.objects.filter(pk=post_id)
+            .only('image', 'author', 'group').first())
+    if post is None or not post.image:
+        return
+    geometry, options = settings.POST_THUMBNAIL
+    url = get_thumbnail(post.image, geometry, **options).url
+    variants = generate_variants(post)
+    updated = Post.objects.filter(
+        pk=post_id, image=post.image.name,
+    ).update(thumbnail=url, image_variants=json.dumps(variants),
+             updated=timezone.now())
+    if updated:
+        bump_feed_generation()
+        purge(*post_tags(post))
+
+
+def generate_thumbnail(post_id):
+    """Миниатюра вне очереди: ошибка только пишется в журнал."""
+    try:
+        create_thumbnail(post_id)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюру поста %s',
+                         post_id)
+
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+}
+
+
+def supported_formats():
+    """Форматы из POST_IMAGE_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [fmt for fmt in settings.POST_IMAGE_FORMATS if fmt in Image.SAVE]
+
+
+def generate_variants(post):
+    """Нарезает картинку поста по ширинам и форматам.
+
+    Возвращает ``{mime_type: {ширина: адрес}}``; пропорции кадра
+    берутся из геометрии основной миниатюры. Ширины больше исходной
+    картинки пропускаются: всегда остаётся только самая узкая.
+    """
+    base_width, base_height = (
+        int(size) for size in settings.POST_THUMBNAIL[0].split('x'))
+    stem = os.path.splitext(os.path.basename(post.image.name))[0]
+    variants = {}
+    with post.image.open('rb') as file, Image.open(file) as image:
+        image = image.convert('RGB')
+        widths = sorted(settings.POST_IMAGE_WIDTHS)
+        widths = [width for width in widths
+                  if width <= image.width] or widths[:1]
+        for width in widths:
+            height = round(width * base_height / base_width)
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            for fmt in supported_formats():
+                buffer = BytesIO()
+                resized.save(buffer, fmt, quality=80)
+                name = (f'posts/variants/{post.pk}/'
+                        f'{stem}-{width}.{fmt.lower()}')
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                name = default_storage.save(name,
+                                            ContentFile(buffer.getvalue()))
+                variants.setdefault(MIME_TYPES[fmt], {})[width] = (
+                    default_storage.url(name))
+    return variants
@@ -0,0 +1,131 @@
+from django.conf import settings
+from django.db import connection
+
+from .models import Follow, Post, TimelineEntry, UserCounters
+from core.pagination import CursorPaginator
+
+# SQLite вставляет пачку через UNION ALL, а в нём не больше 500 строк.
+BATCH_SIZE = 500
+
+
+def is_celebrity(author_id):
+    """Авторам с огромной аудиторией лента собирается при чтении."""
+    return UserCounters.objects.filter(
+        pk=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    fan_out_many(post.author_id, [post])
+
+
+def fan_out_many(author_id, posts):
+    """Раскладывает новые посты одного автора одним проходом."""
+    if is_celebrity(author_id):
+        return
+    followers = list(Follow.objects.filter(author_id=author_id)
+                     .values_list('user_id', flat=True))
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post=post,
+                       author_id=author_id, pub_date=post.pub_date)
+         for post in posts for user_id in followers),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(follow):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if is_celebrity(follow.author_id):
+        return
+    posts = (Post.objects.filter(author_id=follow.author_id)
+             .order_by('-pub_date', '-pk')
+             .values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL])
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=follow.user_id, post_id=pk,
+                       author_id=follow.author_id, pub_date=pub_date)
+         for pk, pub_date in posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def trim(follow):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(user_id=follow.user_id,
+                                 author_id=follow.author_id).delete()
+
+
+def rebuild():
+    """Собирает все ленты заново из подписок одним INSERT ... SELECT.
+
+    Последние ``TIMELINE_BACKFILL`` постов каждого автора выбираются
+    оконной функцией, поэтому посты не проходят через Python.
+    """
+    TimelineEntry.objects.all().delete()
+    table = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table(TimelineEntry._meta.db_table)} '
+            f'(user_id, post_id, author_id, pub_date) '
+            f'SELECT follow.user_id, ranked.id, ranked.author_id, '
+            f'ranked.pub_date '
+            f'FROM {table(Follow._meta.db_table)} follow '
+            f'JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            f') AS position FROM {table(Post._meta.db_table)}) ranked '
+            f'ON ranked.author_id = follow.author_id '
+            f'AND ranked.position <= %s '
+            f'WHERE follow.author_id NOT IN ('
+            f'SELECT user_id FROM {table(UserCounters._meta.db_table)} '
+            f'WHERE followers_count > %s)',
+            [settings.TIMELINE_BACKFILL, settings.TIMELINE_FANOUT_LIMIT],
+        )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок: чтение диапазона из TimelineEntry.
+
+    Посты авторов-«знаменитостей» в ленты не раскладываются, их
+    дочитываем из Post тем же курсором и сливаем с лентой.
+    Номерные страницы (``?page=N``) строятся по старому запросу.
+    """
+
+    def __init__(self, user, per_page, **kwargs):
+        self.user = user
+        object_list = Post.objects.filter(
+            author__following__user=user).select_related('author', 'group')
+        super().__init__(object_list, per_page, **kwargs)
+
+    def _fetch(self, position, reverse):
+        entries = (TimelineEntry.objects.filter(user=self.user)
+                   .select_related('post__author', 'post__group')
+                   .order_by('-pub_date', '-post_id'))
+        if reverse:
+            entries = entries.reverse()
+        if position is not None:
+            entries = entries.filter(
+                self._after(position, reverse, ('pub_date', 'post_id')))
+        rows = [entry.post for entry in entries[:self.per_page + 1]]
+        celebrities = self._celebrities()
+        if not celebrities:
+            return rows
+        queryset = self.object_list.filter(author__in=celebrities)
+        if reverse:
+            queryset = queryset.reverse()
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+        merged = {post.pk: post for post in rows}
+        merged.update(
+            (post.pk, post) for post in queryset[:self.per_page + 1])
+        return sorted(merged.values(), key=self.key,
+                      reverse=self.descending != reverse)[:self.per_page + 1]
+
+    def _celebrities(self):
+        return list(Follow.objects.filter(
+            user=self.user,
+            author__counters__followers_count__gt=(
+                settings.TIMELINE_FANOUT_LIMIT),
+        ).values_list('author_id', flat=True))
@@ -0,0 +1,305 @@
+"""Массовый импорт и экспорт групп, постов, комментариев и подписок.
+
+Записи читаются и пишутся потоком в NDJSON или CSV, поэтому память
+не зависит от объёма выгрузки. Импорт идёт пачками ``bulk_create``,
+каждая в своей транзакции; после пачки число обработанных записей
+сохраняется в контрольную точку, и прерванный импорт продолжается
+с того же места. Пользователи и группы в файлах указываются по
+``username`` и ``slug``. Посты и комментарии с ключами, которые
+в базе уже заняты, пропускаются.
+"""
+import csv
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, timeline
+from .bulk import batches, explicit_dates, rebuild_derived
+from .models import Comment, Follow, Group, Post, User
+from .search import get_backend
+
+BATCH_SIZE = 1000
+FORMATS = ('ndjson', 'csv')
+
+# Поле файла → путь поля для values_list().
+EXPORT_FIELDS = {
+    'groups': {'slug': 'slug', 'title': 'title',
+               'description': 'description'},
+    'posts': {'id': 'pk', 'author': 'author__username',
+              'group': 'group__slug', 'pub_date': 'pub_date',
+              'text': 'text', 'image': 'image'},
+    'comments': {'id': 'pk', 'post': 'post_id',
+                 'author': 'author__username', 'created': 'created',
+                 'text': 'text'},
+    'follows': {'user': 'user__username', 'author': 'author__username'},
+}
+MODELS = {'groups': Group, 'posts': Post, 'comments': Comment,
+          'follows': Follow}
+KINDS = tuple(EXPORT_FIELDS)
+
+
+def guess_format(path, default='ndjson'):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return extension if extension in FORMATS else default
+
+
+def export_rows(kind):
+    """Записи выгрузки по одной; в памяти — только текущая порция."""
+    names = list(EXPORT_FIELDS[kind])
+    rows = (MODELS[kind].objects.order_by('pk')
+            .values_list(*EXPORT_FIELDS[kind].values())
+            .iterator(chunk_size=2000))
+    for values in rows:
+        yield {name: value.isoformat() if isinstance(value, datetime)
+               else value
+               for name, value in zip(names, values)}
+
+
+def write_rows(rows, stream, fmt, fields):
+    written = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+        return written
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False))
+        stream.write('\n')
+        written += 1
+    return written
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key: value if value != '' else None
+                   for key, value in row.items()}
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Checkpoint:
+    """Число уже загруженных записей файла импорта."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as checkpoint:
+                return json.load(checkpoint)['done']
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def save(self, done):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            json.dump({'done': done}, checkpoint)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    if not isinstance(value, str):
+        return value
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Неверная дата: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+class Importer:
+    """Загрузка записей одного вида пачками.
+
+    Без ``defer`` счётчики, ленты и поисковый индекс обновляются после
+    каждой пачки только для затронутых объектов; с ``defer`` —
+    один раз в конце полной пересборкой, что быстрее на больших файлах.
+    """
+
+    def __init__(self, kind, batch_size=BATCH_SIZE, defer=False,
+                 checkpoint=None, log=None):
+        self.kind = kind
+        self.batch_size = batch_size
+        self.defer = defer
+        self.checkpoint = checkpoint
+        self.log = log or (lambda message: None)
+        self.rebuild = defer
+        self.skipped = 0
+
+    def run(self, rows):
+        done = self.checkpoint.load() if self.checkpoint else 0
+        if done:
+            self.log(f'Продолжаем с записи {done + 1}')
+        rows = itertools.islice(rows, done, None)
+        load = getattr(self, f'load_{self.kind}')
+        started = time.monotonic()
+        imported = 0
+        for batch in batches(rows, self.batch_size):
+            skipped = self.skipped
+            with transaction.atomic():
+                load(batch)
+            done += len(batch)
+            imported += len(batch) - (self.skipped - skipped)
+            if self.checkpoint:
+                self.checkpoint.save(done)
+            elapsed = time.monotonic() - started
+            self.log(f'{self.kind}: {done} записей, '
+                     f'{imported / elapsed if elapsed else 0:.0f} в секунду')
+        reset_sequences()
+        if self.rebuild:
+            self.log('Пересчёт счётчиков, лент и поискового индекса')
+            rebuild_derived()
+        if self.checkpoint:
+            self.checkpoint.clear()
+        return {'imported': imported, 'skipped': self.skipped,
+                'seconds': round(time.monotonic() - started, 1)}
+
+    def user_ids(self, usernames):
+        """Ключи пользователей по именам; недостающие создаются."""
+        usernames = set(usernames)
+        found = dict(User.objects.filter(username__in=usernames)
+                     .values_list('username', 'pk'))
+        missing = usernames - set(found)
+        if missing:
+            password = make_password(None)
+            User.objects.bulk_create(
+                User(username=username, password=password)
+                for username in missing)
+            created = dict(User.objects.filter(username__in=missing)
+                           .values_list('username', 'pk'))
+            counters.rebuild_user_counters(
+                User.objects.filter(pk__in=created.values()))
+            found.update(created)
+        return found
+
+    def group_ids(self, slugs):
+        slugs = {slug for slug in slugs if slug}
+        found = dict(Group.objects.filter(slug__in=slugs)
+                     .values_list('slug', 'pk'))
+        unknown = slugs - set(found)
+        if unknown:
+            raise ValueError(
+                f'Неизвестные группы: {", ".join(sorted(unknown))}. '
+                f'Сначала загрузите группы.')
+        return found
+
+    def load_groups(self, batch):
+        Group.objects.bulk_create(
+            (Group(slug=row['slug'], title=row['title'],
+                   description=row.get('description') or '')
+             for row in batch),
+            ignore_conflicts=True,
+        )
+
+    def new_rows(self, model, batch):
+        """Записи, чьи ключи из файла ещё не заняты.
+
+        Строка с тем же ключом — другой объект этой базы, поэтому
+        такие записи пропускаются, а не перезаписывают его индекс
+        и ленты.
+        """
+        ids = {int(row['id']) for row in batch if row.get('id')}
+        taken = set(model.objects.filter(pk__in=ids)
+                    .values_list('pk', flat=True))
+        rows = []
+        for row in batch:
+            if row.get('id'):
+                if int(row['id']) in taken:
+                    continue
+                taken.add(int(row['id']))
+            rows.append(row)
+        self.skipped += len(batch) - len(rows)
+        return rows
+
+    def load_posts(self, batch):
+        batch = self.new_rows(Post, batch)
+        authors = self.user_ids(row['author'] for row in batch)
+        groups = self.group_ids(row.get('group') for row in batch)
+        posts = [
+            Post(pk=row.get('id'), author_id=authors[row['author']],
+                 group_id=groups.get(row.get('group')),
+                 pub_date=parse_date(row.get('pub_date')),
+                 text=row['text'], image=row.get('image') or '')
+            for row in batch
+        ]
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            Post.objects.bulk_create(posts)
+        if self.defer:
+            return
+        counters.rebuild_user_counters(
+            User.objects.filter(pk__in=authors.values()))
+        counters.rebuild_group_counters(
+            Group.objects.filter(pk__in=groups.values()))
+        indexed = [post for post in posts if post.pk is not None]
+        if len(indexed) < len(posts):
+            # Без ключей из файла SQLite не возвращает ключи вставленных
+            # строк: индекс и ленты для них соберём в конце.
+            self.rebuild = True
+        for post in indexed:
+            get_backend().index(post)
+            timeline.fan_out(post)
+
+    def load_comments(self, batch):
+        batch = self.new_rows(Comment, batch)
+        authors = self.user_ids(row['author'] for row in batch)
+        post_ids = {int(row['post']) for row in batch}
+        existing = set(Post.objects.filter(pk__in=post_ids)
+                       .values_list('pk', flat=True))
+        comments = [
+            Comment(pk=row.get('id'), post_id=int(row['post']),
+                    author_id=authors[row['author']], text=row['text'],
+                    created=parse_date(row.get('created')))
+            for row in batch if int(row['post']) in existing
+        ]
+        self.skipped += len(batch) - len(comments)
+        with explicit_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(comments)
+        if not self.defer:
+            counters.rebuild_post_counters(
+                Post.objects.filter(pk__in=existing))
+
+    def load_follows(self, batch):
+        users = self.user_ids(
+            itertools.chain.from_iterable(
+                (row['user'], row['author']) for row in batch))
+        follows = [
+            Follow(user_id=users[row['user']],
+                   author_id=users[row['author']])
+            for row in batch if row['user'] != row['author']
+        ]
+        self.skipped += len(batch) - len(follows)
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        if self.defer:
+            return
+        counters.rebuild_user_counters(
+            User.objects.filter(pk__in=users.values()))
+        for follow in follows:
+            timeline.backfill(follow)
+
+
+def reset_sequences():
+    """После вставки с явными ключами сдвигает последовательности."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Group, Post, Comment, Follow])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
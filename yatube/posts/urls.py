@@ -1,6 +1,19 @@
-from django.urls import path
+from django.urls import path, register_converter
 
-from . import views
+from . import feeds, views
+
+
+class FeedFormatConverter:
+    regex = 'atom|rss|json'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+register_converter(FeedFormatConverter, 'feed')
 
 app_name = 'posts'
 
@@ -14,6 +27,7 @@ urlpatterns = [
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -24,4 +38,11 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('feeds/index.<feed:fmt>', feeds.index_feed, name='index_feed'),
+    path('feeds/group/<slug:slug>.<feed:fmt>', feeds.group_feed,
+         name='group_feed'),
+    path('feeds/profile/<str:username>.<feed:fmt>', feeds.profile_feed,
+         name='profile_feed'),
+    path('feeds/follow/<str:token>.<feed:fmt>', feeds.follow_feed,
+         name='follow_feed'),
 ]
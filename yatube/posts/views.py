@@ -1,31 +1,59 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import conditional as validators
+from .cache import FEED, page_tags, post_tags
+from .feeds import follow_feed_token
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Comment, Follow
-from yatube.settings import POSTS_PER_PAGE
+from .models import Group, Post, User, Follow
+from .search import search_posts
+from .thumbnails import schedule_thumbnail
+from .timeline import TimelinePaginator
+from core.conditional import conditional
+from core import pagecache
+from core.pagination import paginate
+from yatube.settings import (COMMENTS_PER_PAGE, FEED_CACHE_TIMEOUT,
+                             POSTS_PER_PAGE)
 
+COMMENTS_ORDERING = {
+    'old': ('created', 'pk'),
+    'new': ('-created', '-pk'),
+}
 
+
+def count_posts():
+    """Число всех постов; пересчитывается после изменения постов."""
+    return FEED.get_or_compute(('posts_count',), Post.objects.count)
+
+
+@conditional(validators.index)
 def index(request):
     object_list = Post.objects.select_related('author', 'group')
-    paginator = Paginator(object_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, object_list, POSTS_PER_PAGE,
+                        estimate=count_posts)
+    if pagecache.enabled(request):
+        pagecache.tag(request, 'index', *page_tags(page_obj))
     context = {
         'page_obj': page_obj,
+        'index': True,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+        'feed_page_key': (request.GET.get('cursor')
+                          or request.GET.get('page', '')),
     }
     template = 'posts/index.html'
     return render(request, template, context)
 
 
+@conditional(validators.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     template = 'posts/group_list.html'
     object_list = group.posts.select_related('author')
-    paginator = Paginator(object_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, object_list, POSTS_PER_PAGE,
+                        estimate=group.posts_count)
+    if pagecache.enabled(request):
+        pagecache.tag(request, f'group:{group.pk}', *page_tags(page_obj))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -33,8 +61,10 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@conditional(validators.profile)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User.objects.select_related('counters'),
+                               username=username)
     object_list = author.posts.select_related('group')
     following = (
         request.user.is_authenticated
@@ -43,9 +73,11 @@ def profile(request, username):
             author=author,
         ).exists()
     )
-    paginator = Paginator(object_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    counters = getattr(author, 'counters', None)
+    page_obj = paginate(request, object_list, POSTS_PER_PAGE,
+                        estimate=counters and counters.posts_count)
+    if pagecache.enabled(request):
+        pagecache.tag(request, f'author:{author.pk}', *page_tags(page_obj))
     context = {
         'author': author,
         'page_obj': page_obj,
@@ -54,25 +86,51 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional(validators.post_detail)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'), pk=post_id)
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.select_related('post')
+    comments_order = request.GET.get('order')
+    if comments_order not in COMMENTS_ORDERING:
+        comments_order = 'old'
+    comments = paginate(request, post.comments.select_related('author'),
+                        COMMENTS_PER_PAGE,
+                        ordering=COMMENTS_ORDERING[comments_order],
+                        estimate=post.comments_count)
+    if pagecache.enabled(request):
+        pagecache.tag(request, *post_tags(post), *(
+            f'author:{comment.author_id}' for comment in comments))
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        'comments_order': comments_order,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = search_posts(query).select_related('author', 'group')
+    page_obj = paginate(request, results, POSTS_PER_PAGE,
+                        ordering=('-score', '-pk'), has_next_only=True)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
+            schedule_thumbnail(post)
         return redirect('posts:profile', post.author.username)
     return render(request, 'posts/create_post.html', context={'form': form})
 
@@ -81,11 +139,17 @@ def post_create(request):
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     redirected_page = redirect('posts:post_detail', post_id=post.pk)
-    if request.user == post.author:
+    if request.user.pk == post.author_id:
         form = PostForm(request.POST or None, files=request.FILES or None,
                         instance=post)
         if form.is_valid():
-            form.save()
+            image_changed = 'image' in form.changed_data
+            if image_changed:
+                post.thumbnail = post.image_variants = ''
+            with transaction.atomic():
+                form.save()
+                if image_changed:
+                    schedule_thumbnail(post)
             return redirected_page
         return render(request, 'posts/create_post.html',
                       context={'post': post,
@@ -102,17 +166,21 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {'page_obj': page_obj}
+    paginator = TimelinePaginator(request.user, POSTS_PER_PAGE,
+                                  has_next_only=True)
+    page_obj = paginator.page_from_request(request)
+    context = {
+        'page_obj': page_obj,
+        'follow': True,
+        'feed_token': follow_feed_token(request.user),
+    }
     return render(request, 'posts/follow.html', context)
 
 
@@ -120,7 +188,8 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
@@ -131,5 +200,6 @@ def profile_unfollow(request, username):
     follow = (Follow.objects.select_related('author',
                                             'user').filter(author=author,
                                                            user=user))
-    follow.delete()
+    with transaction.atomic():
+        follow.delete()
     return redirect('posts:profile', username)
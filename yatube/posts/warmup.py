@@ -0,0 +1,143 @@
+"""Прогрев кэша после деплоя.
+
+Сначала готовятся недостающие миниатюры постов, которые окажутся на
+прогреваемых страницах, затем страницы запрашиваются анонимно через
+тестовый клиент с настоящим именем хоста: так заполняются кэш страниц,
+фрагменты ленты и карточки постов. Работа идёт в пуле из ``workers``
+потоков; при ``workers = 0`` — в текущем потоке.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from .models import Group, Post, User
+from .thumbnails import generate_thumbnail, in_worker
+from core.pagination import CursorPaginator
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def client(host):
+    if getattr(_local, 'client', None) is None:
+        _local.client = Client(HTTP_HOST=host)
+    return _local.client
+
+
+def top(queryset, field, limit):
+    return list(queryset.values_list(field, flat=True)[:limit])
+
+
+def index_cursors(pages):
+    """Курсоры ссылок «Следующая» со второй страницы главной по ``pages``.
+
+    Кэш страниц хранит ответы по полному адресу, поэтому прогревать
+    нужно те адреса, по которым переходят посетители.
+    """
+    paginator = CursorPaginator(Post.objects.values('pub_date', 'pk'),
+                                settings.POSTS_PER_PAGE)
+    cursors = []
+    cursor = None
+    for _ in range(pages - 1):
+        cursor = paginator.cursor_page(cursor).next_cursor
+        if cursor is None:
+            break
+        cursors.append(cursor)
+    return cursors
+
+
+class Plan:
+    """Что прогревать: адреса страниц и посты для миниатюр."""
+
+    def __init__(self, pages, groups, profiles, posts):
+        index = reverse('posts:index')
+        self.urls = [index] + [f'{index}?cursor={cursor}'
+                               for cursor in index_cursors(pages)]
+        post_ids = set(top(Post.objects.order_by('-pub_date', '-pk'), 'pk',
+                           pages * settings.POSTS_PER_PAGE))
+        for slug in top(Group.objects.order_by('-posts_count'), 'slug',
+                        groups):
+            self.urls.append(reverse('posts:group_list', args=(slug,)))
+            post_ids.update(top(Post.objects.filter(group__slug=slug)
+                                .order_by('-pub_date', '-pk'), 'pk',
+                                settings.POSTS_PER_PAGE))
+        # Посещения профилей не считаются: самые посещаемые — это
+        # профили авторов с наибольшим числом подписчиков.
+        for username in top(User.objects.order_by(
+                '-counters__followers_count', '-counters__posts_count'),
+                'username', profiles):
+            self.urls.append(reverse('posts:profile', args=(username,)))
+            post_ids.update(top(Post.objects.filter(author__username=username)
+                                .order_by('-pub_date', '-pk'), 'pk',
+                                settings.POSTS_PER_PAGE))
+        hot = top(Post.objects.order_by('-comments_count', '-pk'), 'pk',
+                  posts)
+        self.urls += [reverse('posts:post_detail', args=(pk,))
+                      for pk in hot]
+        post_ids.update(hot)
+        self.thumbnails = top(
+            Post.objects.filter(pk__in=post_ids, thumbnail='')
+            .exclude(image='').order_by('pk'), 'pk', None)
+
+
+def run_tasks(func, items, workers):
+    if not workers:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers,
+                            thread_name_prefix='warmup') as pool:
+        return list(pool.map(lambda item: in_worker(func, item), items))
+
+
+def warm(pages=None, groups=None, profiles=None, posts=None, workers=None,
+         host=None, log=None):
+    """Прогревает кэш и возвращает отчёт о затраченном времени."""
+    log = log or (lambda message: None)
+    workers = settings.WARM_CACHE_WORKERS if workers is None else workers
+    host = host or settings.WARM_CACHE_HOST
+    started = time.monotonic()
+    plan = Plan(settings.WARM_CACHE_PAGES if pages is None else pages,
+                settings.WARM_CACHE_GROUPS if groups is None else groups,
+                settings.WARM_CACHE_PROFILES if profiles is None
+                else profiles,
+                settings.WARM_CACHE_POSTS if posts is None else posts)
+    run_tasks(generate_thumbnail, plan.thumbnails, workers)
+    thumbnails_done = time.monotonic()
+    log(f'Миниатюры: {len(plan.thumbnails)} за '
+        f'{thumbnails_done - started:.1f} с')
+
+    def fetch(url):
+        return url, client(host).get(url).status_code
+
+    failed = [url for url, status in run_tasks(fetch, plan.urls, workers)
+              if status != 200]
+    finished = time.monotonic()
+    log(f'Страницы: {len(plan.urls)} за {finished - thumbnails_done:.1f} с')
+    for url in failed:
+        log(f'Не прогрета: {url}')
+    return {'pages': len(plan.urls), 'thumbnails': len(plan.thumbnails),
+            'failed': failed, 'seconds': round(finished - started, 2)}
+
+
+def warm_in_background():
+    """Прогрев в фоновом потоке процесса, не задерживая его запуск.
+
+    ``LocMemCache`` у каждого процесса свой, поэтому каждый воркер
+    сервера прогревает себя сам.
+    """
+    def run():
+        try:
+            report = in_worker(warm)
+        except Exception:
+            logger.exception('Не удалось прогреть кэш')
+            return
+        logger.info('Кэш прогрет: %s', report)
+
+    thread = threading.Thread(target=run, name='warmup', daemon=True)
+    thread.start()
+    return thread
@@ -1,4 +1,5 @@
 import os
+from urllib.parse import urlparse
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -24,9 +25,13 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'core.pagecache.PageCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,13 +64,36 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+# Соединения с базой живут между запросами DATABASE_CONN_MAX_AGE секунд
+# (0 — закрывать после каждого запроса).
+DATABASE_CONN_MAX_AGE = int(os.getenv('DATABASE_CONN_MAX_AGE', 60))
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
     }
 }
 
+# Реплики для чтения: файлы SQLite через запятую в DATABASE_REPLICAS,
+# например DATABASE_REPLICAS=replica.sqlite3. Копию основной базы
+# в реплики делает команда sync_replicas.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.getenv('DATABASE_REPLICAS', '').split(','))):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, name.strip()),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Сколько секунд после записи браузер читает из основной базы:
+# верхняя граница отставания реплик.
+REPLICA_STICKY_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -101,7 +129,9 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма отправляются фоновой задачей бэкендом JOBS_EMAIL_BACKEND.
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -110,10 +140,121 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кэш задаётся адресом в переменной окружения CACHE_URL:
+#   locmem://                  — кэш внутри процесса (по умолчанию);
+#   file:///var/tmp/yatube     — общий кэш в файлах для всех воркеров;
+#   db://yatube_cache          — общий кэш в таблице базы данных
+#                                (создаётся командой createcachetable);
+#   redis://localhost:6379/1   — Redis, нужен пакет django-redis.
+CACHE_URL = urlparse(os.getenv('CACHE_URL', 'locmem://'))
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_LOCATIONS = {
+    'locmem': CACHE_URL.netloc,
+    'file': CACHE_URL.path,
+    'db': CACHE_URL.netloc,
+    'redis': CACHE_URL.geturl(),
+}
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_URL.scheme],
+        'LOCATION': CACHE_LOCATIONS[CACHE_URL.scheme],
+        'KEY_PREFIX': 'yatube',
     }
 }
 
 POSTS_PER_PAGE = 10
+
+# Номерные страницы: сколько ссылок показывать по обе стороны от текущей
+# и с какого размера ленты доверять оценке числа постов вместо COUNT(*).
+PAGINATOR_WINDOW = 2
+PAGINATOR_ESTIMATE_THRESHOLD = 10000
+
+# Сколько последних постов отдают ленты Atom, RSS и JSON Feed.
+FEED_SIZE = 20
+
+# Миниатюры картинок постов готовятся фоновой задачей.
+POST_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+# Потоки manage.py generate_thumbnails.
+THUMBNAIL_WORKERS = 2
+# Ширины и форматы адаптивных вариантов картинок постов. Форматы,
+# которые не поддерживает установленный Pillow, пропускаются.
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+
+COMMENTS_PER_PAGE = 20
+
+# Размер страницы JSON API (/api/v1/) и предел для ?limit=.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+# Сколько объектов можно создать одним запросом и сколько секунд
+# хранится ответ для повтора по Idempotency-Key.
+API_MAX_BATCH = 500
+API_IDEMPOTENCY_TTL = 60 * 60 * 24
+
+# Сколько последних постов автора попадает в ленту при подписке.
+TIMELINE_BACKFILL = 200
+# Посты авторов, у которых подписчиков больше, не раскладываются
+# по лентам при публикации, а дочитываются при открытии ленты.
+TIMELINE_FANOUT_LIMIT = 10000
+
+# Фрагменты ленты инвалидируются при сохранении и удалении постов,
+# поэтому их можно хранить долго.
+FEED_CACHE_TIMEOUT = 60 * 10
+# Карточка поста меняет ключ при каждой правке поста.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Истёкшие значения get_or_compute и страницы ещё столько секунд
+# отдаются, пока их пересчитывают в фоне, или в аварийном режиме.
+CACHE_STALE_TTL = 60 * 60
+# Потоки фонового пересчёта; 0 — пересчёт в потоке запроса.
+CACHE_REVALIDATE_WORKERS = 2
+# Ошибка базы или пересчёт дольше CACHE_SLOW_COMPUTE_SECONDS включают
+# аварийный режим на CACHE_DEGRADED_SECONDS: кэш отдаётся без пересчёта.
+CACHE_SLOW_COMPUTE_SECONDS = 2
+CACHE_DEGRADED_SECONDS = 30
+# Страницы для анонимных посетителей сбрасываются по тегам при записи;
+# 0 отключает кэш страниц.
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Прогрев кэша (manage.py warm_cache): первые страницы главной,
+# самые активные группы, профили с наибольшим числом подписчиков
+# и посты с наибольшим числом комментариев.
+WARM_CACHE_PAGES = 5
+WARM_CACHE_GROUPS = 10
+WARM_CACHE_PROFILES = 10
+WARM_CACHE_POSTS = 20
+WARM_CACHE_WORKERS = 4
+# Хост, под которым страницы попадают в кэш страниц.
+WARM_CACHE_HOST = os.getenv('WARM_CACHE_HOST', 'localhost')
+# Прогревать кэш в фоне при запуске каждого процесса WSGI.
+WARM_CACHE_ON_STARTUP = bool(int(os.getenv('WARM_CACHE_ON_STARTUP', 0)))
+
+# Брокер фоновых задач (core.jobs): db://, redis://host:port/db
+# или inline:// — выполнять задачу в процессе сразу после коммита.
+JOBS_BROKER = os.getenv('JOBS_BROKER', 'db://')
+# Процессы manage.py run_jobs.
+JOBS_WORKER_PROCESSES = 2
+# Пауза воркера, когда очередь пуста, в секундах.
+JOBS_POLL_INTERVAL = 1
+# Повтор упавшей задачи через JOBS_RETRY_DELAY * 2^(попытка - 1) секунд,
+# но не позже чем через JOBS_RETRY_MAX_DELAY.
+JOBS_RETRY_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 60 * 60
+# Задача, которую воркер держит дольше, возвращается в очередь:
+# воркер, скорее всего, упал.
+JOBS_VISIBILITY_TIMEOUT = 60 * 10
+# Сколько дней хранить выполненные и упавшие задачи.
+JOBS_KEEP_DAYS = 7
+# Периодические задачи: (cron, имя задачи[, args]).
+JOBS_SCHEDULE = [
+    ('0 * * * *', 'api.idempotency.clear_expired'),
+    ('30 3 * * *', 'core.jobs.tasks.clear_finished'),
+]
+
+# Метрики запросов (/metrics/) считаются по последним замерам
+# каждого имени URL в пределах процесса.
+METRICS_WINDOW = 1000